@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Kąt talerza w dowolnej chwili na podstawie telemetrii statusu
+
+`current_position` to tylko ostatni zadany cel. AngleEstimator odpowiada na
+pytanie "gdzie był talerz w chwili t?" (np. w chwili naświetlenia klatki)
+na podstawie raportów '?' zapisanych w StatusRing:
+
+- czas raportu to chwila jego odebrania; firmware odczytało pozycję
+  wcześniej, gdzieś między wysłaniem '?' a odebraniem odpowiedzi.
+  Przesuwamy więc próbki o połowę zmierzonego czasu obiegu
+  (SerialLink.status_rtt_min), a druga połowa to niepewność chwili próbki;
+- między raportami pozycja jest interpolowana liniowo. Ruch z
+  przyspieszeniem ograniczonym przez a ($120) odbiega od cięciwy
+  najwyżej o a * (t - t0) * (t1 - t) / 2;
+- poza zakresem raportów ekstrapolujemy prędkością z dwóch ostatnich
+  próbek (zero, gdy talerz był Idle) z błędem a * dt² / 2;
+- kąty są w układzie zadania (StatusRing.task_series()). Po zmianie
+  przesunięcia (przenumerowanie, resynchronizacja) pozycja skacze, więc
+  między próbkami z różnych układów nie interpolujemy - chwila między
+  nimi jest ekstrapolowana od bliższej próbki w jej układzie.
+
+Błąd obejmuje też kwantyzację pozycji do kroku silnika ($100 kroków/°).
+Zapytanie zbiorcze estimate_many() przechodzi przez próbki i chwile
+jednym scaleniem - tysiące klatek kosztują tyle, co jedno przejście.
+"""
+
+import bisect
+import collections
+import math
+from array import array
+
+from horus_turntable_motion import DEFAULT_ACCELERATION
+from horus_turntable_status import STATE_CODES
+
+# Kroki silnika na stopień ($100) - pozycja firmware jest wielokrotnością kroku
+DEFAULT_STEPS_PER_DEGREE = 16.0
+
+# Maksymalna ekstrapolacja poza zakres raportów (sekundy); dalej - brak oszacowania
+MAX_EXTRAPOLATION = 1.0
+
+AngleEstimate = collections.namedtuple('AngleEstimate', 'angle error')
+AngleEstimate.__doc__ = """Oszacowany kąt i ograniczenie błędu (stopnie); nan/inf = brak danych"""
+
+_IDLE = STATE_CODES['Idle']
+
+
+class AngleEstimator:
+    """Kąt talerza w chwili czasu hosta, z ograniczeniem błędu"""
+
+    def __init__(self, ring, latency=0.0, jitter=None, acceleration=DEFAULT_ACCELERATION,
+                 max_speed=None, steps_per_degree=DEFAULT_STEPS_PER_DEGREE,
+                 max_extrapolation=MAX_EXTRAPOLATION):
+        """
+        Args:
+            ring: StatusRing z raportami statusu
+            latency: O ile chwila odczytu pozycji poprzedza odebranie raportu (sekundy)
+            jitter: Niepewność tej chwili (domyślnie równa latency)
+            acceleration: Przyspieszenie firmware ($120, °/s²) - ogranicza krzywiznę ruchu
+            max_speed: Najwyższa prędkość (°/s, np. modalne F); None = bez ograniczenia
+            steps_per_degree: Kroki silnika na stopień ($100)
+            max_extrapolation: Najdalsza ekstrapolacja poza zakres raportów (sekundy)
+        """
+        self.ring = ring
+        self.latency = latency
+        self.jitter = latency if jitter is None else jitter
+        self.acceleration = acceleration
+        self.max_speed = max_speed
+        self.resolution = 0.5 / steps_per_degree
+        self.max_extrapolation = max_extrapolation
+
+    @classmethod
+    def from_link(cls, ring, link, **kwargs):
+        """
+        Estymator z opóźnieniem zmierzonym przez SerialLink
+
+        Odczyt pozycji nastąpił między wysłaniem '?' a odebraniem raportu:
+        przesunięcie to połowa najkrótszego czasu obiegu, a niepewność -
+        reszta ostatniego zmierzonego (kolejkowanie w USB ją wydłuża).
+        """
+        rtt = link.status_rtt_min or 0.0
+        kwargs.setdefault('latency', rtt / 2)
+        kwargs.setdefault('jitter', (link.status_rtt or rtt) - rtt / 2)
+        return cls(ring, **kwargs)
+
+    def estimate(self, timestamp):
+        """
+        Kąt w jednej chwili
+
+        Args:
+            timestamp: Czas hosta (time.time())
+
+        Returns:
+            AngleEstimate
+        """
+        samples = self._samples()
+        index = bisect.bisect_right(samples[0], timestamp)
+        return AngleEstimate(*self._at(timestamp, index, *samples))
+
+    def estimate_many(self, timestamps):
+        """
+        Kąty w wielu chwilach naraz (np. czasy naświetlenia klatek)
+
+        Args:
+            timestamps: Sekwencja czasów hosta (dowolna kolejność)
+
+        Returns:
+            Krotka (array('d') kątów, array('d') błędów) w kolejności timestamps
+        """
+        samples = self._samples()
+        times = samples[0]
+        count = len(timestamps)
+        angles = array('d', bytes(8 * count))
+        errors = array('d', bytes(8 * count))
+        order = range(count)
+        if any(timestamps[i] > timestamps[i + 1] for i in range(count - 1)):
+            order = sorted(order, key=timestamps.__getitem__)
+        # Chwile rosną - indeks próbki tylko się przesuwa (scalenie zamiast bisect)
+        index = 0
+        n = len(times)
+        for i in order:
+            t = timestamps[i]
+            while index < n and times[index] <= t:
+                index += 1
+            angles[i], errors[i] = self._at(t, index, *samples)
+        return angles, errors
+
+    def _samples(self):
+        """Próbki z bufora (układ zadania) z czasem przesuniętym na chwilę odczytu pozycji"""
+        times, positions, states, frames = self.ring.task_series()
+        if any(math.isnan(p) for p in positions):
+            # Raport bez pozycji albo z nieznanego układu - pomijamy
+            keep = [i for i, p in enumerate(positions) if not math.isnan(p)]
+            times = array('d', (times[i] for i in keep))
+            positions = array('d', (positions[i] for i in keep))
+            states = array('b', (states[i] for i in keep))
+            frames = array('l', (frames[i] for i in keep))
+        if self.latency:
+            times = array('d', (t - self.latency for t in times))
+        return times, positions, states, frames
+
+    def _speed_limit(self, speed):
+        return speed if self.max_speed is None else min(speed, self.max_speed)
+
+    def _at(self, t, index, times, positions, states, frames):
+        """Oszacowanie dla chwili t; times[index - 1] <= t < times[index]"""
+        n = len(times)
+        a = self.acceleration
+        if n == 0:
+            return math.nan, math.inf
+        if 0 < index < n and frames[index - 1] == frames[index]:
+            t0, t1 = times[index - 1], times[index]
+            p0, p1 = positions[index - 1], positions[index]
+            span = t1 - t0
+            if span <= 0:
+                return p1, self.resolution
+            fraction = (t - t0) / span
+            angle = p0 + fraction * (p1 - p0)
+            # Odchylenie od cięciwy przy |przyspieszeniu| <= a
+            curvature = 0.5 * a * (t - t0) * (t1 - t)
+            speed = self._speed_limit(abs(p1 - p0) / span + 0.5 * a * span)
+            return angle, self.resolution + curvature + speed * self.jitter
+
+        # Poza zakresem raportów albo między układami - ekstrapolacja od bliższej próbki
+        if index == 0:
+            edge = 0
+        elif index == n or t - times[index - 1] <= times[index] - t:
+            edge = index - 1
+        else:
+            edge = index
+        dt = t - times[edge]
+        if abs(dt) > self.max_extrapolation:
+            return math.nan, math.inf
+        # Sąsiad po przeciwnej stronie niż t, z tego samego układu
+        neighbour = edge - 1 if edge == index - 1 else edge + 1
+        velocity = span = 0.0
+        if (0 <= neighbour < n and frames[neighbour] == frames[edge]
+                and states[edge] != _IDLE):
+            span = abs(times[edge] - times[neighbour])
+            if span:
+                velocity = ((positions[edge] - positions[neighbour])
+                            / (times[edge] - times[neighbour]))
+                velocity = math.copysign(self._speed_limit(abs(velocity)), velocity)
+        angle = positions[edge] + velocity * dt
+        # Prędkość z cięciwy różni się od prędkości na końcu najwyżej o a * span / 2
+        error = (self.resolution + 0.5 * a * dt * dt + 0.5 * a * span * abs(dt)
+                 + (abs(velocity) + a * abs(dt)) * self.jitter)
+        return angle, error
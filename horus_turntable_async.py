@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Kontroler talerza Horus 0.2 (GRBL) dla asyncio
+
+Port jest otwierany w trybie nieblokującym, a jego deskryptor rejestrowany
+w pętli zdarzeń przez loop.add_reader() / loop.add_writer(). Jedna pętla
+może więc obsługiwać wiele talerzy i kamer bez osobnego wątku na urządzenie.
+Wymaga portu z deskryptorem pliku (Linux/macOS, także pty).
+
+Przykład:
+    async def scan():
+        table = AsyncDigitizerController('/dev/ttyUSB0')
+        await table.connect()
+        await table.enable_motor()
+        await table.rotate_to_position(90, speed=200)
+        await table.disconnect()
+"""
+
+import asyncio
+import collections
+import os
+
+import serial
+
+from horus_turntable_serial import (CYCLE_START, DEFAULT_TIMEOUT, FEED_HOLD, LINE_LOST,
+                                    LINE_REALTIME, LINE_RESPONSE, LINE_SENT, LINE_STATUS,
+                                    LINE_UNSOLICITED, PROBE_DELAY, PROBE_INTERVAL,
+                                    READY_TIMEOUT, REALTIME_COMMANDS, RX_BUFFER_SIZE,
+                                    SOFT_RESET, STATUS_QUERY, LineBroadcaster, LineFramer,
+                                    PendingCommand, clean_gcode_line, is_alarm, is_banner,
+                                    is_status_report, is_terminator)
+from horus_turntable_motion import feed_from_gcode, move_command
+
+
+class AsyncSerialLink(LineBroadcaster):
+    """
+    Nieblokujący odpowiednik SerialLink dla pętli asyncio
+
+    Dopasowuje odpowiedzi do komend w kolejności FIFO i pilnuje, by suma
+    niepotwierdzonych bajtów nie przekroczyła bufora RX firmware.
+    Subskrybenci (subscribe()) są wołani w pętli zdarzeń.
+    """
+
+    def __init__(self, ser, rx_buffer_size=RX_BUFFER_SIZE):
+        """
+        Args:
+            ser: Otwarty obiekt serial.Serial (musi mieć fileno())
+            rx_buffer_size: Rozmiar bufora RX firmware dla liczenia znaków
+        """
+        super().__init__()
+        self.ser = ser
+        self.rx_buffer_size = rx_buffer_size
+        self.error = None
+        self.banner = None
+        self.last_status = None
+        self.realtime_latency = None
+        self.realtime_latency_max = 0.0
+
+        self._loop = asyncio.get_running_loop()
+        self._fd = ser.fileno()
+        self._framer = LineFramer()
+        self._pending = collections.deque()
+        self._inflight_bytes = 0
+        self._room = asyncio.Event()
+        self._ready = asyncio.Event()
+        self._banner_event = asyncio.Event()
+        self._status_event = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+        self._write_buffer = bytearray()
+        self._running = False
+
+    @property
+    def is_alive(self):
+        """Czy deskryptor jest zarejestrowany w pętli i sprawny"""
+        return self._running and self.error is None
+
+    def start(self):
+        """Rejestruje deskryptor portu w pętli zdarzeń"""
+        if self._running:
+            return
+        os.set_blocking(self._fd, False)
+        self._loop.add_reader(self._fd, self._on_readable)
+        self._running = True
+
+    def close(self):
+        """Wyrejestrowuje deskryptor i zamyka port"""
+        if self._running:
+            self._loop.remove_reader(self._fd)
+            self._loop.remove_writer(self._fd)
+        self._running = False
+        try:
+            if self.ser.is_open:
+                self.ser.close()
+        except (serial.SerialException, OSError):
+            pass
+        self._fail_pending(serial.SerialException("Port zamknięty"))
+
+    def _on_readable(self):
+        """Callback pętli - dane czekają w porcie"""
+        try:
+            data = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._connection_lost(e)
+            return
+        if not data:
+            self._connection_lost(OSError("Port zamknięty po stronie urządzenia"))
+            return
+        for line in self._framer.feed(data):
+            self._handle_line(line)
+
+    def _connection_lost(self, exc):
+        """Obsługuje utratę portu (np. odłączony kabel USB)"""
+        self.error = exc
+        self._loop.remove_reader(self._fd)
+        self._loop.remove_writer(self._fd)
+        self._running = False
+        self._fail_pending(serial.SerialException(f"Utracono połączenie: {exc}"))
+        self._publish(str(exc), LINE_LOST)
+
+    def _fail_pending(self, exc):
+        """Kończy wszystkie oczekujące komendy wyjątkiem"""
+        while self._pending:
+            self._pending.popleft().fail(exc)
+        self._inflight_bytes = 0
+        self._room.set()
+
+    def _handle_line(self, line):
+        """Przypisuje linię najstarszej oczekującej komendzie albo subskrybentom"""
+        if is_status_report(line):
+            # Odpowiedź na '?' nie kończy się 'ok' - nie należy do żadnej komendy
+            self._ready.set()
+            self.last_status = line
+            self._status_event.set()
+            self._publish(line, LINE_STATUS)
+            return
+        if is_banner(line):
+            self.banner = line
+            self._ready.set()
+            self._banner_event.set()
+        if not self._pending:
+            self._publish(line, LINE_UNSOLICITED)
+            return
+        self._publish(line, LINE_RESPONSE)
+        if is_banner(line) or is_alarm(line):
+            # Reset firmware lub alarm (GRBL czyści wtedy bufor RX) - nic już nie
+            # odpowie; zdjęcie jednej komendy przesunęłoby dopasowanie FIFO
+            while self._pending:
+                entry = self._pending.popleft()
+                entry.lines.append(line)
+                entry.complete = True
+                entry.resolve()
+            self._inflight_bytes = 0
+            self._room.set()
+        else:
+            entry = self._pending[0]
+            entry.lines.append(line)
+            if is_terminator(line):
+                self._pending.popleft()
+                self._inflight_bytes -= entry.size
+                entry.complete = True
+                entry.resolve()
+                self._room.set()
+
+    async def wait_ready(self, timeout=READY_TIMEOUT):
+        """
+        Czeka na baner startowy firmware; bez banera sonduje urządzenie '?'
+
+        Returns:
+            True, jeśli urządzenie odpowiedziało banerem lub statusem
+        """
+        deadline = self._loop.time() + timeout
+        next_probe = self._loop.time() + PROBE_DELAY
+        while True:
+            now = self._loop.time()
+            if now >= deadline or not self.is_alive:
+                return self._ready.is_set()
+            try:
+                await asyncio.wait_for(self._ready.wait(), min(next_probe, deadline) - now)
+                return True
+            except asyncio.TimeoutError:
+                pass
+            if self._loop.time() >= next_probe:
+                self.write(b'?')
+                next_probe += PROBE_INTERVAL
+
+    def write(self, data):
+        """Zapisuje bajty bez blokowania (resztę dopisuje callback add_writer)"""
+        if self._write_buffer:
+            self._write_buffer += data
+            return
+        try:
+            written = os.write(self._fd, data)
+        except BlockingIOError:
+            written = 0
+        if written < len(data):
+            self._write_buffer += data[written:]
+            self._loop.add_writer(self._fd, self._on_writable)
+
+    def realtime(self, command):
+        """
+        Wysyła komendę czasu rzeczywistego (?, !, ~, Ctrl-X) z pominięciem kolejki
+
+        Bajt trafia przed dane czekające w buforze zapisu pętli.
+
+        Returns:
+            Czas od wywołania do przekazania bajtu do sterownika portu (sekundy)
+        """
+        if command not in REALTIME_COMMANDS:
+            raise ValueError(f"Nie jest komendą czasu rzeczywistego: {command!r}")
+        self._check_alive()
+        start = self._loop.time()
+        data = command.encode('ascii')
+        try:
+            written = os.write(self._fd, data)
+        except BlockingIOError:
+            written = 0
+        if not written:
+            self._write_buffer[:0] = data
+            self._loop.add_writer(self._fd, self._on_writable)
+        latency = self._loop.time() - start
+        self.realtime_latency = latency
+        self.realtime_latency_max = max(self.realtime_latency_max, latency)
+        self._publish(command, LINE_REALTIME)
+        return latency
+
+    async def request_status(self, timeout=1.0):
+        """Wysyła '?' i zwraca najbliższy raport statusu (lub None)"""
+        self._status_event.clear()
+        self.realtime(STATUS_QUERY)
+        try:
+            await asyncio.wait_for(self._status_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.last_status
+
+    async def soft_reset(self, timeout=READY_TIMEOUT):
+        """Wysyła Ctrl-X i czeka na ponowny baner firmware"""
+        self._banner_event.clear()
+        self.realtime(SOFT_RESET)
+        try:
+            await asyncio.wait_for(self._banner_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _on_writable(self):
+        """Callback pętli - port przyjmie kolejne bajty"""
+        try:
+            written = os.write(self._fd, self._write_buffer)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._connection_lost(e)
+            return
+        del self._write_buffer[:written]
+        if not self._write_buffer:
+            self._loop.remove_writer(self._fd)
+
+    def _check_alive(self):
+        """Zgłasza wyjątek, jeśli port przestał działać"""
+        if not self.is_alive:
+            raise serial.SerialException(f"Port nieaktywny: {self.error}")
+
+    async def submit(self, command):
+        """
+        Wysyła komendę, gdy w buforze RX firmware jest na nią miejsce
+
+        Returns:
+            asyncio.Future z listą linii odpowiedzi (ostatnia to ok / error:N / ALARM)
+        """
+        if not command.endswith('\n'):
+            command += '\n'
+        data = command.encode('utf-8')
+        entry = PendingCommand(command.strip(), len(data), self._loop.create_future())
+
+        async with self._send_lock:
+            # Liczenie znaków: czekaj, aż potwierdzenia zwolnią miejsce
+            while (self._pending and
+                   self._inflight_bytes + entry.size > self.rx_buffer_size):
+                self._check_alive()
+                self._room.clear()
+                await self._room.wait()
+            self._check_alive()
+            self._pending.append(entry)
+            self._inflight_bytes += entry.size
+            self._publish(entry.command, LINE_SENT)
+            self.write(data)
+        return entry.future
+
+    async def send(self, command, timeout=DEFAULT_TIMEOUT):
+        """
+        Wysyła komendę i czeka na kończącą odpowiedź
+
+        Returns:
+            Krotka (lista linii odpowiedzi, czy odpowiedź jest kompletna)
+        """
+        future = await asyncio.wait_for(self.submit(command), timeout)
+        try:
+            lines = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return [], False
+        return lines, True
+
+    async def stream(self, commands, on_response=None, stop_on_error=True):
+        """
+        Strumieniuje komendy protokołem liczenia znaków GRBL
+
+        Returns:
+            Krotka (liczba wysłanych linii, lista list odpowiedzi z błędem)
+        """
+        sent = collections.deque()
+        errors = []
+        count = 0
+
+        async def drain(block):
+            while sent and (block or sent[0].done()):
+                lines = await sent.popleft()
+                if not lines or lines[-1].lower() != 'ok':
+                    errors.append(lines)
+                if on_response:
+                    on_response(lines)
+
+        for command in commands:
+            await drain(False)
+            if errors and stop_on_error:
+                break
+            sent.append(await self.submit(command))
+            count += 1
+        await drain(True)
+        return count, errors
+
+
+class AsyncDigitizerController:
+    """Asynchroniczny odpowiednik MakerBotDigitizerController"""
+
+    def __init__(self, port='/dev/ttyUSB0', baudrate=115200, log=print):
+        """
+        Args:
+            port: Port szeregowy (zwykle /dev/ttyUSB0 lub /dev/ttyACM0)
+            baudrate: Prędkość transmisji (domyślnie 115200)
+            log: Funkcja przyjmująca komunikaty tekstowe (domyślnie print)
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.log = log
+        self.ser = None
+        self.link = None
+        self.response_timeout = 10.0  # Maksymalne oczekiwanie na 'ok' (sekundy)
+        self.speed = None  # Modalne F w firmware (°/s); None = nieznane
+
+    async def connect(self):
+        """Nawiązuje połączenie z talerzem obrotowym"""
+        try:
+            self.ser = serial.Serial(
+                port=self.port,
+                baudrate=self.baudrate,
+                bytesize=serial.EIGHTBITS,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE,
+                timeout=0
+            )
+            self.link = AsyncSerialLink(self.ser)
+            self.link.start()
+            self.speed = None  # Otwarcie portu resetuje firmware
+            # Wracamy, gdy tylko firmware wypisze baner lub odpowie na '?'
+            if not await self.link.wait_ready():
+                self.log("⚠️ Urządzenie nie odpowiada (brak banera i statusu)")
+            elif self.link.banner:
+                self.log(f"🤖 Firmware: {self.link.banner}")
+            self.log(f"✅ Połączono z {self.port} na {self.baudrate} baud")
+            return True
+        except (serial.SerialException, OSError) as e:
+            self.log(f"❌ Błąd połączenia: {e}")
+            return False
+
+    async def disconnect(self):
+        """Zamyka połączenie"""
+        if self.link:
+            self.link.close()
+            self.link = None
+            self.log("🔌 Rozłączono")
+
+    async def send_gcode(self, command):
+        """
+        Wysyła komendę G-code do talerza
+
+        Returns:
+            Lista linii odpowiedzi, True (brak odpowiedzi) lub False przy błędzie
+        """
+        if not self.link or not self.link.is_alive:
+            self.log("❌ Brak połączenia!")
+            return False
+
+        if command.strip('\r\n') in REALTIME_COMMANDS:
+            return await self.realtime(command.strip('\r\n'))
+
+        try:
+            self.log(f"📡 Wysłano: {command.strip()}")
+            responses, complete = await self.link.send(command, self.response_timeout)
+            for line in responses:
+                self.log(f"📨 Odpowiedź: {line}")
+            if not complete:
+                self.log(f"⚠️ Brak potwierdzenia w ciągu {self.response_timeout} s")
+            if feed_from_gcode(command) is not None:
+                accepted = complete and responses[-1].lower() == 'ok'
+                self.speed = feed_from_gcode(command) if accepted else None
+
+            return responses if responses else True
+        except Exception as e:
+            self.log(f"❌ Błąd wysyłania: {e}")
+            return False
+
+    async def realtime(self, command):
+        """
+        Wysyła komendę czasu rzeczywistego (?, !, ~, Ctrl-X) z pominięciem kolejki
+
+        Returns:
+            Lista linii odpowiedzi (status / baner), True lub False przy błędzie
+        """
+        if not self.link or not self.link.is_alive:
+            self.log("❌ Brak połączenia!")
+            return False
+
+        try:
+            if command == STATUS_QUERY:
+                status = await self.link.request_status()
+                if status is None:
+                    self.log("⚠️ Brak raportu statusu")
+                    return False
+                return [status]
+            if command == SOFT_RESET:
+                self.speed = None  # Reset przywraca domyślne F
+                if not await self.link.soft_reset():
+                    self.log("⚠️ Brak banera po soft resecie")
+                    return False
+                return [self.link.banner]
+            latency = self.link.realtime(command)
+            self.log(f"⚡ Wysłano {command} w {latency * 1000:.3f} ms")
+            return True
+        except Exception as e:
+            self.log(f"❌ Błąd wysyłania: {e}")
+            return False
+
+    async def submit(self, command):
+        """Wysyła komendę bez czekania na odpowiedź; zwraca asyncio.Future"""
+        if not self.link:
+            raise serial.SerialException("Brak połączenia!")
+        self.log(f"📡 Wysłano: {command.strip()}")
+        if feed_from_gcode(command) is not None:
+            self.speed = None  # Wynik nie jest tu sprawdzany - F uznajemy za nieznane
+        return await self.link.submit(command)
+
+    async def stream_file(self, path):
+        """Strumieniuje plik G-code z prędkością firmware (liczenie znaków GRBL)"""
+        if not self.link or not self.link.is_alive:
+            self.log("❌ Brak połączenia!")
+            return False
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                commands = [cmd for cmd in (clean_gcode_line(line) for line in f) if cmd]
+        except OSError as e:
+            self.log(f"❌ Nie można odczytać pliku: {e}")
+            return False
+
+        self.log(f"📜 Strumieniuję {len(commands)} linii z {path}...")
+        self.speed = None  # Plik może zmieniać F - po nim wartość jest nieznana
+        try:
+            count, errors = await self.link.stream(commands)
+        except Exception as e:
+            self.log(f"❌ Błąd strumieniowania: {e}")
+            return False
+        self.log(f"✅ Wysłano {count}/{len(commands)} linii")
+        return not errors
+
+    # GRBL/System commands
+    async def get_status(self):
+        """Pobiera aktualny status urządzenia (GRBL)"""
+        return await self.realtime(STATUS_QUERY)
+
+    async def get_settings(self):
+        """Pobiera wszystkie ustawienia GRBL"""
+        return await self.send_gcode("$$")
+
+    async def get_parser_state(self):
+        """Sprawdza stan parsera G-code"""
+        return await self.send_gcode("$G")
+
+    async def get_build_info(self):
+        """Pobiera informacje o firmware"""
+        return await self.send_gcode("$I")
+
+    async def unlock_alarm(self):
+        """Odblokowuje alarm (GRBL)"""
+        return await self.send_gcode("$X")
+
+    async def cycle_start(self):
+        """Rozpoczyna cykl (GRBL)"""
+        return await self.realtime(CYCLE_START)
+
+    async def feed_hold(self):
+        """Wstrzymuje ruch (GRBL)"""
+        return await self.realtime(FEED_HOLD)
+
+    async def soft_reset(self):
+        """Wykonuje soft reset (GRBL)"""
+        return await self.realtime(SOFT_RESET)
+
+    # Horus 0.2 specific motor commands
+    async def enable_motor(self):
+        """Włącza silnik (M17)"""
+        return await self.send_gcode("M17")
+
+    async def disable_motor(self):
+        """Wyłącza silnik (M18)"""
+        return await self.send_gcode("M18")
+
+    async def reset_position(self):
+        """Resetuje pozycję do zera (G50) - zalecane po M18"""
+        return await self.send_gcode("G50")
+
+    async def set_speed(self, speed):
+        """Ustawia prędkość kątową w stopniach na sekundę (G1 F)"""
+        return await self.send_gcode(f"G1 F{speed}")
+
+    async def rotate_to_absolute_position(self, position):
+        """Obraca do absolutnej pozycji w stopniach (G1 X)"""
+        return await self.send_gcode(f"G1 X{position}")
+
+    async def home_turntable(self):
+        """Przechodzi do pozycji domowej - włącza silnik i resetuje pozycję"""
+        await self.enable_motor()
+        return await self.reset_position()
+
+    async def rotate_to_position(self, position, speed=200):
+        """
+        Obraca talerz do konkretnej pozycji absolutnej
+
+        Args:
+            position: Pozycja docelowa w stopniach
+            speed: Prędkość obrotu w stopniach/sekundę (domyślnie 200)
+        """
+        # Jedna linia G1 F.. X..; F pomijamy, gdy firmware już je ma
+        return await self.send_gcode(move_command(position, speed, self.speed))
+
+    async def stop_turntable(self):
+        """Zatrzymuje talerz - wyłącza silnik"""
+        return await self.disable_motor()
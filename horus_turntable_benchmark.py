@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Benchmarki ścieżek komunikacji kontrolera talerza Horus 0.2
+
+Każdy scenariusz uruchamia MakerBotDigitizerController na świeżym
+symulatorze (horus_turntable_simulator.py) z modelowanym łączem 115200 baud:
+
+    connect     - czas od otwarcia portu do gotowości firmware
+    send_gcode  - czas odpowiedzi komendy (p50/p95/p99) i komendy na sekundę
+    rotate      - rotate_to_position() do potwierdzenia 'ok'
+    stream      - bajty na sekundę przy strumieniowaniu pliku G-code
+    estop       - opóźnienie zapisu '!' i czas do raportu Hold
+    scan        - skan 360 kroków (ruch + czekanie na zatrzymanie)
+
+Raport JSON można zapisać (--output) i porównać z wcześniejszym (--baseline),
+co pozwala pilnować wydajności przy kolejnych zmianach.
+
+Przykład:
+    python horus_turntable_benchmark.py --output bench.json
+    python horus_turntable_benchmark.py --baseline bench.json --tolerance 0.25
+"""
+
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Moduł CLI wypisuje komunikaty przy imporcie - nie mogą trafić do raportu JSON
+with contextlib.redirect_stdout(sys.stderr):
+    from horus_turntable_gcode_linux_sender import MakerBotDigitizerController
+from horus_turntable_motion import move_duration
+from horus_turntable_simulator import HorusSimulator
+from horus_turntable_status import parse_status
+
+BAUDRATE = 115200
+
+# Wersja formatu raportu (zmieniać przy niekompatybilnych zmianach pól)
+REPORT_VERSION = 1
+
+# Metryki porównywane z raportem bazowym: (scenariusz, pole, True = większe jest lepsze)
+GUARDED_METRICS = [
+    ('connect', 'p50_ms', False),
+    ('send_gcode', 'p95_ms', False),
+    ('send_gcode', 'commands_per_s', True),
+    ('rotate', 'p95_ms', False),
+    ('stream', 'bytes_per_s', True),
+    ('estop', 'hold_p95_ms', False),
+    ('scan', 'overhead_per_step_ms', False),
+]
+
+
+def percentile(samples, p):
+    """Percentyl p (0-100) z interpolacją liniową"""
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * p / 100.0
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def latency_summary(samples):
+    """Podsumowanie listy czasów (sekundy) w milisekundach"""
+    return {
+        'samples': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+        'max_ms': max(samples) * 1000 if samples else float('nan'),
+    }
+
+
+class Bench:
+    """
+    Uruchamia scenariusze na symulatorze i zbiera wyniki
+
+    Komunikaty kontrolera (print) są wyciszane na czas pomiaru.
+    """
+
+    def __init__(self, baudrate=BAUDRATE, acceleration=5000.0, boot_delay=0.2):
+        """
+        Args:
+            baudrate: Modelowana prędkość łącza symulatora
+            acceleration: Przyspieszenie symulatora ($120) - duże skraca skan
+            boot_delay: Opóźnienie banera po otwarciu portu (sekundy)
+        """
+        self.baudrate = baudrate
+        self.acceleration = acceleration
+        self.boot_delay = boot_delay
+
+    @contextlib.contextmanager
+    def device(self, connect=True):
+        """Świeży symulator i kontroler; zamyka oba po scenariuszu"""
+        simulator = HorusSimulator(acceleration=self.acceleration, boot_delay=self.boot_delay,
+                                   baudrate=self.baudrate)
+        port = simulator.start()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            controller = MakerBotDigitizerController(port, self.baudrate)
+        # Pomiary nie zapisują historii readline przy wyjściu
+        atexit.unregister(controller.save_history)
+        controller.acceleration = self.acceleration
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                try:
+                    if connect and not controller.connect():
+                        raise RuntimeError(f"Nie można połączyć z symulatorem {port}")
+                    yield controller
+                finally:
+                    controller.disconnect()
+        finally:
+            simulator.stop()
+
+    def connect(self, runs=10):
+        """Czas od otwarcia portu do gotowości (baner lub odpowiedź na '?')"""
+        samples = []
+        for _ in range(runs):
+            # Świeży symulator na każde połączenie - pomiar nie zależy od tego,
+            # czy poprzedni zauważył już zamknięcie portu
+            with self.device(connect=False) as controller:
+                start = time.perf_counter()
+                ok = controller.connect() and controller.link.banner is not None
+                samples.append(time.perf_counter() - start)
+            if not ok:
+                raise RuntimeError("Brak banera symulatora")
+        result = latency_summary(samples)
+        result['boot_delay_ms'] = self.boot_delay * 1000
+        return result
+
+    def send_gcode(self, count=500):
+        """Czas odpowiedzi send_gcode() dla komendy bez ruchu"""
+        samples = []
+        with self.device() as controller:
+            start = time.perf_counter()
+            for _ in range(count):
+                t = time.perf_counter()
+                if not controller.send_gcode("M17"):
+                    raise RuntimeError("send_gcode nie powiodło się")
+                samples.append(time.perf_counter() - t)
+            elapsed = time.perf_counter() - start
+        result = latency_summary(samples)
+        result['commands_per_s'] = count / elapsed
+        return result
+
+    def rotate(self, count=200, speed=200):
+        """rotate_to_position() do 'ok' (ruch trafia do planera, bez czekania)"""
+        samples = []
+        with self.device() as controller:
+            for i in range(count):
+                # Czekamy na zatrzymanie poza pomiarem, by planer nie był pełny
+                controller.wait_until_idle()
+                t = time.perf_counter()
+                if not controller.rotate_to_position(i % 2, speed):
+                    raise RuntimeError("rotate_to_position nie powiodło się")
+                samples.append(time.perf_counter() - t)
+        return latency_summary(samples)
+
+    def stream(self, lines=2000):
+        """Przepustowość stream_file() dla linii bez ruchu (zmiany F)"""
+        with tempfile.NamedTemporaryFile('w', suffix='.gcode', delete=False) as f:
+            for i in range(lines):
+                f.write(f"G1 F{100 + i % 100}\n")
+            path = f.name
+        try:
+            size = os.path.getsize(path)
+            with self.device() as controller:
+                start = time.perf_counter()
+                if not controller.stream_file(path):
+                    raise RuntimeError("stream_file nie powiodło się")
+                elapsed = time.perf_counter() - start
+        finally:
+            os.unlink(path)
+        wire_limit = self.baudrate / 10.0 if self.baudrate else None
+        return {
+            'lines': lines,
+            'bytes': size,
+            'seconds': elapsed,
+            'lines_per_s': lines / elapsed,
+            'bytes_per_s': size / elapsed,
+            'wire_utilization': (size / elapsed) / wire_limit if wire_limit else None,
+        }
+
+    def estop(self, runs=20):
+        """Opóźnienie '!' w trakcie ruchu: zapis na port i raport Hold"""
+        write_samples = []
+        hold_samples = []
+        with self.device() as controller:
+            for _ in range(runs):
+                controller.rotate_to_position(controller.current_position + 3600, 200)
+                time.sleep(0.05)
+                start = time.perf_counter()
+                write_samples.append(controller.link.realtime('!'))
+                while True:
+                    line = controller.link.request_status()
+                    record = parse_status(line) if line else None
+                    if record and record.state == 'Hold':
+                        break
+                    if time.perf_counter() - start > 2.0:
+                        raise RuntimeError("Brak stanu Hold po '!'")
+                hold_samples.append(time.perf_counter() - start)
+                # Reset czyści planer; pozycję bierzemy z firmware
+                controller.soft_reset()
+                controller.send_gcode("G50")
+                controller.current_position = 0.0
+        write = latency_summary(write_samples)
+        hold = latency_summary(hold_samples)
+        result = {'samples': runs}
+        result.update({f'write_{k}': v for k, v in write.items() if k != 'samples'})
+        result.update({f'hold_{k}': v for k, v in hold.items() if k != 'samples'})
+        return result
+
+    def scan(self, steps=360, speed=200):
+        """Skan: steps ruchów po 360/steps stopni, każdy z czekaniem na zatrzymanie"""
+        step = 360.0 / steps
+        motion = move_duration(step, speed, self.acceleration) * steps
+        samples = []
+        with self.device() as controller:
+            controller.home_turntable()
+            start = time.perf_counter()
+            for i in range(1, steps + 1):
+                t = time.perf_counter()
+                if not controller.move_and_wait(i * step, speed):
+                    raise RuntimeError(f"Krok {i} skanu nie powiódł się")
+                samples.append(time.perf_counter() - t)
+            elapsed = time.perf_counter() - start
+        result = latency_summary(samples)
+        result.update({
+            'steps': steps,
+            'seconds': elapsed,
+            'motion_seconds': motion,
+            'overhead_per_step_ms': (elapsed - motion) / steps * 1000,
+        })
+        return result
+
+
+SCENARIOS = ('connect', 'send_gcode', 'rotate', 'stream', 'estop', 'scan')
+
+
+def run(scenarios, bench, quick=False, progress=print):
+    """
+    Uruchamia wybrane scenariusze
+
+    Błąd scenariusza trafia do raportu (pole 'error', lista 'failed'),
+    a pozostałe scenariusze wykonują się dalej.
+
+    Returns:
+        Słownik raportu (gotowy do json.dump)
+    """
+    sizes = {
+        'connect': {'runs': 3 if quick else 10},
+        'send_gcode': {'count': 100 if quick else 500},
+        'rotate': {'count': 50 if quick else 200},
+        'stream': {'lines': 300 if quick else 2000},
+        'estop': {'runs': 5 if quick else 20},
+        'scan': {'steps': 36 if quick else 360},
+    }
+    report = {
+        'version': REPORT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'baudrate': bench.baudrate,
+        'acceleration': bench.acceleration,
+        'quick': quick,
+        'scenarios': {},
+        'failed': [],
+    }
+    for name in scenarios:
+        progress(f"⏱️ {name}...")
+        start = time.perf_counter()
+        try:
+            result = getattr(bench, name)(**sizes[name])
+        except Exception as e:
+            result = {'error': f"{type(e).__name__}: {e}"}
+            report['failed'].append(name)
+        result['wall_s'] = time.perf_counter() - start
+        report['scenarios'][name] = result
+        progress(f"   {format_result(result)}")
+    return report
+
+
+def format_result(result):
+    """Jedna linia z najważniejszymi polami wyniku"""
+    if 'error' in result:
+        return f"❌ {result['error']}"
+    keys = ('p50_ms', 'p95_ms', 'p99_ms', 'commands_per_s', 'bytes_per_s',
+            'write_p99_ms', 'hold_p95_ms', 'overhead_per_step_ms')
+    return ", ".join(f"{key}={result[key]:.3f}" for key in keys if key in result)
+
+
+def compare(report, baseline, tolerance):
+    """
+    Porównuje metryki z raportem bazowym
+
+    Returns:
+        Lista opisów regresji (pusta = brak)
+    """
+    regressions = []
+    for scenario, key, higher_is_better in GUARDED_METRICS:
+        try:
+            new = report['scenarios'][scenario][key]
+            old = baseline['scenarios'][scenario][key]
+        except KeyError:
+            continue
+        if higher_is_better:
+            worse = new < old * (1 - tolerance)
+        else:
+            worse = new > old * (1 + tolerance)
+        if worse:
+            regressions.append(f"{scenario}.{key}: {old:.3f} → {new:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmarki kontrolera Horus 0.2 na symulatorze pty',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Przykłady:
+  %(prog)s                                  # Wszystkie scenariusze, raport na ekranie
+  %(prog)s --quick --output bench.json      # Szybki przebieg z zapisem JSON
+  %(prog)s --scenario send_gcode --scenario estop
+  %(prog)s --baseline bench.json            # Kod wyjścia 1 przy regresji
+        """)
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='Scenariusz do uruchomienia (można powtórzyć; domyślnie wszystkie)')
+    parser.add_argument('--quick', action='store_true', help='Mniej powtórzeń (szybki przebieg)')
+    parser.add_argument('--baudrate', type=int, default=BAUDRATE,
+                        help='Modelowana prędkość łącza symulatora')
+    parser.add_argument('--acceleration', type=float, default=5000.0,
+                        help='Przyspieszenie symulatora $120 (stopnie/s²)')
+    parser.add_argument('--output', help='Zapisz raport JSON do pliku')
+    parser.add_argument('--json', action='store_true', help='Wypisz raport JSON na stdout')
+    parser.add_argument('--baseline', help='Raport JSON do porównania')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Dopuszczalne pogorszenie względem bazowego (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    bench = Bench(baudrate=args.baudrate, acceleration=args.acceleration)
+    progress = (lambda message: print(message, file=sys.stderr)) if args.json else print
+    report = run(args.scenario or SCENARIOS, bench, args.quick, progress)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        progress(f"💾 Raport zapisany w {args.output}")
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            progress("❌ Regresje wydajności:")
+            for line in regressions:
+                progress(f"   {line}")
+            sys.exit(1)
+        progress("✅ Brak regresji względem raportu bazowego")
+    if report['failed']:
+        progress(f"❌ Nieudane scenariusze: {', '.join(report['failed'])}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
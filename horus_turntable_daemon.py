@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Demon trzymający otwarty port talerza i obsługujący żądania przez gniazdo Unix
+
+Otwarcie portu resetuje płytkę Arduino (DTR), więc każde uruchomienie CLI
+to reset, czekanie na baner i ponowne zerowanie. Demon otwiera port raz
+i wykonuje operacje MakerBotDigitizerController na żądanie klientów -
+jednorazowa komenda trwa wtedy milisekundy, a stan firmware (F, pozycja,
+silnik) przetrwa między wywołaniami.
+
+Protokół: jedna linia JSON na żądanie i jedna na odpowiedź; jedno
+połączenie może wysłać wiele żądań:
+    → {"op": "command", "args": ["M17"]}
+    ← {"ok": true, "result": ["ok"], "output": "📡 Wysłano: M17\\n📨 Odpowiedź: ok\\n"}
+
+Opcjonalne "options" (klucze OPTIONS, np. {"auto_rezero": false}) zmieniają
+ustawienia kontrolera tylko na czas tego żądania.
+
+Operacje zwykłe wykonują się po kolei (wyjście print kontrolera wraca
+w polu "output"). Operacje czasu rzeczywistego (hold, start, realtime)
+omijają kolejkę - wstrzymanie działa także w trakcie czyjegoś 'move'.
+
+Uruchomienie:
+    python3 horus_turntable_daemon.py --port /dev/ttyUSB0
+    python3 horus_turntable_gcode_linux_sender.py --port /dev/ttyUSB0 --command M17
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+import time
+
+# Operacje wykonywane po kolei: nazwa -> metoda MakerBotDigitizerController
+OPERATIONS = {
+    'command': 'send_gcode',
+    'position': 'rotate_to_position',
+    'abs_pos': 'rotate_to_absolute_position',
+    'move': 'move_and_wait',
+    'wait': 'wait_until_idle',
+    'file': 'stream_file',
+    'status': 'get_status',
+    'enable': 'enable_motor',
+    'disable': 'disable_motor',
+    'home': 'home_turntable',
+    'reset': 'reset_position',
+    'speed': 'set_speed',
+}
+
+# Ustawienia kontrolera, które żądanie może zmienić na czas swojego wykonania
+OPTIONS = ('auto_rezero',)
+
+# Operacje czasu rzeczywistego - bez kolejki
+REALTIME_OPERATIONS = {
+    'hold': 'feed_hold',
+    'start': 'cycle_start',
+    'realtime': 'realtime',
+}
+
+
+def runtime_dir():
+    """
+    Prywatny katalog gniazd demona
+
+    XDG_RUNTIME_DIR jest prywatny z definicji; bez niego używamy
+    <katalog tymczasowy>/horus-<uid> z prawami 0700. Katalog wspólny
+    (np. /tmp) pozwoliłby innemu użytkownikowi podłożyć własne gniazdo.
+
+    Raises:
+        PermissionError: Katalog należy do kogoś innego lub nie jest katalogiem
+    """
+    directory = os.environ.get('XDG_RUNTIME_DIR')
+    private = not directory
+    if private:
+        directory = os.path.join(tempfile.gettempdir(), f"horus-{os.getuid()}")
+        with contextlib.suppress(FileExistsError):
+            os.mkdir(directory, 0o700)
+    info = os.lstat(directory)  # lstat - dowiązanie symboliczne też jest odrzucane
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f"Katalog {directory} nie należy do bieżącego użytkownika")
+    if private and info.st_mode & 0o077:
+        os.chmod(directory, 0o700)
+    return directory
+
+
+def socket_path(port):
+    """
+    Ścieżka gniazda demona dla portu
+
+    Returns:
+        Np. /run/user/1000/horus-ttyUSB0.sock (bez XDG_RUNTIME_DIR - /tmp/horus-<uid>/...)
+    """
+    return os.path.join(runtime_dir(), f"horus-{os.path.basename(port)}.sock")
+
+
+class DaemonClient:
+    """Połączenie z demonem - żądania jedno po drugim"""
+
+    def __init__(self, path, timeout=None):
+        """
+        Args:
+            path: Ścieżka gniazda demona
+            timeout: Limit połączenia i odpowiedzi (None = bez limitu, ruch może trwać)
+        """
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path)
+        except OSError:
+            self.sock.close()
+            raise
+        self._file = self.sock.makefile('rwb')
+
+    def request(self, op, *args, **options):
+        """
+        Wysyła żądanie i czeka na odpowiedź
+
+        Args:
+            options: Ustawienia kontrolera na czas żądania (klucze OPTIONS)
+
+        Returns:
+            Słownik {"ok", "result", "output"} (przy błędzie także "error")
+        """
+        request = {'op': op, 'args': list(args)}
+        if options:
+            request['options'] = options
+        message = json.dumps(request, ensure_ascii=False)
+        self._file.write(message.encode('utf-8') + b'\n')
+        self._file.flush()
+        reply = self._file.readline()
+        if not reply:
+            raise ConnectionError("Demon zamknął połączenie")
+        return json.loads(reply)
+
+    def close(self):
+        self._file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def connect_daemon(port, timeout=None):
+    """
+    Łączy z demonem obsługującym port, jeśli działa
+
+    Gniazdo musi należeć do bieżącego użytkownika - inaczej komendy
+    i odpowiedzi szłyby przez cudzy proces.
+
+    Returns:
+        DaemonClient albo None (brak gniazda, demon nie działa, brak AF_UNIX)
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    try:
+        path = socket_path(port)
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return None
+    except PermissionError as e:
+        print(f"⚠️ {e} - pomijam demona")
+        return None
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        print(f"⚠️ Gniazdo {path} nie należy do bieżącego użytkownika - pomijam demona")
+        return None
+    try:
+        return DaemonClient(path, timeout)
+    except OSError:
+        return None  # Gniazdo po zakończonym demonie
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Czyta żądania JSON z jednego połączenia aż do jego zamknięcia"""
+
+    def handle(self):
+        for raw in self.rfile:
+            try:
+                request = json.loads(raw)
+                reply = self.server.daemon.handle(request.get('op'), request.get('args') or [],
+                                                  request.get('options'))
+            except ValueError as e:
+                reply = {'ok': False, 'result': None, 'output': '', 'error': f"Błędne żądanie: {e}"}
+            data = json.dumps(reply, ensure_ascii=False, default=str)
+            self.wfile.write(data.encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _ThreadOutput:
+    """
+    sys.stdout kierujący print wątku obsługującego żądanie do jego bufora
+
+    Wątki bez przechwytywania (np. wątek czytający łącza) piszą dalej
+    na standardowe wyjście demona.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    @contextlib.contextmanager
+    def capture(self):
+        """Przechwytuje print bieżącego wątku do StringIO"""
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+
+if hasattr(socket, 'AF_UNIX'):
+    class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _Server = None
+
+
+class ControllerDaemon:
+    """Kontroler z otwartym portem udostępniony przez gniazdo Unix"""
+
+    def __init__(self, port, baudrate=115200, path=None, auto_reconnect=True):
+        """
+        Args:
+            port: Port szeregowy talerza
+            baudrate: Prędkość transmisji
+            path: Ścieżka gniazda (domyślnie socket_path(port))
+            auto_reconnect: Łącz ponownie po odłączeniu kabla (patrz ensure_connected)
+        """
+        # Import na żądanie - CLI importuje ten moduł jako klient
+        from horus_turntable_gcode_linux_sender import MakerBotDigitizerController
+        # Bez readline i ~/.horus_history - demon nie czyta z terminala
+        self.controller = MakerBotDigitizerController(port, baudrate, auto_reconnect,
+                                                      interactive=False)
+        self.path = path or socket_path(port)
+        self.server = None
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._output = _ThreadOutput(sys.stdout)
+
+    def handle(self, op, args, options=None):
+        """
+        Wykonuje jedną operację
+
+        Args:
+            options: Ustawienia kontrolera na czas operacji (klucze OPTIONS)
+
+        Returns:
+            Słownik odpowiedzi {"ok", "result", "output"}
+        """
+        options = options or {}
+        unknown = sorted(set(options) - set(OPTIONS))
+        if unknown:
+            return {'ok': False, 'result': None, 'output': '',
+                    'error': f"Nieznane opcje: {', '.join(unknown)}"}
+        self.requests += 1
+        print(f"[{time.strftime('%H:%M:%S')}] {op} {' '.join(map(str, args))}".rstrip())
+        if op == 'ping':
+            return {'ok': True, 'result': self.controller.is_connected, 'output': ''}
+        if op == 'shutdown':
+            # shutdown() czeka na pętlę serwera - nie z wątku obsługującego
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {'ok': True, 'result': True, 'output': "🛑 Demon kończy pracę\n"}
+        if op in REALTIME_OPERATIONS:
+            return self._call(REALTIME_OPERATIONS[op], args)
+        if op in OPERATIONS:
+            with self._lock, self._options(options):
+                return self._call(OPERATIONS[op], args)
+        return {'ok': False, 'result': None, 'output': '', 'error': f"Nieznana operacja: {op}"}
+
+    @contextlib.contextmanager
+    def _options(self, options):
+        """Ustawia opcje żądania na kontrolerze i przywraca poprzednie wartości"""
+        previous = {name: getattr(self.controller, name) for name in options}
+        for name, value in options.items():
+            setattr(self.controller, name, value)
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                setattr(self.controller, name, value)
+
+    def _call(self, method, args):
+        with self._output.capture() as output:
+            try:
+                result = getattr(self.controller, method)(*args)
+            except Exception as e:
+                return {'ok': False, 'result': None, 'output': output.getvalue(),
+                        'error': f"{type(e).__name__}: {e}"}
+        return {'ok': bool(result), 'result': result, 'output': output.getvalue()}
+
+    def _claim_socket(self):
+        """Usuwa gniazdo po zakończonym demonie; zgłasza błąd, gdy demon działa"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            DaemonClient(self.path, timeout=1.0).close()
+        except OSError:
+            os.unlink(self.path)
+            return
+        raise RuntimeError(f"Demon już działa: {self.path}")
+
+    def start(self):
+        """Łączy z talerzem i otwiera gniazdo"""
+        if _Server is None:
+            raise RuntimeError("Gniazda Unix niedostępne w tym systemie")
+        self._claim_socket()
+        sys.stdout = self._output
+        if not self.controller.connect():
+            return False
+        self.controller.watch_ports()
+        # Gniazdo od razu 0600 - chmod po bind zostawiałby chwilę dostępu dla innych
+        umask = os.umask(0o177)
+        try:
+            self.server = _Server(self.path, _RequestHandler)
+        finally:
+            os.umask(umask)
+        self.server.daemon = self
+        print(f"🛰️ Demon nasłuchuje na {self.path}")
+        return True
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def close(self):
+        """Zamyka gniazdo i port"""
+        if self.server is not None:
+            self.server.server_close()
+            self.server = None
+            with contextlib.suppress(OSError):
+                os.unlink(self.path)
+        if self.controller.port_watcher is not None:
+            self.controller.port_watcher.stop()
+        self.controller.disconnect()
+        sys.stdout = self._output.stream
+
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Demon talerza Horus 0.2 - port otwarty na stałe, sterowanie przez gniazdo Unix',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Przykłady użycia:
+  %(prog)s --port /dev/ttyUSB0                 # Uruchom demona
+  %(prog)s --port /dev/ttyUSB0 --stop          # Zatrzymaj działającego demona
+  horus_turntable_gcode_linux_sender.py --port /dev/ttyUSB0 --position 90
+                                               # Klient - bez resetu płytki
+        """
+    )
+    parser.add_argument('--port', default='/dev/ttyUSB0', help='Port szeregowy')
+    parser.add_argument('--baudrate', type=int, default=115200, help='Prędkość transmisji')
+    parser.add_argument('--socket', help='Ścieżka gniazda (domyślnie według nazwy portu)')
+    parser.add_argument('--no-reconnect', action='store_true',
+                        help='Nie łącz ponownie po utracie portu')
+    parser.add_argument('--stop', action='store_true', help='Zatrzymaj działającego demona')
+    args = parser.parse_args()
+
+    if args.stop:
+        try:
+            client = DaemonClient(args.socket or socket_path(args.port), timeout=5.0)
+        except OSError:
+            print("❌ Demon nie działa")
+            sys.exit(1)
+        with client:
+            print(client.request('shutdown')['output'], end='')
+        return
+
+    try:
+        daemon = ControllerDaemon(args.port, args.baudrate, args.socket, not args.no_reconnect)
+    except PermissionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        if not daemon.start():
+            sys.exit(1)
+        daemon.serve_forever()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n👋 Przerwano")
+    finally:
+        daemon.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Równoległe wyszukiwanie talerzy Horus 0.2 wśród portów szeregowych
+
+Każdy kandydat jest otwierany we własnym wątku: czekamy na baner firmware
+(albo odpowiedź na '?'), a potem pytamy o $I. Wszystkie porty są sondowane
+naraz, więc znalezienie talerza wśród 20 przejściówek USB-serial trwa
+mniej więcej jeden limit czasu sondy, a nie 20 kolejnych połączeń.
+
+Wyniki są zapamiętywane w pliku według USB VID/PID/numeru seryjnego
+przejściówki - przy kolejnym uruchomieniu znane urządzenia nie są już
+otwierane (otwarcie portu resetuje płytkę). Porty bez numeru USB (np.
+natywne COM1 czy pty symulatora) są sondowane zawsze.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+import serial
+import serial.tools.list_ports
+
+from horus_turntable_serial import SerialLink, is_banner
+
+# Plik pamięci podręcznej z tożsamością urządzeń
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.horus_devices.json")
+
+# Limit czasu sondy jednego portu: baner / '?' (sekundy)
+PROBE_TIMEOUT = 2.0
+
+# Limit oczekiwania na odpowiedź $I (sekundy)
+BUILD_INFO_TIMEOUT = 1.0
+
+DeviceIdentity = collections.namedtuple(
+    'DeviceIdentity', 'port key description banner build_info is_horus cached')
+DeviceIdentity.__doc__ = """Wynik sondy portu (key = VID:PID:serial lub None)"""
+
+
+def port_key(info):
+    """
+    Klucz USB przejściówki, np. "2341:0043:85739313833351F0E1A1"
+
+    Returns:
+        Klucz albo None, gdy port nie ma VID/PID lub numeru seryjnego
+    """
+    if info is None or info.vid is None or info.pid is None or not info.serial_number:
+        return None
+    return f"{info.vid:04X}:{info.pid:04X}:{info.serial_number}"
+
+
+def candidate_ports():
+    """
+    Porty szeregowe widoczne w systemie
+
+    Returns:
+        Lista ListPortInfo (serial.tools.list_ports)
+    """
+    return sorted(serial.tools.list_ports.comports(), key=lambda info: info.device)
+
+
+def looks_like_horus(banner, build_info):
+    """Czy baner lub $I wskazują na firmware Horus"""
+    text = f"{banner or ''} {build_info or ''}".lower()
+    return 'horus' in text
+
+
+class DiscoveryCache:
+    """Tożsamość urządzeń zapamiętana według klucza USB (plik JSON)"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        """Wczytuje plik (brak lub uszkodzony plik = pusta pamięć)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Zapisuje plik; błąd zapisu nie przerywa wyszukiwania"""
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        except OSError:
+            pass
+
+    def get(self, key):
+        return self.entries.get(key) if key else None
+
+    def put(self, identity):
+        """Zapamiętuje zidentyfikowane urządzenie (tylko porty z kluczem USB)"""
+        if identity.key:
+            self.entries[identity.key] = {
+                'banner': identity.banner,
+                'build_info': identity.build_info,
+                'is_horus': identity.is_horus,
+                'seen': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+
+
+def probe_port(port, baudrate=115200, timeout=PROBE_TIMEOUT, key=None, description=""):
+    """
+    Sprawdza, czy pod portem odpowiada firmware GRBL / Horus
+
+    Args:
+        port: Nazwa portu
+        baudrate: Prędkość transmisji
+        timeout: Limit oczekiwania na baner lub status
+        key: Klucz USB (przepisywany do wyniku)
+        description: Opis portu (przepisywany do wyniku)
+
+    Returns:
+        DeviceIdentity albo None, gdy port się nie otworzył lub urządzenie milczy
+    """
+    try:
+        ser = serial.Serial(port=port, baudrate=baudrate, timeout=1)
+    except (serial.SerialException, OSError, ValueError):
+        return None
+    link = SerialLink(ser)
+    try:
+        link.start()
+        if not link.wait_ready(timeout):
+            return None
+        build_info = None
+        try:
+            lines, complete = link.send("$I", BUILD_INFO_TIMEOUT)
+        except (serial.SerialException, OSError):
+            lines, complete = [], False
+        if complete:
+            info = [line for line in lines if line.startswith('[')]
+            build_info = info[0] if info else None
+        banner = link.banner if link.banner and is_banner(link.banner) else None
+        if banner is None and build_info is None:
+            return None  # Odpowiada na '?', ale nie przedstawia się jak GRBL
+        return DeviceIdentity(port, key, description, banner, build_info,
+                              looks_like_horus(banner, build_info), False)
+    finally:
+        link.close()
+
+
+def discover(ports=None, baudrate=115200, timeout=PROBE_TIMEOUT, cache=None,
+             refresh=False, exclude=()):
+    """
+    Sonduje porty równolegle i zwraca znalezione urządzenia GRBL
+
+    Args:
+        ports: Lista nazw portów lub ListPortInfo (domyślnie candidate_ports())
+        baudrate: Prędkość transmisji
+        timeout: Limit czasu jednej sondy
+        cache: DiscoveryCache (None = bez pamięci podręcznej)
+        refresh: Sonduj także porty znane z pamięci podręcznej
+        exclude: Porty pominięte (np. aktualnie połączony)
+
+    Returns:
+        Lista DeviceIdentity - najpierw talerze Horus, potem inne GRBL
+    """
+    if ports is None:
+        ports = candidate_ports()
+    by_name = {info.device: info for info in candidate_ports()}
+
+    found = []
+    to_probe = []
+    for entry in ports:
+        name = entry if isinstance(entry, str) else entry.device
+        if name in exclude:
+            continue
+        info = entry if not isinstance(entry, str) else by_name.get(name)
+        key = port_key(info)
+        description = info.description if info is not None else ""
+        cached = None if refresh or cache is None else cache.get(key)
+        if cached is not None:
+            # Znane urządzenie - bez otwierania portu
+            found.append(DeviceIdentity(name, key, description, cached.get('banner'),
+                                        cached.get('build_info'),
+                                        cached.get('is_horus', False), True))
+            continue
+        to_probe.append((name, key, description))
+
+    if to_probe:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(to_probe)) as pool:
+            futures = [pool.submit(probe_port, name, baudrate, timeout, key, description)
+                       for name, key, description in to_probe]
+            for future in concurrent.futures.as_completed(futures):
+                identity = future.result()
+                if identity is not None:
+                    found.append(identity)
+                    # Tylko zidentyfikowane - płytka, która nie zdążyła się
+                    # uruchomić, zostanie sprawdzona ponownie następnym razem
+                    if cache is not None:
+                        cache.put(identity)
+        if cache is not None:
+            cache.save()
+
+    found.sort(key=lambda identity: (not identity.is_horus, identity.port))
+    return found
+
+
+def describe(identity):
+    """Krótki opis urządzenia do listy portów"""
+    label = identity.build_info or identity.banner or "GRBL"
+    source = " (zapamiętany)" if identity.cached else ""
+    return f"{identity.port} - {label}{source}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wyszukiwanie talerzy Horus 0.2')
+    parser.add_argument('--port', action='append',
+                        help='Sonduj tylko podany port (można podać wielokrotnie)')
+    parser.add_argument('--baudrate', type=int, default=115200, help='Prędkość transmisji')
+    parser.add_argument('--timeout', type=float, default=PROBE_TIMEOUT,
+                        help='Limit czasu sondy portu (sekundy)')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Sonduj także porty zapamiętane w pamięci podręcznej')
+    parser.add_argument('--no-cache', action='store_true', help='Bez pamięci podręcznej')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else DiscoveryCache()
+    start = time.monotonic()
+    found = discover(args.port, args.baudrate, args.timeout, cache, args.refresh)
+    elapsed = time.monotonic() - start
+    if not found:
+        print(f"❌ Nie znaleziono urządzeń ({elapsed:.2f} s)")
+        sys.exit(1)
+    print(f"🔍 Znaleziono {len(found)} urządzeń w {elapsed:.2f} s:")
+    for identity in found:
+        print(f"   {'🎯' if identity.is_horus else '  '} {describe(identity)}")
+
+
+if __name__ == "__main__":
+    main()
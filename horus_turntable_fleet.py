@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Wiele talerzy Horus 0.2 w jednym procesie
+
+TurntableFleet otwiera N portów w jednej pętli asyncio. Każdy port to
+AsyncDigitizerController z własnym stanem (modalne F, baner, ostatni
+status), a jego deskryptor czeka w loop.add_reader() - bez wątku na
+urządzenie i bez odpytywania in_waiting, więc bezczynna flota praktycznie
+nie zużywa CPU.
+
+Każde urządzenie ma własną kolejkę zadań obsługiwaną przez jedno zadanie
+asyncio: komendy dla jednego talerza wykonują się po kolei, a różne talerze
+pracują równolegle. Raporty statusu trafiają do floty przez subskrypcję
+łącza, więc status zbiorczy nie wymaga dodatkowych zapytań.
+
+Przykład:
+    async def scan():
+        fleet = TurntableFleet(['/dev/ttyUSB0', '/dev/ttyUSB1', '/dev/ttyUSB2'])
+        await fleet.connect()
+        await fleet.broadcast('enable_motor')
+        for angle in range(0, 360, 30):
+            await fleet.rotate_all(angle, speed=200)
+            await fleet.wait_all()
+            ...  # zdjęcia ze wszystkich stanowisk
+        await fleet.disconnect()
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import sys
+
+from horus_turntable_async import AsyncDigitizerController
+from horus_turntable_serial import LINE_STATUS
+from horus_turntable_status import parse_status
+
+# Limit oczekiwania na zatrzymanie wszystkich talerzy (sekundy)
+WAIT_TIMEOUT = 60.0
+
+
+class FleetDevice:
+    """Talerz we flocie: kontroler, kolejka zadań i ostatni raport statusu"""
+
+    def __init__(self, name, controller):
+        self.name = name
+        self.controller = controller
+        self.jobs = asyncio.Queue()
+        self.status = None  # Ostatni StatusRecord
+        self.connected = False
+        self._task = None
+
+    @property
+    def backlog(self):
+        """Liczba zadań czekających w kolejce urządzenia"""
+        return self.jobs.qsize()
+
+    def on_status(self, line, timestamp, source):
+        """Subskrybent łącza - zapamiętuje ostatni raport statusu"""
+        record = parse_status(line, timestamp)
+        if record is not None:
+            self.status = record
+
+    def start(self):
+        """Uruchamia zadanie obsługujące kolejkę"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Porzuca zaległe zadania i przerywa bieżące"""
+        while not self.jobs.empty():
+            job = self.jobs.get_nowait()
+            if job is not None:
+                job[3].cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        """Zadania po kolei, aż do None"""
+        while True:
+            job = await self.jobs.get()
+            if job is None:
+                return
+            func, args, kwargs, future = job
+            if future.done():
+                continue  # Anulowane przed startem
+            try:
+                if isinstance(func, str):
+                    result = await getattr(self.controller, func)(*args, **kwargs)
+                else:
+                    result = await func(self.controller, *args, **kwargs)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+
+class TurntableFleet:
+    """Zbiór talerzy sterowanych z jednej pętli asyncio"""
+
+    def __init__(self, ports, baudrate=115200, log=print):
+        """
+        Args:
+            ports: Lista portów albo słownik nazwa -> port
+            baudrate: Prędkość transmisji wszystkich portów
+            log: Funkcja przyjmująca komunikaty (z prefiksem [nazwa])
+        """
+        if not isinstance(ports, dict):
+            ports = {os.path.basename(port): port for port in ports}
+        self.log = log
+        self.devices = {}
+        for name, port in ports.items():
+            controller = AsyncDigitizerController(port, baudrate, log=self._device_log(name))
+            self.devices[name] = FleetDevice(name, controller)
+
+    def _device_log(self, name):
+        return lambda message: self.log(f"[{name}] {message}")
+
+    def __len__(self):
+        return len(self.devices)
+
+    def _select(self, names):
+        if names is None:
+            return [device for device in self.devices.values() if device.connected]
+        return [self.devices[name] for name in names]
+
+    async def connect(self):
+        """
+        Łączy wszystkie urządzenia równolegle
+
+        Returns:
+            Słownik nazwa -> True/False
+        """
+        devices = list(self.devices.values())
+        results = await asyncio.gather(*(d.controller.connect() for d in devices))
+        for device, connected in zip(devices, results):
+            device.connected = connected
+            if connected:
+                device.controller.link.subscribe(device.on_status, LINE_STATUS)
+                device.start()
+        return {device.name: connected for device, connected in zip(devices, results)}
+
+    async def disconnect(self):
+        """Porzuca zaległe zadania i zamyka wszystkie porty"""
+        for device in self.devices.values():
+            await device.stop()
+            if device.connected:
+                await device.controller.disconnect()
+                device.connected = False
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        Dopisuje zadanie do kolejki jednego urządzenia i wraca od razu
+
+        Args:
+            name: Nazwa urządzenia
+            func: Nazwa metody AsyncDigitizerController albo funkcja async
+                  (kontroler, *args, **kwargs)
+
+        Returns:
+            asyncio.Future z wynikiem zadania
+        """
+        device = self.devices[name]
+        future = asyncio.get_running_loop().create_future()
+        device.jobs.put_nowait((func, args, kwargs, future))
+        return future
+
+    async def run(self, name, func, *args, **kwargs):
+        """Wykonuje zadanie na jednym urządzeniu (po zadaniach już w kolejce)"""
+        return await self.submit(name, func, *args, **kwargs)
+
+    async def broadcast(self, func, *args, names=None, **kwargs):
+        """
+        Wykonuje to samo zadanie na wielu urządzeniach jednocześnie
+
+        Args:
+            names: Nazwy urządzeń (domyślnie wszystkie połączone)
+
+        Returns:
+            Słownik nazwa -> wynik (albo wyjątek)
+        """
+        devices = self._select(names)
+        futures = [self.submit(d.name, func, *args, **kwargs) for d in devices]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        return {device.name: result for device, result in zip(devices, results)}
+
+    async def rotate_all(self, position, speed=200, names=None):
+        """Obraca wszystkie talerze do tej samej pozycji absolutnej"""
+        return await self.broadcast('rotate_to_position', position, speed, names=names)
+
+    async def wait_all(self, timeout=WAIT_TIMEOUT, names=None):
+        """
+        Czeka, aż wszystkie talerze skończą ruch (G4 P0 w kolejce każdego)
+
+        Returns:
+            Słownik nazwa -> True, jeśli talerz potwierdził zatrzymanie
+        """
+        async def dwell(controller):
+            lines, complete = await controller.link.send("G4 P0", timeout)
+            return complete and bool(lines) and lines[-1].lower() == 'ok'
+        return await self.broadcast(dwell, names=names)
+
+    async def poll_status(self, timeout=1.0, names=None):
+        """
+        Wysyła '?' do wszystkich urządzeń naraz (z pominięciem kolejek)
+
+        Returns:
+            Słownik nazwa -> StatusRecord lub None
+        """
+        devices = [d for d in self._select(names) if d.controller.link is not None]
+        await asyncio.gather(*(d.controller.link.request_status(timeout) for d in devices),
+                             return_exceptions=True)
+        return self.status(names)
+
+    def status(self, names=None):
+        """Ostatnie znane raporty statusu: nazwa -> StatusRecord lub None"""
+        return {device.name: device.status for device in self._select(names)}
+
+    def summary(self):
+        """
+        Status zbiorczy floty
+
+        Returns:
+            Słownik z liczbą urządzeń, połączonych, zadań w kolejkach
+            i urządzeń w każdym stanie (Unknown = brak raportu)
+        """
+        states = collections.Counter()
+        for device in self.devices.values():
+            if device.connected:
+                states[device.status.state if device.status else 'Unknown'] += 1
+        return {
+            'devices': len(self.devices),
+            'connected': sum(1 for d in self.devices.values() if d.connected),
+            'backlog': sum(d.backlog for d in self.devices.values()),
+            'states': dict(states),
+        }
+
+
+def print_summary(fleet):
+    """Wypisuje status zbiorczy i raport każdego urządzenia"""
+    summary = fleet.summary()
+    states = ", ".join(f"{state}: {count}" for state, count in sorted(summary['states'].items()))
+    print(f"📊 Urządzenia: {summary['connected']}/{summary['devices']} połączone"
+          f"{' - ' + states if states else ''}")
+    for name, record in fleet.status().items():
+        if record is None:
+            print(f"   {name}: brak raportu")
+        else:
+            print(f"   {name}: {record.state} {record.position:.3f}°")
+
+
+async def run_cli(args):
+    fleet = TurntableFleet(args.port, args.baudrate,
+                           log=(lambda message: None) if args.quiet else print)
+    results = await fleet.connect()
+    failed = [name for name, connected in results.items() if not connected]
+    if failed:
+        print(f"⚠️ Nie połączono: {', '.join(failed)}")
+    if len(failed) == len(results):
+        return 1
+    try:
+        if args.command:
+            await fleet.broadcast('send_gcode', args.command)
+        if args.position is not None:
+            await fleet.rotate_all(args.position, args.speed)
+        if args.wait:
+            done = await fleet.wait_all()
+            stopped = sum(1 for result in done.values() if result is True)
+            print(f"✅ Zatrzymane: {stopped}/{len(done)}")
+        if args.status or not (args.command or args.position is not None):
+            await fleet.poll_status()
+            print_summary(fleet)
+    finally:
+        await fleet.disconnect()
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sterowanie wieloma talerzami Horus 0.2 z jednego procesu',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Przykłady użycia:
+  %(prog)s --port /dev/ttyUSB0 --port /dev/ttyUSB1 --status
+  %(prog)s --port /dev/ttyUSB0 --port /dev/ttyUSB1 --command M17
+  %(prog)s --port /dev/ttyUSB0 --port /dev/ttyUSB1 --position 90 --speed 200 --wait
+        """
+    )
+    parser.add_argument('--port', action='append', required=True,
+                        help='Port szeregowy (można podać wielokrotnie)')
+    parser.add_argument('--baudrate', type=int, default=115200, help='Prędkość transmisji')
+    parser.add_argument('--command', help='Komenda G-code wysyłana do wszystkich talerzy')
+    parser.add_argument('--position', type=float, help='Pozycja docelowa wszystkich talerzy (stopnie)')
+    parser.add_argument('--speed', type=int, default=200, help='Prędkość obrotu (stopnie/s)')
+    parser.add_argument('--wait', action='store_true',
+                        help='Czekaj, aż wszystkie talerze się zatrzymają')
+    parser.add_argument('--status', action='store_true', help='Wypisz status zbiorczy')
+    parser.add_argument('--quiet', action='store_true', help='Bez logu poszczególnych urządzeń')
+    args = parser.parse_args()
+
+    try:
+        sys.exit(asyncio.run(run_cli(args)))
+    except KeyboardInterrupt:
+        print("\n👋 Przerwano")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,34 @@ import serial
 import time
 import sys
 import argparse
+import concurrent.futures
+import functools
+import math
+import threading
 import atexit
 import os
 
+from horus_turntable_serial import (CYCLE_START, FEED_HOLD, LINE_LOST, LINE_RESPONSE,
+                                    LINE_UNSOLICITED, REALTIME_COMMANDS, SOFT_RESET,
+                                    STATUS_QUERY, SerialLink, clean_gcode_line, reply_ok)
+from horus_turntable_angle import AngleEstimator
+from horus_turntable_status import StatusPoller, StatusRing, parse_status, poll_until_idle
+from horus_turntable_daemon import connect_daemon
+from horus_turntable_discovery import DiscoveryCache, describe, discover
+from horus_turntable_hotplug import PortWatcher, list_ports
+from horus_turntable_scan import ScanSequence
+from horus_turntable_spin import ContinuousSpin
+from horus_turntable_motion import (DEFAULT_ACCELERATION, TARGET_MODES, TIMEOUT_MARGIN,
+                                    feed_from_gcode, is_full_turn, move_command, move_duration,
+                                    position_from_gcode, resolve_target, shift_position,
+                                    wrap_offset)
+
+# Ponowne łączenie po utracie portu: pierwsza przerwa między próbami,
+# jej górna granica (sekundy; przerwa rośnie dwukrotnie) i liczba prób
+RECONNECT_DELAY = 0.5
+RECONNECT_MAX_DELAY = 8.0
+RECONNECT_ATTEMPTS = 15
+
 # Próbuj załadować readline, ale kontynuuj bez niego jeśli nie ma
 try:
     import readline
@@ -16,20 +41,49 @@ except ImportError:
     READLINE_AVAILABLE = False
     print("⚠️ Moduł readline niedostępny - brak historii komend")
 
+
+def _is_rezero(command):
+    """Czy linia G-code to G50 (zerowanie pozycji firmware)"""
+    words = command.split(';', 1)[0].upper().split()
+    return bool(words) and words[0] == 'G50'
+
 class MakerBotDigitizerController:
-    def __init__(self, port='/dev/ttyUSB0', baudrate=115200):
+    def __init__(self, port='/dev/ttyUSB0', baudrate=115200, auto_reconnect=False,
+                 interactive=True):
         """
         Inicjalizuje kontroler talerza obrotowego MakerBot Digitizer (Horus 0.2/GRBL)
         
         Args:
             port: Port szeregowy (zwykle /dev/ttyUSB0 lub /dev/ttyACM0)
             baudrate: Prędkość transmisji (domyślnie 115200)
+            auto_reconnect: Po utracie portu łącz ponownie i wznawiaj pracę
+            interactive: Konfiguruj readline i historię ~/.horus_history (False np. w demonie)
         """
         self.port = port
         self.baudrate = baudrate
         self.ser = None
+        self.link = None
+        self.response_timeout = 10.0  # Maksymalne oczekiwanie na 'ok' (sekundy)
+        self.status_ring = StatusRing()  # Telemetria z raportów '?'
+        self.poller = None
+        self.current_position = 0.0  # Ostatnia zadana pozycja (stopnie)
+        self.speed = None  # Modalne F w firmware (°/s); None = nieznane
+        self.motor_enabled = False  # Czy firmware potwierdziło M17
+        self.position_offset = 0.0  # Pozycja zadania minus pozycja firmware (po resynchronizacji)
+        self.target_mode = 'absolute'  # Wybór celu ruchów absolutnych (TARGET_MODES)
+        self.auto_rezero = True  # G50 po zatrzymaniu na wielokrotności 360° (patrz _rezero_if_wrapped)
+        self.acceleration = DEFAULT_ACCELERATION  # Przyspieszenie firmware ($120, °/s²)
+        self._motion_end = 0.0  # Szacowany koniec zleconych ruchów (time.monotonic)
         self.is_grbl = True  # Firmware Horus 0.2 jest oparty na GRBL
-        self.setup_readline()  # Konfiguruj historię komend
+        self.device_key = None  # Klucz USB połączonego talerza (VID:PID:serial)
+        self.reattach_port = None  # Port, pod którym talerz wrócił po odłączeniu
+        self.port_watcher = None
+        self.auto_reconnect = auto_reconnect
+        self._reconnect_lock = threading.Lock()
+        self._reattached = threading.Event()  # Budzi czekanie między próbami połączenia
+        self.history_file = None
+        if interactive:
+            self.setup_readline()  # Konfiguruj historię komend
         
     def setup_readline(self):
         """Konfiguruje readline dla historii komend"""
@@ -97,7 +151,18 @@ class MakerBotDigitizerController:
                 stopbits=serial.STOPBITS_ONE,
                 timeout=1
             )
-            time.sleep(2)  # Czas na inicjalizację
+            self.link = SerialLink(self.ser)
+            self.link.subscribe(self._on_link_lost, LINE_LOST)
+            self.link.start()
+            self.speed = None  # Otwarcie portu resetuje firmware
+            self.device_key = list_ports().get(self.port)
+            self.reattach_port = None
+            # Wracamy, gdy tylko firmware wypisze baner lub odpowie na '?'
+            if not self.link.wait_ready():
+                print("⚠️ Urządzenie nie odpowiada (brak banera i statusu)")
+            elif self.link.banner:
+                print(f"🤖 Firmware: {self.link.banner}")
+                self.motor_enabled = False  # Po resecie silnik jest wyłączony
             print(f"✅ Połączono z {self.port} na {self.baudrate} baud")
             return True
         except serial.SerialException as e:
@@ -106,14 +171,201 @@ class MakerBotDigitizerController:
     
     def disconnect(self):
         """Zamyka połączenie"""
-        if self.ser and self.ser.is_open:
+        self.stop_status_polling()
+        if self.link:
+            self.link.close()
+            self.link = None
+            print("🔌 Rozłączono")
+        elif self.ser and self.ser.is_open:
             self.ser.close()
             print("🔌 Rozłączono")
     
+    @property
+    def is_connected(self):
+        """Czy port jest otwarty, a wątek czytający działa"""
+        return self.link is not None and self.link.is_alive
+    
+    def _on_link_lost(self, error, timestamp, source):
+        """Subskrybent łącza - port zniknął (wołany w wątku czytającym)"""
+        print(f"\n⚠️ Utracono połączenie z {self.port}: {error}")
+        if self.auto_reconnect:
+            # Nie w wątku czytającym - reconnect() zamyka jego łącze
+            threading.Thread(target=self.ensure_connected, daemon=True,
+                             name="horus-reconnect").start()
+        else:
+            print("💡 Po ponownym podłączeniu talerza wpisz 'reconnect'")
+    
+    def watch_ports(self):
+        """Uruchamia obserwację podłączania/odłączania portów"""
+        if self.port_watcher is None:
+            self.port_watcher = PortWatcher(self._on_port_added, self._on_port_removed)
+            self.port_watcher.start()
+    
+    def _on_port_added(self, port, key):
+        """Nowy port - czy to odłączony wcześniej talerz? (wątek obserwatora)"""
+        if self.is_connected:
+            return
+        if (key is not None and key == self.device_key) or port == self.port:
+            self.reattach_port = port
+            if self.auto_reconnect:
+                print(f"\n🔌 Talerz ponownie podłączony na {port}")
+                self._reattached.set()
+            else:
+                print(f"\n🔌 Talerz ponownie podłączony na {port} - wpisz 'reconnect', aby połączyć")
+    
+    def _on_port_removed(self, port, key):
+        """Port zniknął (wątek obserwatora)"""
+        if port == self.port:
+            print(f"\n⚠️ Port {port} zniknął (odłączony kabel?)")
+    
+    def reconnect(self, port=None):
+        """
+        Łączy ponownie - domyślnie z portem, pod którym talerz wrócił
+        
+        Args:
+            port: Port (domyślnie zgłoszony przez obserwatora albo dotychczasowy)
+        """
+        self.disconnect()
+        self.port = port or self.reattach_port or self.port
+        return self.connect()
+    
+    def ensure_connected(self, force=False):
+        """
+        Przywraca utracone połączenie, ponawiając próby z rosnącymi odstępami
+        
+        Po połączeniu odtwarza stan sprzed utraty łącza (patrz _resync()),
+        więc przerwane zadanie może być kontynuowane od ostatniej
+        potwierdzonej linii.
+        
+        Args:
+            force: Połącz ponownie także wtedy, gdy łącze działa
+            
+        Returns:
+            True, jeśli łącze działa i stan został odtworzony
+        """
+        with self._reconnect_lock:
+            if self.is_connected and not force:
+                return True
+            state = self._snapshot_state()
+            poll_rate = self.poller.rate_hz if self.poller else None
+            delay = RECONNECT_DELAY
+            for attempt in range(1, RECONNECT_ATTEMPTS + 1):
+                port = ((self.port_watcher.find(self.device_key) if self.port_watcher else None)
+                        or self.reattach_port or self.port)
+                print(f"🔄 Ponowne łączenie z {port} (próba {attempt}/{RECONNECT_ATTEMPTS})...")
+                self._reattached.clear()
+                if self.reconnect(port) and self._resync(*state):
+                    if poll_rate:
+                        self.start_status_polling(poll_rate)
+                    return True
+                # Obserwator portów przerywa czekanie, gdy talerz wróci
+                self._reattached.wait(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            print(f"❌ Nie udało się połączyć ponownie po {RECONNECT_ATTEMPTS} próbach")
+            return False
+    
+    def _recover(self):
+        """Czy po błędzie łącza udało się automatycznie połączyć ponownie"""
+        return self.auto_reconnect and self.ensure_connected()
+    
+    def _snapshot_state(self):
+        """
+        Stan do odtworzenia po ponownym połączeniu
+        
+        Returns:
+            Krotka (silnik włączony, F, pozycja talerza, pozycja docelowa)
+        """
+        position = target = self.current_position
+        if time.monotonic() < self._motion_end:
+            # Ruch przerwany - talerz stoi gdzieś przed celem
+            _, positions, _, _ = self.status_ring.task_series(last=1)
+            if self.poller is not None and positions and not math.isnan(positions[0]):
+                position = positions[0]
+                print(f"⚠️ Ruch przerwany przy {position:.3f}° (ostatni raport statusu)")
+            else:
+                print("⚠️ Ruch przerwany - bez telemetrii (poll) pozycja talerza jest niepewna")
+        return self.motor_enabled, self.speed, position, target
+    
+    def _resync(self, motor_enabled, speed, position, target):
+        """
+        Odtwarza stan firmware po ponownym połączeniu
+        
+        Po resecie płytki (baner) firmware liczy od zera tam, gdzie talerz
+        stanął - G50 to potwierdza. Bez resetu pozycja firmware pochodzi
+        z raportu '?'. Różnica trafia do position_offset, o który przesuwane
+        są pozycje X kolejnych komend, więc zadanie liczy dalej we własnych
+        współrzędnych. Potem M17 (jeśli silnik był włączony), modalne F
+        i dokończenie przerwanego ruchu.
+        """
+        # Płytka mogła się zresetować (nowe zero) - do ustalenia przesunięcia układ nieznany
+        self.status_ring.set_offset(math.nan)
+        try:
+            record = None if self.link.banner else parse_status(self.link.request_status() or '')
+            if record is None or math.isnan(record.position):
+                if not self._send_modal("G50"):
+                    return False
+                firmware_position = 0.0
+            else:
+                firmware_position = record.position
+            self.position_offset = position - firmware_position
+            self.current_position = position
+            if motor_enabled and not self._send_modal("M17"):
+                return False
+            if speed is not None and not self._send_modal(f"G1 F{speed:g}"):
+                return False
+            if motor_enabled and abs(target - position) > 1e-3:
+                print(f"↪️ Dokańczam przerwany ruch do {target}°")
+                self._track_move(target)
+                if not self._send_modal(move_command(target)):
+                    return False
+        except (serial.SerialException, OSError) as e:
+            print(f"❌ Błąd odtwarzania stanu: {e}")
+            return False
+        print(f"✅ Stan odtworzony: silnik {'włączony' if motor_enabled else 'wyłączony'}, "
+              f"F {speed if speed is not None else 'domyślne'}, pozycja {self.current_position}° "
+              f"(przesunięcie {self.position_offset:+.3f}°)")
+        return True
+    
+    def _send_modal(self, command):
+        """Wysyła komendę odtwarzającą stan (bez ponawiania) i śledzi jej skutek"""
+        lines, complete = self.link.send(self._to_firmware(command), self.response_timeout)
+        accepted = complete and bool(lines) and lines[-1].lower() == 'ok'
+        print(f"📡 {command} → {lines[-1] if lines else 'brak odpowiedzi'}")
+        self._track_ack(command, accepted)
+        return accepted
+    
+    @property
+    def position_offset(self):
+        """Pozycja zadania minus pozycja firmware (po resynchronizacji lub przenumerowaniu)"""
+        return self._position_offset
+    
+    @position_offset.setter
+    def position_offset(self, offset):
+        self._position_offset = offset
+        # Kolejne raporty '?' przeliczamy na współrzędne zadania z nowym przesunięciem
+        self.status_ring.set_offset(offset)
+    
+    def _to_firmware(self, command):
+        """
+        Komenda z pozycją X przeliczoną na współrzędne firmware
+        
+        G50 zeruje firmware dopiero w chwili wykonania, więc od wysłania
+        do potwierdzenia raporty '?' mają nieznany układ (przesunięcie nan).
+        """
+        if _is_rezero(command):
+            self.status_ring.set_offset(math.nan)
+        return shift_position(command, -self.position_offset)
+    
     def flush_input(self):
-        """Opróżnia bufor wejściowy"""
-        if self.ser and self.ser.is_open:
-            self.ser.flushInput()
+        """Opróżnia bufor wejściowy (przez łącze - tylko bez oczekujących komend)"""
+        if not self.is_connected:
+            print("❌ Brak połączenia!")
+            return False
+        if not self.link.flush_input():
+            print("⚠️ Komendy czekają na odpowiedź - bufora nie czyszczę")
+            return False
+        print("🧹 Bufor wejściowy opróżniony")
+        return True
     
     def send_gcode(self, command):
         """
@@ -122,53 +374,303 @@ class MakerBotDigitizerController:
         Args:
             command: Komenda G-code jako string
         """
-        if not self.ser or not self.ser.is_open:
+        if not self.is_connected and not self._recover():
             print("❌ Brak połączenia!")
             return False
         
+        if command.strip('\r\n') in REALTIME_COMMANDS:
+            return self.realtime(command.strip('\r\n'))
+        
         try:
-            # Opróżnij bufor wejściowy przed wysłaniem nowej komendy
-            self.flush_input()
-            
-            # Dodaj znak końca linii jeśli nie ma
-            if not command.endswith('\n'):
-                command += '\n'
-            
-            # Wyślij komendę
-            self.ser.write(command.encode('utf-8'))
+            # Wątek czytający budzi nas, gdy tylko nadejdzie ok/error/ALARM
             print(f"📡 Wysłano: {command.strip()}")
-            
-            # Czekaj na odpowiedź i odczytaj wszystkie dostępne linie
-            time.sleep(0.2)  # Dłuższe oczekiwanie na odpowiedź
-            responses = []
-            
-            # Odczytaj wszystkie dostępne dane
-            start_time = time.time()
-            while time.time() - start_time < 1.0:  # Maksymalnie 1 sekunda oczekiwania
-                if self.ser.in_waiting > 0:
-                    try:
-                        line = self.ser.readline().decode('utf-8').strip()
-                        if line:
-                            responses.append(line)
-                            print(f"📨 Odpowiedź: {line}")
-                    except UnicodeDecodeError:
-                        continue
-                else:
-                    # Jeśli nie ma więcej danych, czekaj krótko i sprawdź ponownie
-                    time.sleep(0.05)
-                    if self.ser.in_waiting == 0:
-                        break
+            responses, complete = self.link.send(self._to_firmware(command),
+                                                 self.response_timeout)
+            for line in responses:
+                print(f"📨 Odpowiedź: {line}")
+            if not complete:
+                print(f"⚠️ Brak potwierdzenia w ciągu {self.response_timeout} s")
+            self._track_ack(command, complete and responses[-1].lower() == 'ok')
             
             return responses if responses else True
+        except Exception as e:
+            print(f"❌ Błąd wysyłania: {e}")
+            if self.is_connected or not self._recover():
+                return False
+            # Komenda nie została potwierdzona - wysyłamy ją jeszcze raz
+            print(f"🔁 Ponawiam: {command.strip()}")
+            return self.send_gcode(command)
+
+    def realtime(self, command):
+        """
+        Wysyła komendę czasu rzeczywistego (?, !, ~, Ctrl-X) z pominięciem kolejki
+        
+        Args:
+            command: Jeden ze znaków REALTIME_COMMANDS
+            
+        Returns:
+            Lista linii odpowiedzi (status / baner), True lub False przy błędzie
+        """
+        if not self.is_connected and not self._recover():
+            print("❌ Brak połączenia!")
+            return False
+        
+        try:
+            if command == STATUS_QUERY:
+                status = self.link.request_status()
+                if status is None:
+                    print("⚠️ Brak raportu statusu")
+                    return False
+                print(f"📨 Odpowiedź: {status}")
+                return [status]
+            if command == SOFT_RESET:
+                self.speed = None  # Reset przywraca domyślne F
+                if not self.link.soft_reset():
+                    print("⚠️ Brak banera po soft resecie")
+                    return False
+                print(f"📨 Odpowiedź: {self.link.banner}")
+                return [self.link.banner]
+            latency = self.link.realtime(command)
+            print(f"⚡ Wysłano {command} w {latency * 1000:.3f} ms")
+            return True
         except Exception as e:
             print(f"❌ Błąd wysyłania: {e}")
             return False
+    
+    def start_status_polling(self, rate_hz=10.0):
+        """
+        Uruchamia cykliczne odpytywanie '?' z zapisem do self.status_ring
+        
+        Args:
+            rate_hz: Częstotliwość odpytywania w Hz
+        """
+        if not self.is_connected:
+            print("❌ Brak połączenia!")
+            return False
+        self.stop_status_polling()
+        self.poller = StatusPoller(self.link, self.status_ring, rate_hz)
+        self.poller.start()
+        print(f"📈 Odpytywanie statusu {rate_hz} Hz")
+        return True
+    
+    def stop_status_polling(self):
+        """Zatrzymuje odpytywanie statusu"""
+        if self.poller:
+            self.poller.stop()
+            self.poller = None
+            print("⏹️ Zatrzymano odpytywanie statusu")
+    
+    def latest_status(self):
+        """Zwraca ostatni rekord telemetrii (StatusRecord) lub None"""
+        return self.status_ring.latest()
+    
+    def angle_estimator(self):
+        """
+        Estymator kąta na telemetrii odpytywania (patrz horus_turntable_angle)
+        
+        Returns:
+            AngleEstimator z opóźnieniem '?' zmierzonym przez łącze albo None bez łącza
+        """
+        if self.link is None:
+            return None
+        return AngleEstimator.from_link(self.status_ring, self.link,
+                                        acceleration=self.acceleration, max_speed=self.speed)
+    
+    def show_angle(self):
+        """Wyświetla oszacowany kąt talerza w tej chwili"""
+        estimator = self.angle_estimator()
+        if estimator is None or not len(self.status_ring):
+            print("📐 Brak telemetrii (użyj: poll 10)")
+            return
+        angle, error = estimator.estimate(time.time())
+        if math.isnan(angle):
+            print("📐 Telemetria jest zbyt stara - włącz odpytywanie (poll 10)")
+            return
+        print(f"📐 Kąt: {angle:.3f}° ± {error:.3f}° "
+              f"(opóźnienie odczytu {estimator.latency * 1000:.1f} ms)")
+    
+    def show_telemetry(self):
+        """Wyświetla podsumowanie bufora telemetrii"""
+        record = self.status_ring.latest()
+        if record is None:
+            print("📈 Brak telemetrii (użyj: poll 10)")
+            return
+        age = time.time() - record.timestamp
+        position = self.status_ring.task_series(last=1)[1][0]  # Układ zadania
+        print(f"📈 {record.state} | X: {position:.3f}° | "
+              f"bufor: {record.planner_fill} | RX: {record.rx_fill} | {age:.2f} s temu")
+        print(f"   Rekordów: {len(self.status_ring)}/{self.status_ring.capacity} "
+              f"({self.status_ring.nbytes / 1e6:.1f} MB)")
+    
+    def submit(self, command):
+        """
+        Wysyła komendę bez czekania na odpowiedź
+        
+        Args:
+            command: Komenda G-code jako string
+            
+        Returns:
+            concurrent.futures.Future z listą linii odpowiedzi tej komendy
+        """
+        if not self.is_connected:
+            future = concurrent.futures.Future()
+            future.set_exception(serial.SerialException("Brak połączenia!"))
+            return future
+        
+        print(f"📡 Wysłano: {command.strip()}")
+        future = concurrent.futures.Future()
+        try:
+            sent = self.link.submit(self._to_firmware(command), self.response_timeout)
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        # Kolejne komendy budujemy od razu, więc F zapisujemy przed 'ok'
+        self._track_feed(command)
+        sent.add_done_callback(functools.partial(self._check_ack, command, future))
+        return future
+    
+    def _track_feed(self, command, accepted=True):
+        """Śledzi modalne F firmware na podstawie wysłanych linii"""
+        feed = feed_from_gcode(command)
+        if feed is not None:
+            self.speed = feed if accepted else None
+    
+    def _track_ack(self, command, accepted):
+        """Śledzi stan firmware (F, silnik, zero, pozycja) po odpowiedzi na linię"""
+        self._track_feed(command, accepted)
+        if not accepted:
+            if _is_rezero(command):
+                # Zero firmware bez zmian - telemetria wraca do dotychczasowego układu
+                self.status_ring.set_offset(self.position_offset)
+            return
+        words = command.split(';', 1)[0].upper().split()
+        word = words[0] if words else ''
+        if word == 'M17':
+            self.motor_enabled = True
+        elif word == 'M18':
+            self.motor_enabled = False
+        elif word == 'G50':
+            self.current_position = 0.0
+            self.position_offset = 0.0
+        else:
+            position = position_from_gcode(command)
+            if position is not None:
+                self.current_position = position
+    
+    def _check_ack(self, command, future, sent):
+        """
+        Callback Future łącza - śledzi stan po odpowiedzi firmware
+        
+        Future zwrócone przez submit() rozwiązujemy dopiero potem: kto
+        czeka na wynik, widzi już uaktualnioną pozycję, F i silnik.
+        """
+        accepted = not sent.cancelled() and sent.exception() is None
+        if accepted:
+            lines = sent.result()
+            accepted = bool(lines) and lines[-1].lower() == 'ok'
+        self._track_ack(command, accepted)
+        if future.done():
+            return  # Anulowane przez wołającego
+        if sent.cancelled():
+            future.cancel()
+        elif sent.exception() is not None:
+            future.set_exception(sent.exception())
+        else:
+            future.set_result(sent.result())
+    
+    def gather(self, futures):
+        """
+        Czeka na odpowiedzi kilku komend wysłanych przez submit()
+        
+        Args:
+            futures: Lista obiektów Future zwróconych przez submit()
+            
+        Returns:
+            Połączona lista odpowiedzi (jak send_gcode) lub False przy błędzie
+        """
+        done, not_done = concurrent.futures.wait(futures, self.response_timeout)
+        responses = []
+        for future in futures:
+            if future not in done:
+                continue
+            try:
+                lines = future.result()
+            except Exception as e:
+                print(f"❌ Błąd wysyłania: {e}")
+                return False
+            for line in lines:
+                print(f"📨 Odpowiedź: {line}")
+            responses.extend(lines)
+        if not_done:
+            print(f"⚠️ Brak potwierdzenia w ciągu {self.response_timeout} s")
+        
+        return responses if responses else True
+
+    def stream_file(self, path):
+        """
+        Strumieniuje plik G-code z prędkością firmware (liczenie znaków GRBL)
+        
+        Args:
+            path: Ścieżka do pliku G-code
+        """
+        if not self.is_connected:
+            print("❌ Brak połączenia!")
+            return False
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                commands = [cmd for cmd in (clean_gcode_line(line) for line in f) if cmd]
+        except OSError as e:
+            print(f"❌ Nie można odczytać pliku: {e}")
+            return False
+        
+        print(f"📜 Strumieniuję {len(commands)} linii z {path}...")
+        
+        acked = 0  # Potwierdzone linie - od następnej wznawiamy po utracie łącza
+        
+        def report(entry):
+            nonlocal acked
+            position = position_from_gcode(commands[acked])
+            if entry.ok and position is not None:
+                self._track_move(position)  # Szacowany koniec ruchu - do odtworzenia stanu
+            self._track_ack(commands[acked], entry.ok)
+            acked += 1
+            if not entry.ok:
+                print(f"❌ {entry.command} → {entry.lines[-1] if entry.lines else '?'}")
+        
+        start_time = time.time()
+        while True:
+            try:
+                _, errors = self.link.stream(self._firmware_lines(commands[acked:]),
+                                             on_response=report)
+                break
+            except Exception as e:
+                print(f"❌ Błąd strumieniowania: {e}")
+                if self.is_connected or not self._recover():
+                    return False
+                print(f"🔁 Wznawiam od linii {acked + 1}/{len(commands)}")
+        
+        elapsed = time.time() - start_time
+        print(f"✅ Wysłano {acked}/{len(commands)} linii w {elapsed:.2f} s")
+        if errors:
+            print(f"⚠️ Przerwano po błędzie w linii: {errors[0].command}")
+        return not errors
+    
+    def _firmware_lines(self, commands):
+        """Linie pliku w układzie firmware - G50 w pliku kończy przesunięcie"""
+        offset = self.position_offset
+        for command in commands:
+            if _is_rezero(command):
+                self.status_ring.set_offset(math.nan)  # Jak w _to_firmware()
+            yield shift_position(command, -offset)
+            if _is_rezero(command):
+                offset = 0.0
 
     # GRBL/System commands
     def get_status(self):
         """Pobiera aktualny status urządzenia (GRBL)"""
         print("📊 Sprawdzam status...")
-        return self.send_gcode("?")
+        return self.realtime(STATUS_QUERY)
     
     def get_settings(self):
         """Wyświetla wszystkie ustawienia GRBL"""
@@ -194,17 +696,17 @@ class MakerBotDigitizerController:
     def cycle_start(self):
         """Rozpoczyna cykl (GRBL)"""
         print("▶️ Rozpoczynam cykl...")
-        return self.send_gcode("~")
+        return self.realtime(CYCLE_START)
     
     def feed_hold(self):
         """Wstrzymuje ruch (GRBL)"""
         print("⏸️ Wstrzymuję ruch...")
-        return self.send_gcode("!")
+        return self.realtime(FEED_HOLD)
     
     def soft_reset(self):
         """Wykonuje soft reset (GRBL)"""
         print("🔄 Wykonuję soft reset...")
-        return self.send_gcode("\x18")  # Ctrl-X
+        return self.realtime(SOFT_RESET)
 
     # Horus 0.2 specific motor commands
     def enable_motor(self):
@@ -220,7 +722,10 @@ class MakerBotDigitizerController:
     def reset_position(self):
         """Resetuje pozycję do zera (G50) - zalecane po M18"""
         print("🏠 Resetuję pozycję do zera...")
-        return self.send_gcode("G50")
+        result = self.send_gcode("G50")
+        if result:
+            self.current_position = 0.0
+        return result
     
     def set_speed(self, speed):
         """
@@ -232,35 +737,185 @@ class MakerBotDigitizerController:
         print(f"🏃 Ustawiam prędkość na {speed}°/s")
         return self.send_gcode(f"G1 F{speed}")
     
-    def rotate_to_absolute_position(self, position):
+    def rotate_to_absolute_position(self, position, mode=None):
         """
         Obraca do absolutnej pozycji w stopniach (G1 X)
         
         Args:
             position: Pozycja w stopniach (może być ujemna)
+            mode: Wybór celu (TARGET_MODES); None = self.target_mode
         """
         print(f"🎯 Przechodzę do absolutnej pozycji {position}°")
-        return self.send_gcode(f"G1 X{position}")
+        target, mode = self._resolve_target(position, mode)
+        result = self._send_move(f"G1 X{target}", target)
+        if result and mode != 'absolute':
+            self._renormalize(position)
+        return result
     
     def home_turntable(self):
         """Przechodzi do pozycji domowej - resetuje i włącza silnik"""
         print("🏠 Przechodzę do pozycji domowej...")
-        self.enable_motor()
-        time.sleep(0.1)
-        return self.reset_position()
+        # M17 i G50 trafiają do bufora firmware jedna za drugą - bez pauzy
+        result = self.gather([self.submit("M17"), self.submit("G50")])
+        if result:
+            self.current_position = 0.0
+        return result
     
-    def rotate_to_position(self, position, speed=200):
+    def rotate_to_position(self, position, speed=200, mode=None):
         """
         Obraca talerz do konkretnej pozycji absolutnej
         
         Args:
             position: Pozycja docelowa w stopniach
             speed: Prędkość obrotu w stopniach/sekundę (domyślnie 200)
+            mode: Wybór celu (TARGET_MODES); None = self.target_mode
         """
         print(f"🔄 Ustawiam prędkość {speed}°/s i przechodzę do pozycji {position}°")
-        self.set_speed(speed)
-        time.sleep(0.1)
-        return self.rotate_to_absolute_position(position)
+        target, mode = self._resolve_target(position, mode)
+        # Jedna linia G1 F.. X..; F pomijamy, gdy firmware już je ma
+        result = self._send_move(move_command(target, speed, self.speed), target)
+        if result and mode != 'absolute':
+            self._renormalize(position)
+        return result
+    
+    def _send_move(self, command, target):
+        """
+        Wysyła ruch G1 i zostawia śledzony stan tylko po 'ok'
+        
+        Pozycję i koniec ruchu ustawiamy przed wysłaniem - gdy łącze padnie
+        w trakcie, odtwarzanie stanu dokańcza ruch do celu. Błąd (error:N,
+        ALARM) lub brak potwierdzenia przywraca stan sprzed komendy, a F
+        śledzi _track_ack() w send_gcode().
+        
+        Returns:
+            Odpowiedzi firmware zakończone 'ok' albo False
+        """
+        position, motion_end = self.current_position, self._motion_end
+        self._track_feed(command)  # Czas ruchu liczymy z nowym F
+        self._track_move(target)
+        result = self.send_gcode(command)
+        if reply_ok(result):
+            return result
+        self.current_position, self._motion_end = position, motion_end
+        return False
+    
+    def _resolve_target(self, position, mode):
+        """
+        Cel G1 X dla żądanego kąta według trybu (patrz resolve_target)
+        
+        Returns:
+            Krotka (pozycja docelowa, użyty tryb)
+        """
+        mode = mode or self.target_mode
+        target = resolve_target(position, self.current_position, mode)
+        if target != position:
+            print(f"🧭 {position}° → cel {target}° ({TARGET_MODES[mode]}, "
+                  f"droga {target - self.current_position:+g}°)")
+        return target, mode
+    
+    def _renormalize(self, angle):
+        """
+        Przenumerowuje współrzędne zadania tak, by bieżąca pozycja była
+        kątem angle zredukowanym do (-360°, 360°)
+        
+        Firmware liczy dalej po swojemu - przesunięcie o wielokrotność 360°
+        przejmuje position_offset (jak po resynchronizacji).
+        """
+        shift = wrap_offset(self.current_position, angle)
+        if shift:
+            print(f"🔢 Pozycja przenumerowana: {self.current_position:g}° → "
+                  f"{self.current_position + shift:g}°")
+            self.current_position += shift
+            self.position_offset += shift
+    
+    def _track_move(self, position):
+        """Aktualizuje śledzoną pozycję i szacowany czas końca ruchu"""
+        # Firmware pamięta ostatnie F; gdy go nie znamy, zakładamy domyślne 200°/s
+        speed = self.speed if self.speed else 200
+        duration = move_duration(position - self.current_position, speed, self.acceleration)
+        # Ruch wykona się po wszystkich wcześniej zleconych
+        self._motion_end = max(time.monotonic(), self._motion_end) + duration
+        self.current_position = position
+    
+    def wait_until_idle(self, timeout=None, method='dwell'):
+        """
+        Czeka, aż talerz faktycznie się zatrzyma
+        
+        Args:
+            timeout: Limit w sekundach (domyślnie z drogi i prędkości zleconych ruchów)
+            method: 'dwell' - wysyła G4 P0, którego 'ok' przychodzi po opróżnieniu planera;
+                    'status' - odpytuje '?' aż do dwóch kolejnych raportów Idle
+        
+        Returns:
+            True, jeśli ruch się zakończył w zadanym czasie
+        """
+        if not self.is_connected:
+            print("❌ Brak połączenia!")
+            return False
+        if timeout is None:
+            remaining = max(0.0, self._motion_end - time.monotonic())
+            timeout = remaining * 1.5 + TIMEOUT_MARGIN
+        
+        print(f"⏳ Czekam na zakończenie ruchu (limit {timeout:.1f} s)...")
+        start_time = time.monotonic()
+        try:
+            if method == 'dwell':
+                lines = self.link.submit("G4 P0").result(timeout)
+                idle = bool(lines) and lines[-1].lower() == 'ok'
+            else:
+                idle = poll_until_idle(self.link, timeout)
+        except concurrent.futures.TimeoutError:
+            idle = False
+        except Exception as e:
+            print(f"❌ Błąd oczekiwania: {e}")
+            if self.is_connected or not self._recover():
+                return False
+            # Przerwany ruch został dokończony przy odtwarzaniu stanu
+            return self.wait_until_idle(method=method)
+        
+        elapsed = time.monotonic() - start_time
+        if idle:
+            self._motion_end = 0.0
+            print(f"✅ Ruch zakończony ({elapsed:.2f} s)")
+            self._rezero_if_wrapped()
+        else:
+            print(f"⚠️ Talerz nie zatrzymał się w ciągu {elapsed:.1f} s")
+        return idle
+    
+    def _rezero_if_wrapped(self):
+        """
+        Zeruje firmware (G50), gdy talerz stoi na niezerowej wielokrotności 360°
+        
+        Wielokrotne obroty zwiększają X bez końca - maleje precyzja float
+        w firmware, a linie G-code się wydłużają. Po pełnych obrotach talerz
+        jest tam, gdzie zero, więc G50 nie przesuwa zera fizycznie, a śledzona
+        pozycja wraca do (-360°, 360°). Wołane tylko po potwierdzonym
+        zatrzymaniu - G50 w trakcie ruchu przesunęłoby zero.
+        """
+        firmware_position = self.current_position - self.position_offset
+        if not self.auto_rezero or not is_full_turn(firmware_position):
+            return
+        position = self.current_position + wrap_offset(self.current_position)
+        if not self._send_modal("G50"):
+            return
+        # _track_ack wyzerował oba liczniki - zadanie liczy dalej od zredukowanej pozycji
+        self.current_position = position
+        self.position_offset = position
+        print(f"🔢 Zero firmware przeniesione: {firmware_position:g}° → 0° (pozycja {position:g}°)")
+    
+    def move_and_wait(self, position, speed=200, method='dwell', mode=None):
+        """
+        Obraca do pozycji absolutnej i wraca dopiero po zatrzymaniu talerza
+        
+        Args:
+            position: Pozycja docelowa w stopniach
+            speed: Prędkość obrotu w stopniach/sekundę
+            method: Sposób oczekiwania ('dwell' lub 'status'), patrz wait_until_idle()
+            mode: Wybór celu (TARGET_MODES); None = self.target_mode
+        """
+        if not self.rotate_to_position(position, speed, mode):
+            return False
+        return self.wait_until_idle(method=method)
     
     def stop_turntable(self):
         """Zatrzymuje talerz - wyłącza silnik"""
@@ -275,20 +930,18 @@ class MakerBotDigitizerController:
             duration: Czas monitorowania w sekundach
         """
         print(f"👁️ Monitorowanie przez {duration} sekund... (Ctrl+C aby przerwać)")
-        start_time = time.time()
         
+        def show(line, timestamp, source):
+            print(f"[{time.strftime('%H:%M:%S', time.localtime(timestamp))}] {line}")
+        
+        # Linie wypisuje wątek czytający łącza - ten wątek tylko czeka
+        self.link.subscribe(show, (LINE_RESPONSE, LINE_UNSOLICITED))
         try:
-            while time.time() - start_time < duration:
-                if self.ser.in_waiting > 0:
-                    try:
-                        line = self.ser.readline().decode('utf-8').strip()
-                        if line:
-                            print(f"[{time.strftime('%H:%M:%S')}] {line}")
-                    except UnicodeDecodeError:
-                        continue
-                time.sleep(0.01)
+            time.sleep(duration)
         except KeyboardInterrupt:
             print("\n⏹️ Monitorowanie przerwane")
+        finally:
+            self.link.unsubscribe(show)
 
     def show_help(self):
         """Wyświetla pomoc z dostępnymi komendami"""
@@ -304,20 +957,30 @@ class MakerBotDigitizerController:
         
         print("\n🔄 RUCH I POZYCJONOWANIE:")
         print("  speed X          - ustaw prędkość X°/s (G1 F)")
-        print("  abs_pos X        - przejdź do pozycji X° (G1 X)")
-        print("  position X       - ustaw prędkość 200°/s i idź do X°")
+        print("  abs_pos X [TRYB] - przejdź do pozycji X° (G1 X)")
+        print("  position X [TRYB]- ustaw prędkość 200°/s i idź do X°")
+        print("  move X [TRYB]    - jak position, ale czekaj na zatrzymanie")
+        print("  modulo [TRYB]    - cel modulo 360°: shortest/positive/negative (off = absolutnie)")
+        print("  wait             - czekaj, aż talerz się zatrzyma (G4 P0)")
+        print("  scan N [ŁUK]     - N postojów na łuku (domyślnie 360°)")
+        print("  spin X           - obrót ciągły X°/s (spin stop = zatrzymaj)")
         
         print("\n📊 INFORMACJE I STATUS:")
         print("  status           - sprawdź status urządzenia (?)")
         print("  settings         - wyświetl wszystkie ustawienia ($$)")
         print("  info             - informacje o firmware ($I)")
         print("  parser           - stan parsera G-code ($G)")
+        print("  poll X           - odpytuj status X razy/s (0 = wyłącz)")
+        print("  telemetry        - ostatni status z odpytywania")
+        print("  angle            - oszacowany kąt talerza teraz (z telemetrii)")
         
         print("\n🛠️ KONTROLA SYSTEMU:")
         print("  unlock           - odblokuj alarmy ($X)")
         print("  reset_ctrl       - soft reset systemu (Ctrl-X)")
+        print("  hold             - wstrzymaj ruch natychmiast (!)")
         print("  start            - rozpocznij cykl (~)")
         print("  flush            - opróżnij bufor komunikacji")
+        print("  reconnect        - połącz ponownie i odtwórz stan (silnik, F, pozycja)")
         
         print("\n🔍 DIAGNOSTYKA:")
         print("  monitor X        - monitoruj odpowiedzi przez X sekund")
@@ -327,6 +990,7 @@ class MakerBotDigitizerController:
         
         print("\n📝 BEZPOŚREDNIE KOMENDY:")
         print("  [komenda]        - wyślij dowolną komendę G-code/GRBL")
+        print("  stream PLIK      - strumieniuj plik G-code (liczenie znaków)")
         
         print("\n⌨️ SKRÓTY KLAWISZOWE:")
         print("  ↑ / ↓            - nawigacja po historii komend")
@@ -345,7 +1009,7 @@ class MakerBotDigitizerController:
         print("\n⚠️ WAŻNE UWAGI:")
         print("  • Dodatnie kąty = obrót przeciwny do wskazówek zegara")
         print("  • Prędkość w stopniach/sekundę (nie mm/min)")
-        print("  • Pozycje są zawsze absolutne, mogą być ujemne")
+        print("  • Pozycje są absolutne, mogą być ujemne (modulo - kąt najbliższą drogą)")
         print("  • Zawsze wyłącz silnik po użyciu (disable/stop)")
         print("  • Jeśli silnik długo włączony - może się przegrzać!")
         
@@ -397,6 +1061,40 @@ class MakerBotDigitizerController:
             print(f"⚠️ Nie można usunąć pliku historii: {e}")
 
 
+def run_via_daemon(client, args):
+    """
+    Wykonuje --position / --command / --file przez demona trzymającego port
+    
+    Returns:
+        Kod wyjścia programu
+    """
+    if args.position is not None:
+        if args.wait:
+            requests = [('move', args.position, args.speed, 'dwell', args.modulo)]
+        else:
+            requests = [('position', args.position, args.speed, args.modulo)]
+    elif args.command:
+        command = args.command.strip('\r\n')
+        requests = [('realtime' if command in REALTIME_COMMANDS else 'command', command)]
+    else:
+        requests = [('file', os.path.abspath(args.file))]
+        if args.wait:
+            requests.append(('wait', 600.0))
+    
+    # Ustawienia tego wywołania obowiązują demona tylko na czas jego żądań
+    options = {'auto_rezero': False} if args.no_rezero else {}
+    with client:
+        for op, *op_args in requests:
+            reply = client.request(op, *op_args, **options)
+            print(reply['output'], end='')
+            if 'error' in reply:
+                print(f"❌ Demon: {reply['error']}")
+                return 1
+            if op == 'file' and not reply['ok']:
+                return 1
+    return 0
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Kontroler talerza obrotowego MakerBot Digitizer (Horus 0.2)',
@@ -407,8 +1105,15 @@ Przykłady użycia:
   %(prog)s --command "M17"                 # Włącz silnik
   %(prog)s --command "G1 F200"             # Ustaw prędkość 200°/s
   %(prog)s --position 90                   # Przejdź do pozycji 90°
+  %(prog)s --position 90 --modulo shortest # Do 90° najkrótszą drogą (także po wielu obrotach)
+  %(prog)s --file skan.gcode               # Strumieniuj plik G-code
+  %(prog)s --port auto --interactive       # Znajdź talerz na dowolnym porcie
+  %(prog)s --file skan.gcode --reconnect   # Wznów plik po odłączeniu kabla
   %(prog)s --command "M18"                 # Wyłącz silnik
 
+Gdy dla portu działa horus_turntable_daemon.py, --command, --position i --file
+są wysyłane do demona (bez otwierania portu i resetu płytki).
+
 Horus 0.2 G-codes:
   M17        - Włącz silnik
   M18        - Wyłącz silnik  
@@ -419,26 +1124,66 @@ Horus 0.2 G-codes:
 UWAGA: Zawsze wyłącz silnik po użyciu (M18) aby uniknąć przegrzania!
         """
     )
-    parser.add_argument('--port', default='/dev/ttyUSB0', help='Port szeregowy')
+    parser.add_argument('--port', default='/dev/ttyUSB0',
+                        help='Port szeregowy ("auto" = wyszukaj talerz na wszystkich portach)')
     parser.add_argument('--baudrate', type=int, default=115200, help='Prędkość transmisji')
     parser.add_argument('--command', help='Pojedyncza komenda G-code do wysłania')
     parser.add_argument('--position', type=float, help='Przejście do podanej pozycji (stopnie)')
     parser.add_argument('--speed', type=int, default=200, help='Prędkość obrotu (stopnie/s)')
+    parser.add_argument('--modulo', choices=[mode for mode in TARGET_MODES if mode != 'absolute'],
+                        help='--position jako kąt modulo 360° (shortest = najkrótszą drogą)')
+    parser.add_argument('--no-rezero', action='store_true',
+                        help='Nie zeruj firmware (G50) po zatrzymaniu na wielokrotności 360°')
+    parser.add_argument('--wait', action='store_true',
+                        help='Po --position/--file czekaj, aż talerz się zatrzyma')
+    parser.add_argument('--file', help='Plik G-code do strumieniowania')
     parser.add_argument('--interactive', action='store_true', help='Tryb interaktywny')
+    parser.add_argument('--reconnect', action='store_true',
+                        help='Po utracie połączenia łącz ponownie, odtwórz stan i wznów pracę')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Otwórz port bezpośrednio, nawet gdy działa demon')
     
     args = parser.parse_args()
     
+    # Demon trzyma port otwarty - jednorazowe komendy idą przez jego gniazdo
+    one_shot = args.position is not None or args.command or args.file
+    if one_shot and not args.interactive and not args.no_daemon and args.port != 'auto':
+        client = connect_daemon(args.port)
+        if client is not None:
+            sys.exit(run_via_daemon(client, args))
+    
+    if args.port == 'auto':
+        print("🔍 Szukam talerza na wszystkich portach...")
+        found = [identity for identity in discover(baudrate=args.baudrate, cache=DiscoveryCache())
+                 if identity.is_horus]
+        if not found:
+            print("❌ Nie znaleziono talerza Horus")
+            sys.exit(1)
+        print(f"🎯 {describe(found[0])}")
+        args.port = found[0].port
+    
     # Inicjalizuj kontroler
-    controller = MakerBotDigitizerController(args.port, args.baudrate)
+    controller = MakerBotDigitizerController(args.port, args.baudrate, args.reconnect)
+    controller.auto_rezero = not args.no_rezero
     
     if not controller.connect():
         sys.exit(1)
+    if args.reconnect:
+        controller.watch_ports()
     
     try:
         if args.position is not None:
-            controller.rotate_to_position(args.position, args.speed)
+            if args.wait:
+                controller.move_and_wait(args.position, args.speed, mode=args.modulo)
+            else:
+                controller.rotate_to_position(args.position, args.speed, args.modulo)
         elif args.command:
             controller.send_gcode(args.command)
+        elif args.file:
+            if not controller.stream_file(args.file):
+                sys.exit(1)
+            if args.wait:
+                controller.wait_until_idle(timeout=controller.response_timeout * 60)
         elif args.interactive:
             print("🚀 Tryb interaktywny - MakerBot Digitizer (Horus 0.2)")
             print("="*50)
@@ -449,6 +1194,8 @@ UWAGA: Zawsze wyłącz silnik po użyciu (M18) aby uniknąć przegrzania!
             print("💡 Wpisz 'help' aby zobaczyć wszystkie dostępne komendy")
             print("🚪 Wpisz 'exit' aby zakończyć")
             print("="*50 + "\n")
+            controller.watch_ports()
+            spin = None  # Trwający obrót ciągły
             
             while True:
                 try:
@@ -486,18 +1233,63 @@ UWAGA: Zawsze wyłącz silnik po użyciu (M18) aby uniknąć przegrzania!
                             print("   Przykład: speed 200")
                     elif cmd.lower().startswith('abs_pos '):
                         try:
-                            pos = float(cmd.split()[1])
-                            controller.rotate_to_absolute_position(pos)
+                            parts = cmd.lower().split()
+                            pos = float(parts[1])
+                            mode = parts[2] if len(parts) > 2 else None
+                            controller.rotate_to_absolute_position(pos, mode)
                         except (ValueError, IndexError):
-                            print("❌ Błąd: Użycie -> abs_pos <pozycja_w_stopniach>")
-                            print("   Przykład: abs_pos 90")
+                            print("❌ Błąd: Użycie -> abs_pos <pozycja_w_stopniach> [tryb]")
+                            print("   Przykład: abs_pos 90 shortest")
                     elif cmd.lower().startswith('position '):
                         try:
-                            pos = float(cmd.split()[1])
-                            controller.rotate_to_position(pos)
+                            parts = cmd.lower().split()
+                            pos = float(parts[1])
+                            mode = parts[2] if len(parts) > 2 else None
+                            controller.rotate_to_position(pos, mode=mode)
                         except (ValueError, IndexError):
-                            print("❌ Błąd: Użycie -> position <pozycja_w_stopniach>")
+                            print("❌ Błąd: Użycie -> position <pozycja_w_stopniach> [tryb]")
                             print("   Przykład: position 90")
+                    elif cmd.lower().startswith('move '):
+                        try:
+                            parts = cmd.lower().split()
+                            pos = float(parts[1])
+                            mode = parts[2] if len(parts) > 2 else None
+                            controller.move_and_wait(pos, mode=mode)
+                        except (ValueError, IndexError):
+                            print("❌ Błąd: Użycie -> move <pozycja_w_stopniach> [tryb]")
+                            print("   Przykład: move 90")
+                    elif cmd.lower() == 'modulo' or cmd.lower().startswith('modulo '):
+                        parts = cmd.lower().split()
+                        mode = parts[1] if len(parts) > 1 else controller.target_mode
+                        mode = 'absolute' if mode == 'off' else mode
+                        if mode in TARGET_MODES:
+                            controller.target_mode = mode
+                            print(f"🧭 Cel ruchów absolutnych: {TARGET_MODES[mode]} ({mode})")
+                        else:
+                            print("❌ Błąd: Użycie -> modulo [shortest|positive|negative|off]")
+                    elif cmd.lower() == 'wait':
+                        controller.wait_until_idle()
+                    elif cmd.lower().startswith('spin '):
+                        arg = cmd.split()[1].lower()
+                        if spin is not None and spin.is_running:
+                            spin.stop()
+                        spin = None
+                        if arg not in ('stop', '0'):
+                            try:
+                                spin = ContinuousSpin(controller, float(arg))
+                                spin.start()
+                            except ValueError:
+                                print("❌ Błąd: Użycie -> spin <stopnie_na_sekundę> | spin stop")
+                                print("   Przykład: spin 30")
+                    elif cmd.lower().startswith('scan '):
+                        try:
+                            parts = cmd.split()
+                            stops = int(parts[1])
+                            arc = float(parts[2]) if len(parts) > 2 else 360.0
+                            ScanSequence(controller, stops, arc).run()
+                        except (ValueError, IndexError):
+                            print("❌ Błąd: Użycie -> scan <postoje> [łuk_w_stopniach]")
+                            print("   Przykład: scan 36 360")
                     elif cmd.lower() == 'stop':
                         controller.stop_turntable()
                     elif cmd.lower() == 'status':
@@ -512,6 +1304,22 @@ UWAGA: Zawsze wyłącz silnik po użyciu (M18) aby uniknąć przegrzania!
                         controller.get_build_info()
                     elif cmd.lower() == 'parser':
                         controller.get_parser_state()
+                    elif cmd.lower().startswith('poll '):
+                        try:
+                            rate = float(cmd.split()[1])
+                            if rate > 0:
+                                controller.start_status_polling(rate)
+                            else:
+                                controller.stop_status_polling()
+                        except (ValueError, IndexError):
+                            print("❌ Błąd: Użycie -> poll <razy_na_sekundę>")
+                            print("   Przykład: poll 10")
+                    elif cmd.lower() == 'telemetry':
+                        controller.show_telemetry()
+                    elif cmd.lower() == 'angle':
+                        controller.show_angle()
+                    elif cmd.lower() == 'hold':
+                        controller.feed_hold()
                     elif cmd.lower() == 'start':
                         controller.cycle_start()
                     elif cmd.lower().startswith('monitor '):
@@ -521,9 +1329,14 @@ UWAGA: Zawsze wyłącz silnik po użyciu (M18) aby uniknąć przegrzania!
                         except (ValueError, IndexError):
                             print("❌ Błąd: Użycie -> monitor <sekundy>")
                             print("   Przykład: monitor 5")
+                    elif cmd.lower().startswith('stream '):
+                        path = cmd.split(maxsplit=1)[1]
+                        controller.stream_file(os.path.expanduser(path))
                     elif cmd.lower() == 'flush':
                         controller.flush_input()
                         print("✅ Bufor opróżniony")
+                    elif cmd.lower() == 'reconnect':
+                        controller.ensure_connected(force=True)
                     elif cmd.strip() == '':
                         continue  # Pusta linia - nic nie rób
                     elif cmd:
@@ -540,6 +1353,8 @@ UWAGA: Zawsze wyłącz silnik po użyciu (M18) aby uniknąć przegrzania!
                 except Exception as e:
                     print(f"❌ Błąd: {e}")
                     print("💡 Wpisz 'help' aby zobaczyć poprawne komendy")
+            if spin is not None and spin.is_running:
+                spin.stop(wait=False)
         else:
             print("❓ Brak komendy. Użyj --help aby zobaczyć opcje.")
     
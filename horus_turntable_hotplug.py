@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Śledzenie podłączania i odłączania portów szeregowych
+
+Na Linuksie PortWatcher czeka na zdarzenia inotify katalogu /dev
+(utworzenie / usunięcie ttyUSB*, ttyACM*, ...), więc odłączenie kabla
+jest widoczne w milisekundy i bez odpytywania. Na innych systemach (albo
+gdy inotify jest niedostępne) lista portów jest porównywana co
+POLL_INTERVAL sekund.
+
+Dla każdego portu zapamiętywany jest klucz USB (VID:PID:numer seryjny) -
+po odłączeniu urządzenia nie da się go już odczytać, a właśnie po nim
+rozpoznajemy talerz podłączony ponownie, nawet pod inną nazwą portu.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import re
+import select
+import struct
+import threading
+
+import serial.tools.list_ports
+
+from horus_turntable_discovery import port_key
+
+# Odstęp porównywania listy portów bez inotify (sekundy)
+POLL_INTERVAL = 1.0
+
+# Nazwy w /dev odpowiadające portom, które mogą być podłączane w trakcie pracy
+HOTPLUG_NAME_RE = re.compile(r"^(ttyUSB|ttyACM|ttyAMA|rfcomm)\d+$")
+
+# Stałe inotify (linux/inotify.h)
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def _load_inotify():
+    """Funkcje inotify z libc albo None (inny system niż Linux)"""
+    if not hasattr(os, 'pipe') or not os.path.isdir('/dev'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def list_ports():
+    """Aktualne porty: nazwa -> klucz USB (lub None)"""
+    return {info.device: port_key(info) for info in serial.tools.list_ports.comports()}
+
+
+class PortWatcher:
+    """
+    Wątek zgłaszający pojawienie się i zniknięcie portów
+
+    Callbacki on_added(port, klucz) i on_removed(port, klucz) są wołane
+    w wątku obserwatora - GUI powinno przekazać je dalej przez root.after.
+    """
+
+    def __init__(self, on_added=None, on_removed=None, poll_interval=POLL_INTERVAL,
+                 use_inotify=True, directory='/dev'):
+        """
+        Args:
+            on_added: Funkcja (port, klucz) po podłączeniu portu
+            on_removed: Funkcja (port, klucz) po odłączeniu portu
+            poll_interval: Odstęp porównywania listy bez inotify (sekundy)
+            use_inotify: False wymusza porównywanie listy
+            directory: Obserwowany katalog urządzeń
+        """
+        self.on_added = on_added
+        self.on_removed = on_removed
+        self.poll_interval = poll_interval
+        self.directory = directory
+        self.ports = {}
+        self._libc = _load_inotify() if use_inotify else None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake_r = self._wake_w = None
+        self._thread = None
+
+    @property
+    def backend(self):
+        """'inotify' albo 'poll'"""
+        return 'inotify' if self._libc is not None else 'poll'
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def key_of(self, port):
+        """Klucz USB portu zapamiętany przy jego pojawieniu się"""
+        with self._lock:
+            return self.ports.get(port)
+
+    def find(self, key):
+        """Port, pod którym jest teraz urządzenie o danym kluczu (lub None)"""
+        if key is None:
+            return None
+        with self._lock:
+            for port, port_key_ in self.ports.items():
+                if port_key_ == key:
+                    return port
+        return None
+
+    def start(self):
+        """Wczytuje bieżącą listę portów i uruchamia wątek obserwatora"""
+        if self.is_running:
+            return
+        with self._lock:
+            self.ports = list_ports()
+        self._stop.clear()
+        fd = None
+        if self._libc is not None:
+            fd = self._open_inotify()
+            if fd is None:
+                self._libc = None  # Brak uprawnień / limitu - porównujemy listę
+        if fd is not None:
+            self._wake_r, self._wake_w = os.pipe()
+            target, args = self._inotify_loop, (fd,)
+        else:
+            target, args = self._poll_loop, ()
+        self._thread = threading.Thread(target=target, args=args, daemon=True,
+                                        name="horus-port-watcher")
+        self._thread.start()
+
+    def stop(self):
+        """Zatrzymuje wątek obserwatora"""
+        self._stop.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b'x')
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._wake_r = self._wake_w = None
+
+    def _open_inotify(self):
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+        if self._libc.inotify_add_watch(fd, self.directory.encode(), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _added(self, port, current=None):
+        # Klucz odczytujemy teraz - po odłączeniu sysfs już go nie poda
+        key = (current if current is not None else list_ports()).get(port)
+        with self._lock:
+            if port in self.ports:
+                return
+            self.ports[port] = key
+        if self.on_added:
+            self.on_added(port, key)
+
+    def _removed(self, port):
+        with self._lock:
+            if port not in self.ports:
+                return
+            key = self.ports.pop(port)
+        if self.on_removed:
+            self.on_removed(port, key)
+
+    def _inotify_loop(self, fd):
+        """Pętla wątku - blokuje się na poll() deskryptora inotify"""
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        poller.register(self._wake_r, select.POLLIN)
+        try:
+            while not self._stop.is_set():
+                poller.poll()
+                if self._stop.is_set():
+                    break
+                try:
+                    data = os.read(fd, 4096)
+                except OSError as e:
+                    if e.errno == errno.EAGAIN:
+                        continue
+                    break
+                offset = 0
+                while offset + EVENT_HEADER.size <= len(data):
+                    _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                    offset += EVENT_HEADER.size
+                    name = data[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+                    offset += length
+                    if not HOTPLUG_NAME_RE.match(name):
+                        continue
+                    port = os.path.join(self.directory, name)
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._added(port)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        self._removed(port)
+        finally:
+            os.close(fd)
+
+    def _poll_loop(self):
+        """Pętla wątku - porównuje listę portów co poll_interval"""
+        while not self._stop.wait(self.poll_interval):
+            current = list_ports()
+            with self._lock:
+                known = dict(self.ports)
+            for port in known.keys() - current.keys():
+                self._removed(port)
+            for port in current.keys() - known.keys():
+                self._added(port, current)
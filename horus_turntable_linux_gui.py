@@ -1,14 +1,30 @@
 #!/usr/bin/env python3
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import serial
+from tkinter import ttk, messagebox
 import time
-import threading
 import sys
 import os
+import queue
 from datetime import datetime
 
+from horus_turntable_serial import (FEED_HOLD, LINE_LOST, LINE_UNSOLICITED, REALTIME_COMMANDS,
+                                    SOFT_RESET, STATUS_QUERY, reply_ok)
+from horus_turntable_motion import (TARGET_MODES, feed_from_gcode, move_command, move_duration,
+                                    is_full_turn, move_timeout, resolve_target, shift_position,
+                                    wrap_offset)
+from horus_turntable_status import poll_until_idle
+from horus_turntable_log import CommLog, LogView
+from horus_turntable_hotplug import PortWatcher
+from horus_turntable_discovery import DiscoveryCache, candidate_ports, describe, discover
+from horus_turntable_worker import SerialWorker
+
+# Maksymalne oczekiwanie na potwierdzenie komendy (sekundy)
+RESPONSE_TIMEOUT = 5.0
+
+# Co ile milisekund kolejka logu jest przepisywana do okna (~20 klatek/s)
+LOG_FLUSH_INTERVAL_MS = 50
+
 class HorusGUI:
     def __init__(self, root):
         self.root = root
@@ -18,9 +34,30 @@ class HorusGUI:
         # Kontroler urządzenia
         self.controller = None
         self.ser = None
+        self.link = None
         self.is_connected = False
+        self.closing = False
+        
+        # Linie logu z dowolnego wątku; do okna trafiają paczkami co LOG_FLUSH_INTERVAL_MS
+        self.log_queue = queue.SimpleQueue()
+        # Ograniczony magazyn logu - starsze linie w pliku tymczasowym, indeksy do wyszukiwania
+        self.log_store = CommLog()
+        
+        # Wątek portu - jedyny właściciel połączenia; wyniki wracają przez root.after
+        self.worker = SerialWorker(self.post, self.log_message, RESPONSE_TIMEOUT)
+        self.worker.start()
         self.monitoring = False
-        self.monitor_thread = None
+        
+        # Tożsamość znalezionych talerzy według USB VID/PID/numeru seryjnego
+        self.discovery_cache = DiscoveryCache()
+        
+        # Podłączanie/odłączanie portów; zdarzenia wracają do wątku Tk przez post
+        self.port_watcher = PortWatcher(
+            lambda port, key: self.post(self.on_port_added, port, key),
+            lambda port, key: self.post(self.on_port_removed, port, key))
+        self.connected_port = None
+        self.device_key = None  # Klucz USB połączonego talerza (VID:PID:serial)
+        self.lost_device = None  # (port, klucz) talerza odłączonego w trakcie pracy
         
         # Zmienne GUI
         self.port_var = tk.StringVar(value="/dev/ttyUSB0")
@@ -30,6 +67,7 @@ class HorusGUI:
         self.command_var = tk.StringVar()
         self.auto_disable_var = tk.StringVar(value="0")
         self.rotations_var = tk.StringVar(value="1")
+        self.target_mode_var = tk.StringVar(value=TARGET_MODES['absolute'])
         
         # Timer dla automatycznego wyłączania silnika
         self.disable_timer = None
@@ -37,7 +75,25 @@ class HorusGUI:
         # Śledź aktualną pozycję dla obrotów wielokrotnych
         self.current_position = 0.0
         
+        # Pozycja w GUI minus pozycja firmware - przenumerowanie o wielokrotność 360°
+        self.position_offset = 0.0
+        
+        # Modalne F w firmware (°/s); None = nieznane
+        self.feed_rate = None
+        
+        # Zwiększany przy zatrzymaniu/resecie - unieważnia czekanie na koniec ruchów
+        self.motion_epoch = 0
+        
+        # Ruchy z GUI, których koniec jeszcze nie nastąpił (w bieżącej epoce)
+        self.moves_pending = 0
+        
+        # G50 po zatrzymaniu na wielokrotności 360° - pozycje nie rosną bez końca
+        self.auto_rezero = True
+        
         self.setup_gui()
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self.log_pump)
+        self.refresh_ports()
+        self.port_watcher.start()
         
     def setup_gui(self):
         """Tworzy interfejs graficzny"""
@@ -55,17 +111,20 @@ class HorusGUI:
         conn_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
         ttk.Label(conn_frame, text="Port:").grid(row=0, column=0, sticky=tk.W)
-        port_combo = ttk.Combobox(conn_frame, textvariable=self.port_var, 
-                                 values=["/dev/ttyUSB0", "/dev/ttyACM0", "/dev/ttyUSB1", "COM1", "COM2", "COM3"])
-        port_combo.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(5, 10))
+        self.port_combo = ttk.Combobox(conn_frame, textvariable=self.port_var, 
+                                       values=["/dev/ttyUSB0", "/dev/ttyACM0", "/dev/ttyUSB1"])
+        self.port_combo.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(5, 5))
+        
+        self.discover_btn = ttk.Button(conn_frame, text="🔍", width=3, command=self.discover_devices)
+        self.discover_btn.grid(row=0, column=2, padx=(0, 10))
         
-        ttk.Label(conn_frame, text="Baudrate:").grid(row=0, column=2, sticky=tk.W)
+        ttk.Label(conn_frame, text="Baudrate:").grid(row=0, column=3, sticky=tk.W)
         baudrate_combo = ttk.Combobox(conn_frame, textvariable=self.baudrate_var,
                                      values=["9600", "19200", "38400", "57600", "115200"])
-        baudrate_combo.grid(row=0, column=3, sticky=(tk.W, tk.E), padx=(5, 10))
+        baudrate_combo.grid(row=0, column=4, sticky=(tk.W, tk.E), padx=(5, 10))
         
         self.connect_btn = ttk.Button(conn_frame, text="Połącz", command=self.toggle_connection)
-        self.connect_btn.grid(row=0, column=4, padx=(5, 0))
+        self.connect_btn.grid(row=0, column=5, padx=(5, 0))
         
         # Sekcja kontroli silnika
         motor_frame = ttk.LabelFrame(main_frame, text="Kontrola silnika", padding="5")
@@ -125,6 +184,12 @@ class HorusGUI:
             ttk.Button(quick_frame, text=f"{pos}°", width=6,
                       command=lambda p=pos: self.quick_position(p)).grid(row=i//5, column=i%5, padx=2, pady=2)
         
+        # Wybór celu - po wielu obrotach kąt modulo 360° zamiast odwijania obrotów
+        ttk.Label(pos_frame, text="Cel pozycji:").grid(row=5, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Combobox(pos_frame, textvariable=self.target_mode_var, values=list(TARGET_MODES.values()),
+                     state="readonly", width=16).grid(row=5, column=1, columnspan=2, sticky=tk.W,
+                                                      padx=(5, 10), pady=(5, 0))
+        
         # Sekcja komend bezpośrednich
         cmd_frame = ttk.LabelFrame(main_frame, text="Komendy bezpośrednie", padding="5")
         cmd_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -161,9 +226,9 @@ class HorusGUI:
         ttk.Button(monitor_btn_frame, text="Wyczyść", command=self.clear_log).grid(row=0, column=1, padx=5)
         ttk.Button(monitor_btn_frame, text="Zapisz log", command=self.save_log).grid(row=0, column=2, padx=(5, 0))
         
-        # Obszar tekstowy dla logów
-        self.log_text = scrolledtext.ScrolledText(monitor_frame, height=15, width=70)
-        self.log_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        # Widok logu - renderuje tylko widoczne linie, z filtrami i wyszukiwaniem
+        self.log_view = LogView(monitor_frame, self.log_store, height=15, width=70)
+        self.log_view.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Pasek statusu
         self.status_var = tk.StringVar(value="Gotowy")
@@ -178,18 +243,96 @@ class HorusGUI:
         self.log_message("💡 Wybierz port i naciśnij 'Połącz' aby rozpocząć")
         
     def log_message(self, message):
-        """Dodaje wiadomość do logu z timestampem"""
+        """Dodaje wiadomość do logu z timestampem (bezpieczne z dowolnego wątku)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        full_message = f"[{timestamp}] {message}\n"
-        self.log_text.insert(tk.END, full_message)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self.log_queue.put(f"[{timestamp}] {message}")
+        
+    def flush_log_queue(self):
+        """Przepisuje zaległe linie do magazynu i odświeża widok raz na paczkę (wątek Tk)"""
+        first = len(self.log_store)
+        try:
+            while True:
+                self.log_store.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if len(self.log_store) > first:
+            self.log_view.on_append(first, len(self.log_store))
+        
+    def log_pump(self):
+        """Cykliczne opróżnianie kolejki logu - jedno przerysowanie na paczkę"""
+        if self.closing:
+            return
+        self.flush_log_queue()
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self.log_pump)
         
     def update_status(self, message):
         """Aktualizuje pasek statusu"""
         self.status_var.set(message)
         self.root.update_idletasks()
         
+    def post(self, callback, *args):
+        """Przekazuje wywołanie do wątku Tk (bezpieczne z innych wątków)"""
+        if self.closing:
+            return
+        try:
+            self.root.after(0, callback, *args)
+        except (RuntimeError, tk.TclError):
+            pass  # Okno już zamknięte
+        
+    def refresh_ports(self):
+        """Wypełnia listę portami widocznymi w systemie (bez ich otwierania)"""
+        try:
+            ports = [info.device for info in candidate_ports()]
+        except Exception as e:
+            self.log_message(f"❌ Błąd odświeżania portów: {e}")
+            return
+        if ports:
+            self.port_combo['values'] = ports
+            if not self.is_connected and self.port_var.get() not in ports:
+                self.port_var.set(ports[0])
+                
+    def discover_devices(self):
+        """Sonduje wszystkie porty równolegle i wybiera znaleziony talerz"""
+        try:
+            baudrate = int(self.baudrate_var.get())
+        except ValueError:
+            messagebox.showerror("Błąd", "Nieprawidłowa prędkość transmisji!")
+            return
+        self.log_message("🔍 Szukam talerzy na wszystkich portach...")
+        self.discover_btn.config(state=tk.DISABLED)
+        # Portów otwartych przez GUI nie otwieramy drugi raz (pole portu mogło się zmienić)
+        exclude = self.open_ports()
+        self.worker.urgent(discover, None, baudrate, cache=self.discovery_cache, exclude=exclude,
+                           on_done=self.on_discovered, on_error=self.on_discover_error)
+        
+    def open_ports(self):
+        """Porty otwarte przez GUI - połączony i ten, który właśnie otwiera wątek portu"""
+        ports = {self.connected_port} if self.is_connected else set()
+        ser = self.worker.ser
+        if ser is not None and ser.is_open:
+            ports.add(ser.port)
+        return tuple(port for port in ports if port)
+        
+    def on_discovered(self, found):
+        """Wynik wyszukiwania (wątek Tk)"""
+        self.discover_btn.config(state=tk.NORMAL)
+        if not found:
+            self.log_message("❌ Nie znaleziono urządzeń GRBL")
+            return
+        for identity in found:
+            self.log_message(f"{'🎯' if identity.is_horus else '🔌'} {describe(identity)}")
+        ports = [identity.port for identity in found]
+        others = [port for port in self.port_combo['values'] if port not in ports]
+        self.port_combo['values'] = ports + others
+        horus = [identity for identity in found if identity.is_horus]
+        if horus and not self.is_connected:
+            self.port_var.set(horus[0].port)
+            
+    def on_discover_error(self, error):
+        """Błąd wyszukiwania (wątek Tk)"""
+        self.discover_btn.config(state=tk.NORMAL)
+        self.log_message(f"❌ Błąd wyszukiwania: {error}")
+        
     def toggle_connection(self):
         """Przełącza połączenie z urządzeniem"""
         if not self.is_connected:
@@ -198,85 +341,199 @@ class HorusGUI:
             self.disconnect_device()
             
     def connect_device(self):
-        """Nawiązuje połączenie z urządzeniem"""
+        """Nawiązuje połączenie z urządzeniem (port otwiera wątek portu)"""
+        port = self.port_var.get()
         try:
-            self.ser = serial.Serial(
-                port=self.port_var.get(),
-                baudrate=int(self.baudrate_var.get()),
-                bytesize=serial.EIGHTBITS,
-                parity=serial.PARITY_NONE,
-                stopbits=serial.STOPBITS_ONE,
-                timeout=1
-            )
-            time.sleep(2)  # Czas na inicjalizację
-            
-            self.is_connected = True
-            self.connect_btn.config(text="Rozłącz")
-            self.log_message(f"✅ Połączono z {self.port_var.get()} na {self.baudrate_var.get()} baud")
-            self.update_status("Połączono")
-            
-        except serial.SerialException as e:
-            messagebox.showerror("Błąd połączenia", f"Nie można połączyć z urządzeniem:\n{e}")
-            self.log_message(f"❌ Błąd połączenia: {e}")
-            self.update_status("Błąd połączenia")
+            baudrate = int(self.baudrate_var.get())
+        except ValueError:
+            messagebox.showerror("Błąd", "Nieprawidłowa wartość baudrate!")
+            return
+        
+        self.connect_btn.config(state=tk.DISABLED)
+        self.log_message(f"🔌 Łączę z {port}...")
+        self.update_status("Łączenie...")
+        self.worker.connect(port, baudrate,
+                            on_done=lambda result: self.on_connected(port, *result),
+                            on_error=self.on_connect_error)
+        
+    def on_connected(self, port, ready, banner):
+        """Wywoływane w wątku Tk po otwarciu portu"""
+        self.ser = self.worker.ser
+        self.link = self.worker.link
+        self.feed_rate = None  # Otwarcie portu resetuje firmware
+        self.connected_port = port
+        self.device_key = self.port_watcher.key_of(port)
+        self.lost_device = None
+        # Utrata portu zgłaszana od razu, a nie przy następnej komendzie
+        self.link.subscribe(lambda error, timestamp, source: self.post(self.on_link_lost, error),
+                            LINE_LOST)
+        if not ready:
+            self.log_message("⚠️ Urządzenie nie odpowiada (brak banera i statusu)")
+        elif banner:
+            self.log_message(f"🤖 Firmware: {banner}")
+        
+        self.is_connected = True
+        self.connect_btn.config(text="Rozłącz", state=tk.NORMAL)
+        self.log_message(f"✅ Połączono z {port} na {self.baudrate_var.get()} baud")
+        self.update_status("Połączono")
+        
+    def on_port_added(self, port, key):
+        """Nowy port w systemie (wątek Tk)"""
+        values = list(self.port_combo['values'])
+        if port not in [entry.split(' - ')[0] for entry in values]:
+            self.port_combo['values'] = values + [port]
+        if self.lost_device is None or self.is_connected:
+            return
+        lost_port, lost_key = self.lost_device
+        if (key is not None and key == lost_key) or (lost_key is None and port == lost_port):
+            self.lost_device = None
+            self.log_message(f"🔌 Talerz ponownie podłączony na {port}")
+            if messagebox.askyesno("Ponowne podłączenie",
+                                   f"Talerz wrócił na porcie {port}.\nPołączyć ponownie?"):
+                self.port_var.set(port)
+                self.connect_device()
+                
+    def on_port_removed(self, port, key):
+        """Port zniknął z systemu (wątek Tk)"""
+        self.port_combo['values'] = [entry for entry in self.port_combo['values']
+                                     if entry.split(' - ')[0] != port]
+        if self.is_connected and port == self.connected_port:
+            self.on_link_lost(f"port {port} zniknął (odłączony kabel?)")
+            
+    def on_link_lost(self, error):
+        """Utrata połączenia w trakcie pracy (wątek Tk)"""
+        if not self.is_connected:
+            return
+        self.log_message(f"⚠️ Utracono połączenie z {self.connected_port}: {error}")
+        self.lost_device = (self.connected_port, self.device_key)
+        self.motion_epoch += 1
+        self.moves_pending = 0
+        self.disconnect_device()
+        self.update_status("Talerz odłączony - czekam na ponowne podłączenie")
+        
+    def on_connect_error(self, error):
+        """Wywoływane w wątku Tk, gdy nie udało się otworzyć portu"""
+        self.connect_btn.config(state=tk.NORMAL)
+        messagebox.showerror("Błąd połączenia", f"Nie można połączyć z urządzeniem:\n{error}")
+        self.log_message(f"❌ Błąd połączenia: {error}")
+        self.update_status("Błąd połączenia")
             
     def disconnect_device(self):
         """Rozłącza urządzenie"""
         if self.monitoring:
             self.stop_monitoring()
             
-        if self.ser and self.ser.is_open:
-            self.ser.close()
+        # Zaległe komendy są porzucane, port zamyka wątek portu
+        self.worker.disconnect()
+        self.link = None
+        self.ser = None
             
         self.is_connected = False
         self.connect_btn.config(text="Połącz")
         self.log_message("🔌 Rozłączono")
         self.update_status("Rozłączono")
         
-    def send_gcode(self, command):
-        """Wysyła komendę G-code do urządzenia"""
-        if not self.is_connected or not self.ser:
+    def send_gcode(self, command, on_done=None):
+        """Kolejkuje komendę G-code do wysłania przez wątek portu
+        
+        Wraca od razu. on_done(wynik) jest wołane w wątku Tk z listą linii
+        odpowiedzi, True (brak odpowiedzi) lub False przy błędzie.
+        """
+        if not self.is_connected or not self.link:
             messagebox.showwarning("Błąd", "Brak połączenia z urządzeniem!")
             return False
             
-        try:
-            # Opróżnij bufor wejściowy
-            self.ser.flushInput()
+        if command.strip('\r\n') in REALTIME_COMMANDS:
+            return self.send_realtime(command.strip('\r\n'), on_done)
+        
+        # Następne komendy mogą powstać przed odpowiedzią - F zapisujemy od razu
+        if feed_from_gcode(command) is not None:
+            self.feed_rate = feed_from_gcode(command)
+        # Pozycje X z GUI na współrzędne firmware; G50 zeruje oba liczniki
+        command = shift_position(command, -self.position_offset)
+        if command.split(';', 1)[0].strip().upper() == 'G50':
+            self.position_offset = 0.0
+        self.worker.send(command,
+                         on_done=lambda reply: self.on_reply(command, reply, on_done),
+                         on_error=lambda error: self.on_send_error(command, error, on_done))
+        return True
+        
+    def on_reply(self, command, reply, on_done=None):
+        """Obsługuje odpowiedź komendy (wątek Tk)"""
+        # Linie odpowiedzi loguje subskrybent łącza w SerialWorker
+        responses, complete = reply
+        if not complete:
+            self.log_message(f"⚠️ Brak potwierdzenia w ciągu {RESPONSE_TIMEOUT} s")
+        if feed_from_gcode(command) is not None:
+            if not (complete and responses[-1].lower() == 'ok'):
+                self.feed_rate = None
+        if on_done:
+            on_done(responses if responses else True)
+            
+    def on_send_error(self, command, error, on_done=None):
+        """Obsługuje błąd wysyłania zgłoszony przez wątek portu (wątek Tk)"""
+        if feed_from_gcode(command) is not None:
+            self.feed_rate = None
+        self.log_message(f"❌ Błąd wysyłania: {error}")
+        messagebox.showerror("Błąd", f"Błąd wysyłania komendy:\n{error}")
+        if on_done:
+            on_done(False)
+            
+    def send_realtime(self, command, on_done=None):
+        """Wysyła komendę czasu rzeczywistego (?, !, ~, Ctrl-X) z pominięciem kolejki
+        
+        '!' i '~' trafiają na port od razu z wątku Tk. Na raport statusu
+        i baner po resecie czeka wątek pomocniczy - wynik dostaje on_done.
+        """
+        if not self.is_connected or not self.link:
+            messagebox.showwarning("Błąd", "Brak połączenia z urządzeniem!")
+            return False
             
-            # Dodaj znak końca linii jeśli nie ma
-            if not command.endswith('\n'):
-                command += '\n'
-                
-            # Wyślij komendę
-            self.ser.write(command.encode('utf-8'))
-            self.log_message(f"📡 Wysłano: {command.strip()}")
-            
-            # Czekaj na odpowiedź
-            time.sleep(0.2)
-            responses = []
-            
-            start_time = time.time()
-            while time.time() - start_time < 1.0:
-                if self.ser.in_waiting > 0:
-                    try:
-                        line = self.ser.readline().decode('utf-8').strip()
-                        if line:
-                            responses.append(line)
-                            self.log_message(f"📨 Odpowiedź: {line}")
-                    except UnicodeDecodeError:
-                        continue
-                else:
-                    time.sleep(0.05)
-                    if self.ser.in_waiting == 0:
-                        break
-                        
-            return responses if responses else True
+        try:
+            if command == STATUS_QUERY:
+                self.worker.urgent(self.link.request_status,
+                                   on_done=lambda status: self.on_status_reply(status, on_done),
+                                   on_error=lambda error: self.on_send_error(command, error, on_done))
+                return True
+            if command == SOFT_RESET:
+                # Firmware czyści bufor RX - porzucamy też naszą kolejkę
+                self.worker.cancel_pending()
+                self.motion_epoch += 1
+                self.moves_pending = 0
+                self.feed_rate = None  # Reset przywraca domyślne F
+                self.worker.urgent(self.link.soft_reset,
+                                   on_done=lambda ok: self.on_reset_reply(ok, on_done),
+                                   on_error=lambda error: self.on_send_error(command, error, on_done))
+                return True
+            latency = self.link.realtime(command)
+            self.log_message(f"⚡ Wysłano {command} w {latency * 1000:.3f} ms")
+            if on_done:
+                on_done(True)
+            return True
             
         except Exception as e:
             self.log_message(f"❌ Błąd wysyłania: {e}")
             messagebox.showerror("Błąd", f"Błąd wysyłania komendy:\n{e}")
             return False
             
+    def on_status_reply(self, status, on_done=None):
+        """Loguje raport statusu (wątek Tk)"""
+        if status is None:
+            self.log_message("⚠️ Brak raportu statusu")
+        else:
+            self.log_message(f"📨 Odpowiedź: {status}")
+        if on_done:
+            on_done([status] if status else False)
+            
+    def on_reset_reply(self, ok, on_done=None):
+        """Loguje wynik soft resetu (wątek Tk)"""
+        if not ok:
+            self.log_message("⚠️ Brak banera po soft resecie")
+        elif self.link:
+            self.log_message(f"📨 Odpowiedź: {self.link.banner}")
+        if on_done:
+            on_done([self.link.banner] if ok and self.link else False)
+            
     def enable_motor(self):
         """Włącza silnik"""
         self.log_message("⚡ Włączam silnik...")
@@ -325,8 +582,8 @@ class HorusGUI:
     def home_turntable(self):
         """Przechodzi do pozycji domowej"""
         self.log_message("🏠 Przechodzę do pozycji domowej...")
+        # Komendy czekają na 'ok' - dodatkowa pauza nie jest potrzebna
         self.enable_motor()
-        time.sleep(0.1)
         self.reset_position()
         
     def set_speed(self):
@@ -341,18 +598,25 @@ class HorusGUI:
     def go_to_position(self):
         """Idzie do określonej pozycji"""
         try:
-            position = float(self.position_var.get())
+            angle = float(self.position_var.get())
             speed = float(self.speed_var.get())
-            
-            self.log_message(f"🔄 Ustawiam prędkość {speed}°/s i przechodzę do pozycji {position}°")
-            self.send_gcode(f"G1 F{speed}")
-            time.sleep(0.1)
-            result = self.send_gcode(f"G1 X{position}")
-            
-            # Aktualizuj śledzoną pozycję
-            self.current_position = position
-            
-            return result
+            mode = self.target_mode()
+            position = resolve_target(angle, self.current_position, mode)
+            
+            self.log_message(f"🔄 Ustawiam prędkość {speed}°/s i przechodzę do pozycji {angle}°")
+            if position != angle:
+                self.log_message(f"🧭 {angle}° → cel {position}° ({TARGET_MODES[mode]})")
+            # Jedna linia G1 F.. X..; F pomijamy, gdy firmware już je ma
+            distance = position - self.current_position
+            
+            def accepted():
+                # Śledzona pozycja zmienia się dopiero po 'ok' firmware
+                self.current_position = position
+                if mode != 'absolute':
+                    self.renormalize_position(angle)
+            
+            return self.send_move(move_command(position, speed, self.feed_rate), distance, speed,
+                                  on_accepted=accepted)
         except ValueError:
             messagebox.showerror("Błąd", "Nieprawidłowa wartość pozycji lub prędkości!")
             
@@ -361,6 +625,24 @@ class HorusGUI:
         self.position_var.set(str(position))
         self.go_to_position()
     
+    def target_mode(self):
+        """Tryb celu (klucz TARGET_MODES) wybrany w polu "Cel pozycji" """
+        label = self.target_mode_var.get()
+        return next((mode for mode, name in TARGET_MODES.items() if name == label), 'absolute')
+    
+    def renormalize_position(self, angle):
+        """Przenumerowuje śledzoną pozycję o wielokrotność 360° tak, by była równa kątowi angle
+        
+        Firmware liczy dalej po swojemu - różnicę przejmuje position_offset,
+        o który send_gcode przesuwa pozycje X kolejnych komend.
+        """
+        shift = wrap_offset(self.current_position, angle)
+        if shift:
+            self.log_message(f"🔢 Pozycja przenumerowana: {self.current_position:g}° → "
+                             f"{self.current_position + shift:g}°")
+            self.current_position += shift
+            self.position_offset += shift
+    
     def perform_rotations(self):
         """Wykonuje określoną liczbę pełnych obrotów"""
         try:
@@ -379,15 +661,9 @@ class HorusGUI:
             self.log_message(f"📍 Pozycja: {self.current_position}° → {new_position}°")
             
             # Ustaw prędkość i przejdź do nowej pozycji absolutnej
-            self.send_gcode(f"G1 F{speed}")
-            time.sleep(0.1)
-            result = self.send_gcode(f"G1 X{new_position}")
-            
-            # Aktualizuj śledzoną pozycję
-            self.current_position = new_position
-            self.position_var.set(str(new_position))
-            
-            return result
+            return self.send_move(move_command(new_position, speed, self.feed_rate),
+                                  rotation_degrees, speed,
+                                  on_accepted=lambda: self.track_position(new_position))
             
         except ValueError:
             messagebox.showerror("Błąd", "Nieprawidłowa wartość liczby obrotów!")
@@ -408,25 +684,113 @@ class HorusGUI:
             self.log_message(f"📍 Pozycja: {self.current_position}° → {new_position}°")
             
             # Ustaw prędkość i wykonaj obrót do nowej pozycji absolutnej
-            self.send_gcode(f"G1 F{speed}")
-            time.sleep(0.1)
-            result = self.send_gcode(f"G1 X{new_position}")
-            
-            # Aktualizuj śledzoną pozycję
-            self.current_position = new_position
-            self.position_var.set(str(new_position))
-            
-            return result
+            return self.send_move(move_command(new_position, speed, self.feed_rate),
+                                  rotation_degrees, speed,
+                                  on_accepted=lambda: self.track_position(new_position))
             
         except ValueError:
             messagebox.showerror("Błąd", "Nieprawidłowa wartość liczby obrotów!")
     
+    def send_move(self, command, distance, speed, on_accepted=None):
+        """Kolejkuje ruch G1 i liczy go jako trwający aż do zatrzymania talerza
+        
+        on_accepted() jest wołane w wątku Tk dopiero po 'ok' - ruch odrzucony
+        (error:N, ALARM) lub bez odpowiedzi nie zmienia śledzonej pozycji.
+        """
+        epoch = self.motion_epoch
+        self.moves_pending += 1
+        result = self.send_gcode(command, lambda reply: self.on_move_sent(
+            reply, distance, speed, epoch, on_accepted))
+        if not result:
+            self.moves_pending -= 1
+        return result
+    
+    def on_move_sent(self, reply, distance, speed, epoch=None, on_accepted=None):
+        """Po przyjęciu ruchu przez firmware zaczyna czekać na jego koniec"""
+        if reply_ok(reply):
+            if on_accepted:
+                on_accepted()
+            self.notify_when_idle(distance, speed)
+        elif epoch == self.motion_epoch:
+            self.moves_pending -= 1
+    
+    def track_position(self, position):
+        """Ustawia śledzoną pozycję i pole pozycji (po 'ok' ruchu)"""
+        self.current_position = position
+        self.position_var.set(str(position))
+            
+    def notify_when_idle(self, distance, speed):
+        """Zgłasza w logu koniec ruchu bez blokowania GUI
+        
+        'ok' dla G1 przychodzi, gdy ruch trafi do planera, a nie gdy się skończy.
+        Koniec wykrywa wątek pomocniczy z raportów '?', które nie zajmują
+        kolejki komend firmware.
+        """
+        self.log_message(f"⏱️ Szacowany czas ruchu: {move_duration(distance, speed):.1f} s")
+        started = time.monotonic()
+        epoch = self.motion_epoch
+        self.worker.urgent(poll_until_idle, self.link, move_timeout(distance, speed),
+                           on_done=lambda idle: self._on_motion_done(idle, started, epoch))
+    
+    def _on_motion_done(self, idle, started, epoch):
+        """Wywoływane w wątku Tk po zatrzymaniu talerza"""
+        if epoch != self.motion_epoch:
+            return
+        self.moves_pending -= 1
+        if idle:
+            self.log_message(f"✅ Ruch zakończony ({time.monotonic() - started:.1f} s)")
+            if self.moves_pending == 0:
+                self.rezero_if_wrapped()
+    
+    def rezero_if_wrapped(self):
+        """Zeruje firmware (G50), gdy talerz stoi na niezerowej wielokrotności 360°
+        
+        Obroty wielokrotne zwiększają X bez końca - maleje precyzja float
+        w firmware, a linie G-code się wydłużają. Po pełnych obrotach talerz
+        jest tam, gdzie zero, więc G50 nie przesuwa zera fizycznie, a śledzona
+        pozycja wraca do (-360°, 360°). Tylko bez ruchów w drodze - G50
+        w trakcie ruchu przesunęłoby zero.
+        """
+        firmware_position = self.current_position - self.position_offset
+        if not self.auto_rezero or not is_full_turn(firmware_position):
+            return
+        position = self.current_position + wrap_offset(self.current_position)
+        offset = self.position_offset
+        shown = self.position_var.get()
+        
+        def rezeroed(reply):
+            if not reply_ok(reply):
+                # G50 odrzucone lub bez odpowiedzi - zero firmware bez zmian
+                self.position_offset = offset
+                return
+            self.log_message(f"🔢 Zero firmware przeniesione: {firmware_position:g}° → 0° (pozycja {position:g}°)")
+            # GUI liczy dalej od zredukowanej pozycji
+            if shown == str(self.current_position):
+                self.position_var.set(str(position))
+            self.current_position = position
+            self.position_offset = position
+        
+        self.send_gcode("G50", on_done=rezeroed)
+        
     def emergency_stop(self):
         """Natychmiastowe zatrzymanie"""
         self.log_message("🚨 EMERGENCY STOP!")
-        self.send_gcode("!")  # Feed hold - natychmiastowe zatrzymanie
-        time.sleep(0.1)
-        self.disable_motor()  # Wyłącz silnik dla bezpieczeństwa
+        self.send_realtime(FEED_HOLD)  # Feed hold - trafia na port natychmiast
+        
+        # Kliknięcia czekające w kolejce nie mogą ruszyć talerza po zatrzymaniu
+        self.motion_epoch += 1
+        self.moves_pending = 0
+        dropped = self.worker.cancel_pending()
+        if dropped:
+            self.log_message(f"🗑️ Porzucono {dropped} oczekujących komend")
+        
+        # Wyłącz silnik dla bezpieczeństwa - M18 idzie do firmware bez czekania na 'ok'
+        if self.disable_timer:
+            self.root.after_cancel(self.disable_timer)
+            self.disable_timer = None
+        if self.link and self.link.is_alive:
+            self.log_message("🔌 Wyłączam silnik...")
+            self.worker.urgent(self.link.submit, "M18")
     
     def sync_position(self):
         """Synchronizuje śledzoną pozycję z wartością w polu pozycji"""
@@ -441,7 +805,7 @@ class HorusGUI:
         """Pobiera status urządzenia"""
         self.log_message("📊 Sprawdzam status...")
         self.log_message(f"📍 Śledzona pozycja: {self.current_position}°")
-        return self.send_gcode("?")
+        return self.send_realtime(STATUS_QUERY)
         
     def send_command(self):
         """Wysyła bezpośrednią komendę"""
@@ -470,7 +834,7 @@ class HorusGUI:
     def soft_reset(self):
         """Wykonuje soft reset"""
         self.log_message("🔄 Wykonuję soft reset...")
-        self.send_gcode("\x18")  # Ctrl-X
+        self.send_realtime(SOFT_RESET)
         
     def toggle_monitoring(self):
         """Przełącza monitorowanie"""
@@ -489,42 +853,36 @@ class HorusGUI:
         self.monitor_btn.config(text="Stop Monitor")
         self.log_message("👁️ Rozpoczynam monitorowanie...")
         
-        # Uruchom wątek monitorowania
-        self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
-        self.monitor_thread.start()
+        # Linie bez komendy (baner, ALARM) przekazuje wątek czytający łącza
+        self.link.subscribe(self.monitor_line, LINE_UNSOLICITED)
         
     def stop_monitoring(self):
         """Zatrzymuje monitorowanie"""
         self.monitoring = False
+        if self.link:
+            self.link.unsubscribe(self.monitor_line)
         self.monitor_btn.config(text="Start Monitor")
         self.log_message("⏹️ Zatrzymano monitorowanie")
         
-    def monitor_loop(self):
-        """Pętla monitorowania (uruchamiana w osobnym wątku)"""
-        while self.monitoring and self.is_connected:
-            try:
-                if self.ser and self.ser.in_waiting > 0:
-                    line = self.ser.readline().decode('utf-8').strip()
-                    if line:
-                        self.log_message(f"[Monitor] {line}")
-                time.sleep(0.01)
-            except Exception as e:
-                self.log_message(f"❌ Błąd monitorowania: {e}")
-                break
+    def monitor_line(self, line, timestamp, source):
+        """Subskrybent łącza - wołany w wątku czytającym"""
+        self.log_message(f"[Monitor] {line}")
                 
     def clear_log(self):
         """Czyści log"""
-        self.log_text.delete(1.0, tk.END)
+        self.flush_log_queue()
+        self.log_store.clear()
+        self.log_view.apply_filter()
         self.log_message("🧹 Log wyczyszczony")
         
     def save_log(self):
         """Zapisuje log do pliku"""
         try:
+            self.flush_log_queue()
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"horus_log_{timestamp}.txt"
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(self.log_text.get(1.0, tk.END))
+            self.log_store.export(filename)
                 
             self.log_message(f"💾 Log zapisany jako: {filename}")
             messagebox.showinfo("Sukces", f"Log zapisany jako:\n{filename}")
@@ -541,8 +899,11 @@ class HorusGUI:
         
         if self.monitoring:
             self.stop_monitoring()
-        if self.is_connected:
-            self.disconnect_device()
+        # Po zamknięciu okna wątek portu nie może już wołać root.after
+        self.closing = True
+        self.port_watcher.stop()
+        self.worker.stop()
+        self.log_store.close()
         self.root.destroy()
 
 
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Ograniczony log komunikacji z wyszukiwaniem dla GUI
+
+CommLog trzyma w pamięci tylko najnowsze segmenty linii; starsze są
+dopisywane do pliku tymczasowego i czytane z niego na żądanie. Każda linia
+dostaje kierunek (wysłana / odebrana / komunikat) i typ (ok, error, ALARM,
+status), a dla kierunków, typów i słów linii w pamięci utrzymywane są
+indeksy numerów linii - filtrowanie i wyszukiwanie wśród najnowszych linii
+nie przegląda całego logu. Indeksy są przycinane razem ze zrzutem, więc
+pamięć nie rośnie z długością sesji.
+
+LogView pokazuje log w widżecie Text, który zawiera tylko widoczne wiersze,
+więc przewijanie i dopisywanie nie zwalniają przy setkach tysięcy linii.
+"""
+
+import bisect
+import collections
+import os
+import re
+import tempfile
+import threading
+from array import array
+
+try:
+    import tkinter as tk
+    from tkinter import ttk
+except ImportError:
+    tk = None
+
+# Linie w jednym segmencie (jednostka zrzutu na dysk)
+SEGMENT_SIZE = 1000
+
+# Segmenty trzymane w pamięci (domyślnie 50 000 najnowszych linii)
+MEMORY_SEGMENTS = 50
+
+# Najwięcej różnych słów w indeksie (liczby w raportach statusu potrafią być
+# prawie każda inna); linie ze słowami ponad limit sprawdza porównanie tekstu
+MAX_TOKENS = 100000
+
+# Kierunki
+DIRECTIONS = ('info', 'sent', 'received')
+INFO, SENT, RECEIVED = range(3)
+
+# Typy wiadomości
+KINDS = ('other', 'ok', 'error', 'alarm', 'status')
+OTHER, OK, ERROR, ALARM, STATUS = range(5)
+
+SENT_MARKERS = ("📡 Wysłano:", "⚡ Wysłano")
+RECEIVED_MARKERS = ("📨 Odpowiedź:", "[Monitor]")
+
+TOKEN_RE = re.compile(r"\w+")
+TIMESTAMP_RE = re.compile(r"^\[\d\d:\d\d:\d\d\] ")
+
+
+def classify(text):
+    """
+    Określa kierunek i typ linii logu na podstawie jej treści
+
+    Returns:
+        (kierunek, typ) jako indeksy w DIRECTIONS i KINDS
+    """
+    direction = INFO
+    payload = text
+    for marker in SENT_MARKERS:
+        index = text.find(marker)
+        if index >= 0:
+            direction = SENT
+            payload = text[index + len(marker):]
+            break
+    else:
+        for marker in RECEIVED_MARKERS:
+            index = text.find(marker)
+            if index >= 0:
+                direction = RECEIVED
+                payload = text[index + len(marker):]
+                break
+
+    payload = payload.strip()
+    lowered = payload.lower()
+    if lowered == 'ok':
+        kind = OK
+    elif lowered.startswith('error'):
+        kind = ERROR
+    elif payload.startswith('ALARM'):
+        kind = ALARM
+    elif payload.startswith('<') or payload == '?':
+        kind = STATUS
+    else:
+        kind = OTHER
+    return direction, kind
+
+
+def _intersect(a, b):
+    """Część wspólna dwóch rosnących ciągów numerów linii"""
+    if len(a) > len(b):
+        a, b = b, a
+    members = set(b)
+    return array('I', (i for i in a if i in members))
+
+
+class CommLog:
+    """
+    Magazyn linii logu: ograniczona pamięć, zrzut na dysk, indeksy
+
+    Linie są numerowane od zera w kolejności dopisania. Do pliku trafiają
+    całe segmenty po SEGMENT_SIZE linii, więc numer linii wyznacza segment.
+    Indeksy (kierunki, typy, słowa) obejmują tylko linie w pamięci - przy
+    zrzucie segmentu jego kierunki i typy trafiają do pliku obok tekstu,
+    a wpisy indeksów są usuwane. Zapytania o linie z pliku przeglądają
+    go segment po segmencie.
+    """
+
+    def __init__(self, memory_segments=MEMORY_SEGMENTS, spill_dir=None, max_tokens=MAX_TOKENS):
+        """
+        Args:
+            memory_segments: Liczba segmentów trzymanych w pamięci
+            spill_dir: Katalog pliku zrzutu (domyślnie katalog tymczasowy systemu)
+            max_tokens: Limit różnych słów w indeksie
+        """
+        self.memory_segments = max(1, memory_segments)
+        self.spill_dir = spill_dir
+        self.max_tokens = max_tokens
+        self._lock = threading.RLock()
+        self._spill = None
+        self._reset()
+
+    def _reset(self):
+        self._count = 0
+        self._segments = collections.deque([[]])  # Segmenty w pamięci
+        self._first_segment = 0  # Numer najstarszego segmentu w pamięci
+        self._spill_index = []  # (offset, długość tekstu, długość kierunków i typów) na dysku
+        self._spill_cache = (None, None)
+        # Kierunki i typy linii w pamięci (od self._first_line)
+        self.directions = array('b')
+        self.kinds = array('b')
+        self._by_direction = [array('I') for _ in DIRECTIONS]
+        self._by_kind = [array('I') for _ in KINDS]
+        self._tokens = {}
+        self._vocabulary = []  # Posortowane słowa indeksu - prefiksy przez bisect
+        self._unindexed = array('I')  # Linie ze słowami, które nie zmieściły się w limicie
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def _first_line(self):
+        """Numer najstarszej linii w pamięci"""
+        return self._first_segment * SEGMENT_SIZE
+
+    @property
+    def spilled_lines(self):
+        """Liczba linii przeniesionych do pliku"""
+        return len(self._spill_index) * SEGMENT_SIZE
+
+    def append(self, text):
+        """Dopisuje linię (bez znaku nowej linii) i zwraca jej numer"""
+        text = text.replace('\n', ' ')
+        direction, kind = classify(text)
+        with self._lock:
+            line_id = self._count
+            self._segments[-1].append(text)
+            self._count += 1
+            self.directions.append(direction)
+            self.kinds.append(kind)
+            self._by_direction[direction].append(line_id)
+            self._by_kind[kind].append(line_id)
+            for token in set(TOKEN_RE.findall(TIMESTAMP_RE.sub('', text).lower())):
+                postings = self._tokens.get(token)
+                if postings is None:
+                    if len(self._vocabulary) >= self.max_tokens:
+                        # Słownik pełny - linię znajdzie porównanie tekstu
+                        if not self._unindexed or self._unindexed[-1] != line_id:
+                            self._unindexed.append(line_id)
+                        continue
+                    postings = self._tokens[token] = array('I')
+                    bisect.insort(self._vocabulary, token)
+                postings.append(line_id)
+            if len(self._segments[-1]) >= SEGMENT_SIZE:
+                self._segments.append([])
+                if len(self._segments) > self.memory_segments:
+                    self._spill_oldest()
+            return line_id
+
+    def _spill_oldest(self):
+        """Przenosi najstarszy segment z pamięci do pliku razem z jego kierunkami i typami"""
+        if self._spill is None:
+            self._spill = tempfile.NamedTemporaryFile(
+                prefix='horus_log_', suffix='.txt', dir=self.spill_dir, delete=False)
+        lines = self._segments.popleft()
+        data = ("\n".join(lines) + "\n").encode('utf-8')
+        meta = self.directions[:len(lines)].tobytes() + self.kinds[:len(lines)].tobytes()
+        self._spill.seek(0, os.SEEK_END)
+        self._spill_index.append((self._spill.tell(), len(data), len(meta)))
+        self._spill.write(data + meta)
+        self._spill.flush()
+        self._first_segment += 1
+        self._trim_indexes(len(lines))
+
+    def _trim_indexes(self, count):
+        """Usuwa z indeksów wpisy linii przeniesionych do pliku"""
+        cutoff = self._first_line
+        del self.directions[:count]
+        del self.kinds[:count]
+        for postings in self._by_direction + self._by_kind + [self._unindexed]:
+            del postings[:bisect.bisect_left(postings, cutoff)]
+        stale = [token for token, postings in self._tokens.items() if postings[0] < cutoff]
+        for token in stale:
+            postings = self._tokens[token]
+            del postings[:bisect.bisect_left(postings, cutoff)]
+            if not postings:
+                del self._tokens[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def _segment(self, number):
+        """Linie segmentu - z pamięci albo z pliku (z pamięcią podręczną)"""
+        if number >= self._first_segment:
+            return self._segments[number - self._first_segment]
+        cached_number, cached = self._spill_cache
+        if cached_number == number:
+            return cached
+        offset, length, _ = self._spill_index[number]
+        self._spill.seek(offset)
+        lines = self._spill.read(length).decode('utf-8').split("\n")[:-1]
+        self._spill_cache = (number, lines)
+        return lines
+
+    def _spilled_meta(self, number):
+        """Kierunki i typy linii segmentu z pliku"""
+        offset, length, meta_length = self._spill_index[number]
+        self._spill.seek(offset + length)
+        data = self._spill.read(meta_length)
+        half = meta_length // 2
+        return array('b', data[:half]), array('b', data[half:])
+
+    def get(self, line_id):
+        """Tekst linii o danym numerze"""
+        with self._lock:
+            return self._segment(line_id // SEGMENT_SIZE)[line_id % SEGMENT_SIZE]
+
+    def lines(self, ids):
+        """Teksty wielu linii (numerów rosnących - czyta każdy segment raz)"""
+        with self._lock:
+            result = []
+            for line_id in ids:
+                result.append(self._segment(line_id // SEGMENT_SIZE)[line_id % SEGMENT_SIZE])
+            return result
+
+    def query(self, direction=None, kind=None, text=None):
+        """
+        Numery linii spełniających filtry, rosnąco
+
+        Args:
+            direction: Indeks w DIRECTIONS lub None
+            kind: Indeks w KINDS lub None
+            text: Szukany tekst (bez rozróżniania wielkości liter) lub None
+
+        Returns:
+            array('I') numerów linii albo range, gdy nie ma filtrów
+        """
+        with self._lock:
+            if direction is None and kind is None and not text:
+                return range(self._count)
+            result = array('I', self._query_spilled(direction, kind, text))
+            ids = None
+            if direction is not None:
+                ids = self._by_direction[direction]
+            if kind is not None:
+                ids = self._by_kind[kind] if ids is None else _intersect(ids, self._by_kind[kind])
+            if text:
+                ids = self._search(text, ids)
+            result.extend(ids)
+            return result
+
+    def _query_spilled(self, direction, kind, text):
+        """Linie z pliku spełniające filtry - przegląd segment po segmencie"""
+        needle = text.lower() if text else None
+        for number in range(len(self._spill_index)):
+            base = number * SEGMENT_SIZE
+            indexes = range(SEGMENT_SIZE)
+            if direction is not None or kind is not None:
+                directions, kinds = self._spilled_meta(number)
+                indexes = [index for index in indexes
+                           if (direction is None or directions[index] == direction)
+                           and (kind is None or kinds[index] == kind)]
+            if needle:
+                lines = self._segment(number)
+                if needle not in "\n".join(lines).lower():
+                    continue  # Cały segment bez trafień
+                indexes = [index for index in indexes if needle in lines[index].lower()]
+            yield from (base + index for index in indexes)
+
+    def _search(self, text, within=None):
+        """Wyszukiwanie w pamięci przez indeks słów, potwierdzane porównaniem tekstu"""
+        needle = text.lower()
+        candidates = None
+        vocabulary = self._vocabulary
+        for token in TOKEN_RE.findall(needle):
+            # Słowo zapytania może być początkiem słowa w logu
+            matches = set(self._unindexed)
+            index = bisect.bisect_left(vocabulary, token)
+            while index < len(vocabulary) and vocabulary[index].startswith(token):
+                matches.update(self._tokens[vocabulary[index]])
+                index += 1
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return array('I')
+        if candidates is None:
+            # Zapytanie bez słów (np. "<") - sprawdzamy wszystkie linie filtra
+            candidates = range(self._first_line, self._count) if within is None else within
+        elif within is not None:
+            candidates = candidates.intersection(within)
+        return array('I', (i for i in sorted(candidates)
+                           if needle in self.get(i).lower()))
+
+    def matches(self, line_id, direction=None, kind=None, text=None):
+        """Czy linia spełnia filtry (dla linii dopisanych po query())"""
+        with self._lock:
+            if line_id >= self._first_line:
+                index = line_id - self._first_line
+                line_direction, line_kind = self.directions[index], self.kinds[index]
+            else:
+                directions, kinds = self._spilled_meta(line_id // SEGMENT_SIZE)
+                index = line_id % SEGMENT_SIZE
+                line_direction, line_kind = directions[index], kinds[index]
+            if direction is not None and line_direction != direction:
+                return False
+            if kind is not None and line_kind != kind:
+                return False
+            return not text or text.lower() in self.get(line_id).lower()
+
+    def export(self, path):
+        """Zapisuje cały log do pliku tekstowego (bez udziału widżetu)"""
+        with self._lock, open(path, 'w', encoding='utf-8') as f:
+            for number in range(len(self._spill_index)):
+                f.write("\n".join(self._segment(number)) + "\n")
+            for segment in self._segments:
+                if segment:
+                    f.write("\n".join(segment) + "\n")
+
+    def clear(self):
+        """Usuwa wszystkie linie (także plik zrzutu)"""
+        with self._lock:
+            self.close()
+            self._reset()
+
+    def close(self):
+        """Usuwa plik zrzutu"""
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                try:
+                    os.unlink(self._spill.name)
+                except OSError:
+                    pass
+                self._spill = None
+
+
+DIRECTION_LABELS = (('Wszystkie', None), ('Wysłane', SENT), ('Odebrane', RECEIVED),
+                    ('Komunikaty', INFO))
+KIND_LABELS = (('Wszystkie', None), ('ok', OK), ('error', ERROR), ('ALARM', ALARM),
+               ('status', STATUS))
+
+
+if tk is not None:
+    class LogView(ttk.Frame):
+        """
+        Widok logu renderujący tylko widoczne wiersze
+
+        Pasek przewijania jest sterowany ręcznie: pozycja to indeks pierwszej
+        widocznej linii w bieżącym (przefiltrowanym) widoku. Gdy widok jest
+        przewinięty na koniec, nowe linie przewijają go automatycznie.
+        """
+
+        def __init__(self, master, store, height=15, width=70):
+            """
+            Args:
+                master: Widżet nadrzędny
+                store: CommLog z liniami logu
+                height: Wysokość w wierszach
+                width: Szerokość w znakach
+            """
+            super().__init__(master)
+            self.store = store
+            self.height = height
+            self.view = range(0)
+            self.filters = (None, None, None)
+            self.top = 0
+            self.follow = True
+
+            toolbar = ttk.Frame(self)
+            toolbar.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 3))
+            toolbar.columnconfigure(5, weight=1)
+            ttk.Label(toolbar, text="Kierunek:").grid(row=0, column=0, sticky=tk.W)
+            self.direction_var = tk.StringVar(value=DIRECTION_LABELS[0][0])
+            direction_combo = ttk.Combobox(toolbar, textvariable=self.direction_var, width=11,
+                                           state='readonly',
+                                           values=[label for label, _ in DIRECTION_LABELS])
+            direction_combo.grid(row=0, column=1, padx=(3, 8))
+            direction_combo.bind('<<ComboboxSelected>>', lambda e: self.apply_filter())
+            ttk.Label(toolbar, text="Typ:").grid(row=0, column=2, sticky=tk.W)
+            self.kind_var = tk.StringVar(value=KIND_LABELS[0][0])
+            kind_combo = ttk.Combobox(toolbar, textvariable=self.kind_var, width=9,
+                                      state='readonly', values=[label for label, _ in KIND_LABELS])
+            kind_combo.grid(row=0, column=3, padx=(3, 8))
+            kind_combo.bind('<<ComboboxSelected>>', lambda e: self.apply_filter())
+            ttk.Label(toolbar, text="Szukaj:").grid(row=0, column=4, sticky=tk.W)
+            self.search_var = tk.StringVar()
+            search_entry = ttk.Entry(toolbar, textvariable=self.search_var)
+            search_entry.grid(row=0, column=5, sticky=(tk.W, tk.E), padx=(3, 3))
+            search_entry.bind('<Return>', lambda e: self.apply_filter())
+            ttk.Button(toolbar, text="✖", width=3,
+                       command=self.reset_filter).grid(row=0, column=6)
+            self.count_var = tk.StringVar()
+            ttk.Label(toolbar, textvariable=self.count_var).grid(row=0, column=7, padx=(8, 0))
+
+            self.text = tk.Text(self, height=height, width=width, wrap=tk.NONE)
+            self.text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+            self.text.config(state=tk.DISABLED)
+            self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scroll)
+            self.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+            self.columnconfigure(0, weight=1)
+            self.rowconfigure(1, weight=1)
+
+            self.text.bind('<MouseWheel>', self.on_wheel)
+            self.text.bind('<Button-4>', lambda e: self.scroll_by(-3))
+            self.text.bind('<Button-5>', lambda e: self.scroll_by(3))
+            self.text.bind('<Configure>', lambda e: self.render())
+            self.reset_filter()
+
+        def rows(self):
+            """Liczba wierszy mieszczących się w widżecie"""
+            pixels = self.text.winfo_height()
+            linespace = self.text.tk.call('font', 'metrics', self.text.cget('font'),
+                                          '-linespace')
+            if pixels <= 1 or not linespace:
+                return self.height
+            return max(1, pixels // int(linespace))
+
+        def apply_filter(self):
+            """Przelicza widok z indeksów magazynu"""
+            direction = dict(DIRECTION_LABELS).get(self.direction_var.get())
+            kind = dict(KIND_LABELS).get(self.kind_var.get())
+            text = self.search_var.get().strip() or None
+            self.filters = (direction, kind, text)
+            if self.filters == (None, None, None):
+                self.view = range(len(self.store))
+            else:
+                self.view = self.store.query(direction, kind, text)
+            self.follow = True
+            self.render()
+
+        def reset_filter(self):
+            """Pokazuje wszystkie linie"""
+            self.direction_var.set(DIRECTION_LABELS[0][0])
+            self.kind_var.set(KIND_LABELS[0][0])
+            self.search_var.set("")
+            self.apply_filter()
+
+        def on_append(self, first, last):
+            """Dołącza do widoku linie first..last-1 dopisane do magazynu"""
+            if isinstance(self.view, range):
+                self.view = range(len(self.store))
+            else:
+                for line_id in range(first, last):
+                    if self.store.matches(line_id, *self.filters):
+                        self.view.append(line_id)
+            if self.follow:
+                self.render()
+            else:
+                self.update_scrollbar()
+
+        def scroll_by(self, lines):
+            self.top += lines
+            self.follow = False
+            self.render()
+
+        def on_wheel(self, event):
+            self.scroll_by(-3 if event.delta > 0 else 3)
+
+        def on_scroll(self, action, value, unit=None):
+            """Obsługa paska przewijania (moveto / scroll)"""
+            if action == 'moveto':
+                self.top = int(float(value) * len(self.view))
+            elif unit == 'pages':
+                self.top += int(value) * self.rows()
+            else:
+                self.top += int(value)
+            self.follow = False
+            self.render()
+
+        def render(self):
+            """Wstawia do widżetu tylko widoczny fragment widoku"""
+            rows = self.rows()
+            total = len(self.view)
+            if self.follow or self.top > total - rows:
+                self.top = max(0, total - rows)
+                self.follow = True
+            self.top = max(0, self.top)
+            lines = self.store.lines(self.view[self.top:self.top + rows])
+            self.text.config(state=tk.NORMAL)
+            self.text.delete('1.0', tk.END)
+            self.text.insert('1.0', "\n".join(lines))
+            self.text.config(state=tk.DISABLED)
+            self.update_scrollbar()
+
+        def update_scrollbar(self):
+            total = len(self.view)
+            if total:
+                rows = self.rows()
+                self.scrollbar.set(self.top / total, min(1.0, (self.top + rows) / total))
+            else:
+                self.scrollbar.set(0.0, 1.0)
+            self.count_var.set(f"{total}/{len(self.store)}")
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Model ruchu talerza Horus 0.2 (GRBL)
+
+Firmware planuje każdy ruch G1 jako profil trapezowy: przyspieszenie ze stałym
+a, jazda z prędkością F (w stopniach/sekundę), hamowanie z tym samym a.
+Krótkie ruchy nie osiągają F i mają profil trójkątny.
+"""
+
+import math
+import re
+
+# Przyspieszenie kątowe przyjmowane, gdy nie znamy ustawienia $120 (°/s²)
+DEFAULT_ACCELERATION = 200.0
+
+# Zapas na opóźnienia łącza i planera przy liczeniu limitów czasu (sekundy)
+TIMEOUT_MARGIN = 2.0
+
+
+def move_duration(distance, speed, acceleration=DEFAULT_ACCELERATION):
+    """
+    Czas trwania ruchu o zadanej długości
+
+    Args:
+        distance: Droga kątowa w stopniach (znak bez znaczenia)
+        speed: Prędkość zadana F w stopniach/sekundę
+        acceleration: Przyspieszenie w stopniach/sekundę²
+
+    Returns:
+        Czas w sekundach
+    """
+    distance = abs(distance)
+    if distance == 0 or speed <= 0:
+        return 0.0
+    if acceleration <= 0:
+        return distance / speed
+    ramp_distance = speed * speed / acceleration  # rozpędzanie + hamowanie
+    if distance < ramp_distance:
+        # Profil trójkątny - F nie zostaje osiągnięte
+        return 2.0 * math.sqrt(distance / acceleration)
+    return distance / speed + speed / acceleration
+
+
+def move_progress(elapsed, distance, speed, acceleration=DEFAULT_ACCELERATION):
+    """
+    Droga przebyta po danym czasie od startu ruchu (profil jak w move_duration)
+
+    Args:
+        elapsed: Czas od rozpoczęcia ruchu w sekundach
+        distance: Droga kątowa całego ruchu w stopniach (ze znakiem)
+        speed: Prędkość zadana F w stopniach/sekundę
+        acceleration: Przyspieszenie w stopniach/sekundę²
+
+    Returns:
+        Przebyta droga w stopniach, ze znakiem distance
+    """
+    total = abs(distance)
+    duration = move_duration(total, speed, acceleration)
+    if elapsed >= duration:
+        return distance
+    if elapsed <= 0:
+        return 0.0
+    if acceleration <= 0:
+        travelled = speed * elapsed
+    else:
+        peak = min(speed, math.sqrt(total * acceleration))
+        ramp_time = peak / acceleration
+        if elapsed < ramp_time:
+            travelled = 0.5 * acceleration * elapsed * elapsed
+        elif elapsed < duration - ramp_time:
+            travelled = 0.5 * peak * ramp_time + peak * (elapsed - ramp_time)
+        else:
+            remaining = duration - elapsed
+            travelled = total - 0.5 * acceleration * remaining * remaining
+    return math.copysign(travelled, distance)
+
+
+def move_timeout(distance, speed, acceleration=DEFAULT_ACCELERATION):
+    """Limit czasu oczekiwania na koniec ruchu (czas ruchu z zapasem)"""
+    return move_duration(distance, speed, acceleration) * 1.5 + TIMEOUT_MARGIN
+
+
+FEED_RE = re.compile(r"F\s*(-?\d+\.?\d*|-?\.\d+)", re.IGNORECASE)
+
+
+def feed_from_gcode(line):
+    """
+    Zwraca prędkość F ustawianą przez linię G-code albo None
+
+    Komendy systemowe ($$, $I, ...) i komentarze nie zmieniają F.
+    """
+    line = line.split(';', 1)[0].strip()
+    if not line or line.startswith('$'):
+        return None
+    match = FEED_RE.search(line)
+    return float(match.group(1)) if match else None
+
+
+def move_command(position, speed=None, modal_speed=None):
+    """
+    Buduje jedną linię G1 dla ruchu do pozycji absolutnej
+
+    F jest modalne - firmware pamięta je do następnej zmiany, więc pomijamy je,
+    gdy prędkość nie zmieniła się od ostatniej komendy.
+
+    Args:
+        position: Pozycja docelowa w stopniach
+        speed: Żądana prędkość w stopniach/sekundę (None = bez zmiany)
+        modal_speed: Ostatnie F wysłane do firmware (None = nieznane)
+
+    Returns:
+        Np. "G1 F200 X90" albo "G1 X90"
+    """
+    if speed is None or (modal_speed is not None and float(speed) == float(modal_speed)):
+        return f"G1 X{position}"
+    return f"G1 F{speed} X{position}"
+
+
+POSITION_RE = re.compile(r"X\s*(-?\d+\.?\d*|-?\.\d+)", re.IGNORECASE)
+
+
+def position_from_gcode(line):
+    """
+    Zwraca pozycję X (stopnie) zadawaną przez linię G-code albo None
+
+    Komendy systemowe ($$, $I, ...) i komentarze nie zmieniają pozycji.
+    """
+    line = line.split(';', 1)[0].strip()
+    if not line or line.startswith('$'):
+        return None
+    match = POSITION_RE.search(line)
+    return float(match.group(1)) if match else None
+
+
+def format_position(value):
+    """
+    Zapis pozycji dla G-code: stały przecinek, do 4 miejsc po przecinku
+
+    Format :g obcina do 6 cyfr znaczących (1234567.5 -> 1.23457e+06),
+    czego firmware nie rozumie albo odczytuje z błędem.
+
+    Returns:
+        Np. "90", "-0.5", "1234567.5"
+    """
+    value = round(float(value), 4) + 0.0  # bez "-0"
+    return f"{value:.4f}".rstrip('0').rstrip('.')
+
+
+def shift_position(line, offset):
+    """
+    Przesuwa pozycję X linii G-code o offset stopni
+
+    Używane po ponownym połączeniu, gdy zero firmware (G50) nie pokrywa się
+    z zerem, w którym liczone są pozycje zadania.
+
+    Returns:
+        Linia z X + offset (pozostałe słowa i komentarz bez zmian)
+    """
+    code, separator, comment = line.partition(';')
+    if not offset or code.lstrip().startswith('$'):
+        return line
+
+    def replace(match):
+        return f"{match.group(0)[0]}{format_position(float(match.group(1)) + offset)}"
+
+    return POSITION_RE.sub(replace, code, count=1) + separator + comment
+
+
+# Tryby wyboru celu ruchu absolutnego (klucz -> opis)
+TARGET_MODES = {
+    'absolute': 'absolutnie',
+    'shortest': 'najkrótszą drogą',
+    'positive': 'w prawo (+)',
+    'negative': 'w lewo (-)',
+}
+
+
+def resolve_target(angle, current, mode='shortest'):
+    """
+    Pozycja absolutna, do której trzeba jechać, by talerz stanął na kącie angle
+
+    Po wielu obrotach pozycja może wynosić np. 3600° - wtedy G1 X90 odwija
+    dziesięć obrotów. W trybach modulo celem jest najbliższa pozycja
+    równoważna angle (modulo 360°):
+    'shortest' - najkrótsza droga (najwyżej 180°, przy remisie w prawo),
+    'positive' / 'negative' - tylko w stronę rosnących / malejących X
+    (mniej niż pełny obrót). 'absolute' zwraca angle bez zmian.
+
+    Args:
+        angle: Żądany kąt w stopniach
+        current: Bieżąca pozycja absolutna
+        mode: Klucz TARGET_MODES
+
+    Returns:
+        Pozycja docelowa dla G1 X
+    """
+    if mode not in TARGET_MODES:
+        raise ValueError(f"Nieznany tryb celu: {mode}")
+    if mode == 'absolute':
+        return angle
+    delta = (angle - current) % 360.0
+    if mode == 'negative' and delta:
+        delta -= 360.0
+    elif mode == 'shortest' and delta > 180.0:
+        delta -= 360.0
+    return round(current + delta, 4) + 0.0  # bez "-0"
+
+
+def is_full_turn(position, tolerance=1e-3):
+    """Czy pozycja to niezerowa wielokrotność 360° - talerz stoi tam, gdzie zero"""
+    return abs(position) >= 360.0 - tolerance and abs(math.remainder(position, 360.0)) <= tolerance
+
+
+def wrap_offset(position, angle=None):
+    """
+    Wielokrotność 360°, o którą przenumerować współrzędne, by pozycja wróciła do (-360°, 360°)
+
+    Talerz po pełnym obrocie jest w tym samym miejscu - przesunięcie licznika
+    o wielokrotność 360° nie zmienia niczego fizycznie.
+
+    Args:
+        position: Bieżąca pozycja absolutna
+        angle: Kąt, na który ma wypaść pozycja (domyślnie position modulo 360°)
+
+    Returns:
+        Przesunięcie w stopniach (0.0, gdy pozycja już jest w zakresie)
+    """
+    reference = math.fmod(position if angle is None else angle, 360.0)
+    return round((reference - position) / 360.0) * 360.0 + 0.0
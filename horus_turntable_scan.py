@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Sekwencja skanowania: N postojów na łuku z przechwytywaniem na każdym
+
+Każdy postój to: ruch (G1), ustabilizowanie (G4 P<settle> - firmware
+odlicza czas od faktycznego zatrzymania talerza, bez dodatkowej wymiany
+komunikatów), potem capture(stop), np. wyzwolenie aparatu, gdy talerz
+stoi. Zapis na dysk i inna obróbka (store(stop, dane)) trwają w wątku
+w tle, a w tym czasie silnik już jedzie do następnego postoju - czas
+postoju to max(ruch + capture, store) zamiast ich sumy.
+
+Przykład:
+    controller = MakerBotDigitizerController('/dev/ttyUSB0')
+    controller.connect()
+    controller.enable_motor()
+
+    def capture(stop):
+        return camera.grab()                      # talerz stoi
+
+    def store(stop, frame):
+        frame.save(f"scan_{stop.index:03d}.png")  # w tle, podczas ruchu
+
+    ScanSequence(controller, 72, capture=capture, store=store).run()
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import shlex
+import subprocess
+import sys
+import time
+
+from horus_turntable_motion import move_timeout
+
+# Domyślny czas ustabilizowania talerza po zatrzymaniu (sekundy)
+DEFAULT_SETTLE = 0.2
+
+# Ile postojów może czekać na zakończenie store() - ogranicza pamięć na dane
+DEFAULT_MAX_PENDING = 2
+
+ScanStop = collections.namedtuple('ScanStop', 'index angle timestamp')
+ScanStop.__doc__ = """Postój skanu: numer, kąt (stopnie) i chwila ustabilizowania (time.time())"""
+
+
+def scan_angles(stops, arc=360.0, start=0.0):
+    """
+    Kąty kolejnych postojów
+
+    Pełny obrót (|arc| >= 360) dzieli się na stops równych kroków bez
+    powtórzenia kąta startowego; krótszy łuk obejmuje oba końce.
+
+    Args:
+        stops: Liczba postojów (>= 1)
+        arc: Łuk w stopniach (ujemny = w drugą stronę)
+        start: Kąt pierwszego postoju
+
+    Returns:
+        Lista kątów absolutnych
+    """
+    if stops < 1:
+        raise ValueError("Liczba postojów musi być dodatnia")
+    if stops == 1:
+        return [start]
+    step = arc / stops if abs(arc) >= 360.0 else arc / (stops - 1)
+    return [start + index * step for index in range(stops)]
+
+
+class ScanSequence:
+    """Postoje na łuku z przechwytywaniem i zapisem nakładanym na ruch"""
+
+    def __init__(self, controller, stops, arc=360.0, start=None, speed=200,
+                 settle=DEFAULT_SETTLE, capture=None, store=None,
+                 max_pending=DEFAULT_MAX_PENDING):
+        """
+        Args:
+            controller: Połączony MakerBotDigitizerController
+            stops: Liczba postojów
+            arc: Łuk skanu w stopniach
+            start: Kąt pierwszego postoju (domyślnie bieżąca pozycja)
+            speed: Prędkość ruchów w stopniach/sekundę
+            settle: Czas ustabilizowania po zatrzymaniu (sekundy)
+            capture: Funkcja (ScanStop) -> dane, wołana, gdy talerz stoi
+            store: Funkcja (ScanStop, dane) wołana w tle podczas kolejnego ruchu
+            max_pending: Limit postojów czekających na store()
+        """
+        self.controller = controller
+        self.stops = stops
+        self.arc = arc
+        self.start = start
+        self.speed = speed
+        self.settle = settle
+        self.capture = capture
+        self.store = store
+        self.max_pending = max(1, max_pending)
+        self.completed = []
+        self.elapsed = 0.0
+        self._cancelled = False
+
+    def cancel(self):
+        """Przerywa skan po bieżącym postoju (np. z innego wątku)"""
+        self._cancelled = True
+
+    def run(self):
+        """
+        Wykonuje skan
+
+        Returns:
+            True, jeśli wszystkie postoje zostały wykonane i zapisane
+        """
+        start = self.controller.current_position if self.start is None else self.start
+        angles = scan_angles(self.stops, self.arc, start)
+        self.completed = []
+        self._cancelled = False
+        pending = collections.deque()
+        started = time.monotonic()
+        print(f"🎬 Skan: {len(angles)} postojów, łuk {self.arc}°, "
+              f"{self.speed}°/s, stabilizacja {self.settle} s")
+
+        # Jeden wątek zapisu - dane trafiają na dysk w kolejności postojów
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                     thread_name_prefix="horus-scan-store")
+        ok = True
+        try:
+            for index, angle in enumerate(angles):
+                if self._cancelled:
+                    print("⏹️ Skan przerwany")
+                    ok = False
+                    break
+                if not self._arrive(angle):
+                    ok = False
+                    break
+                stop = ScanStop(index, angle, time.time())
+                print(f"📸 Postój {index + 1}/{len(angles)}: {angle:.3f}°")
+                data = self.capture(stop) if self.capture else None
+                self.completed.append(stop)
+                if self.store:
+                    pending.append(pool.submit(self.store, stop, data))
+                    # Następny ruch rusza od razu; czekamy tylko na nadmiar zaległych zapisów
+                    while len(pending) > self.max_pending:
+                        pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+        except Exception as e:
+            print(f"❌ Błąd skanu: {e}")
+            ok = False
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+        self.elapsed = time.monotonic() - started
+        print(f"{'✅' if ok else '⚠️'} Postoje: {len(self.completed)}/{len(angles)} "
+              f"w {self.elapsed:.2f} s")
+        return ok
+
+    def _arrive(self, angle):
+        """Ruch do kąta i czekanie, aż firmware odliczy stabilizację"""
+        distance = angle - self.controller.current_position
+        if not self.controller.rotate_to_position(angle, self.speed):
+            return False
+        # 'ok' na G4 przychodzi po opróżnieniu planera i upływie P sekund
+        timeout = move_timeout(distance, self.speed, self.controller.acceleration) + self.settle
+        try:
+            lines = self.controller.submit(f"G4 P{self.settle:g}").result(timeout)
+        except concurrent.futures.TimeoutError:
+            print(f"⚠️ Talerz nie zatrzymał się w ciągu {timeout:.1f} s")
+            return False
+        if not lines or lines[-1].lower() != 'ok':
+            print(f"❌ Brak potwierdzenia postoju: {lines[-1] if lines else '?'}")
+            return False
+        return True
+
+
+def shell_hook(template):
+    """
+    Funkcja wywołująca polecenie powłoki dla postoju
+
+    W szablonie można użyć {index} i {angle}, np.
+    "gphoto2 --capture-image-and-download --filename scan_{index:03d}.jpg"
+    """
+    def hook(stop, data=None):
+        command = template.format(index=stop.index, angle=stop.angle)
+        result = subprocess.run(shlex.split(command))
+        if result.returncode != 0:
+            raise RuntimeError(f"Polecenie zakończone kodem {result.returncode}: {command}")
+    return hook
+
+
+def main():
+    from horus_turntable_gcode_linux_sender import MakerBotDigitizerController
+
+    parser = argparse.ArgumentParser(
+        description='Skan z postojami na łuku - talerz Horus 0.2',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Przykłady użycia:
+  %(prog)s --stops 72                                   # 72 postoje co 5°
+  %(prog)s --stops 10 --arc 90 --settle 0.5             # 10 postojów na 90°
+  %(prog)s --stops 36 --capture "gphoto2 --capture-image-and-download --filename scan_{index:03d}.jpg"
+  %(prog)s --stops 36 --capture "..." --store "convert scan_{index:03d}.jpg scan_{index:03d}.png"
+        """
+    )
+    parser.add_argument('--port', default='/dev/ttyUSB0', help='Port szeregowy')
+    parser.add_argument('--baudrate', type=int, default=115200, help='Prędkość transmisji')
+    parser.add_argument('--stops', type=int, required=True, help='Liczba postojów')
+    parser.add_argument('--arc', type=float, default=360.0, help='Łuk skanu (stopnie)')
+    parser.add_argument('--start', type=float, default=0.0, help='Kąt pierwszego postoju')
+    parser.add_argument('--speed', type=int, default=200, help='Prędkość obrotu (stopnie/s)')
+    parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE,
+                        help='Stabilizacja po zatrzymaniu (sekundy)')
+    parser.add_argument('--capture', help='Polecenie na postoju, gdy talerz stoi ({index}, {angle})')
+    parser.add_argument('--store', help='Polecenie w tle, podczas następnego ruchu ({index}, {angle})')
+    args = parser.parse_args()
+
+    controller = MakerBotDigitizerController(args.port, args.baudrate)
+    if not controller.connect():
+        sys.exit(1)
+    sequence = ScanSequence(controller, args.stops, args.arc, args.start, args.speed, args.settle,
+                            shell_hook(args.capture) if args.capture else None,
+                            shell_hook(args.store) if args.store else None)
+    try:
+        controller.enable_motor()
+        ok = sequence.run()
+    except KeyboardInterrupt:
+        print("\n👋 Przerwano")
+        ok = False
+    finally:
+        controller.disconnect()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+"""
+Wspólna warstwa komunikacji szeregowej dla talerza Horus 0.2 (GRBL)
+
+Każdy otwarty port ma jeden wątek czytający, który dzieli przychodzące
+bajty na linie w chwili ich nadejścia. Wywołujący czeka na zmiennej
+warunkowej i jest budzony, gdy tylko przyjdzie kończąca odpowiedź
+(ok / error:N / ALARM), zamiast spać stałe 200 ms i odpytywać in_waiting.
+
+Wysłane, niepotwierdzone komendy czekają w kolejce FIFO - każde 'ok'
+należy do najstarszej z nich. Dzięki temu można trzymać kilka linii
+w buforze RX firmware naraz (protokół liczenia znaków GRBL), a każda
+komenda ma własny Future z dokładnie jej odpowiedzią.
+
+Znaki czasu rzeczywistego (?, !, ~, Ctrl-X) omijają tę kolejkę - są
+zapisywane do portu natychmiast, bez znaku końca linii.
+
+Każda linia jest czytana z portu raz i rozsyłana subskrybentom
+(monitor, parser statusu, logi) przez subscribe() - nikt poza wątkiem
+czytającym nie woła ser.readline(), więc odpowiedzi nie giną.
+"""
+
+import collections
+import concurrent.futures
+import re
+import threading
+import time
+
+import serial
+
+# Domyślny czas oczekiwania na potwierdzenie komendy (sekundy)
+DEFAULT_TIMEOUT = 5.0
+
+# Rozmiar bufora odbiorczego GRBL (bajty)
+RX_BUFFER_SIZE = 127
+
+# Baner startowy firmware, np. "Grbl 0.9j ['$' for help]"
+BANNER_RE = re.compile(r"^(Grbl|Horus)\s+\S+\s+\['\$' for help\]")
+
+# Czas oczekiwania na gotowość po otwarciu portu (sekundy)
+READY_TIMEOUT = 3.0
+
+# Po tym czasie bez banera zaczynamy sondować urządzenie znakiem '?'
+PROBE_DELAY = 0.3
+PROBE_INTERVAL = 0.25
+
+# '?' bez raportu dłużej niż tyle sekund uznajemy za zgubione (pomiar opóźnienia)
+STATUS_QUERY_EXPIRY = 1.0
+
+# Komendy czasu rzeczywistego GRBL - pojedyncze bajty bez '\n' i bez 'ok'
+STATUS_QUERY = '?'
+FEED_HOLD = '!'
+CYCLE_START = '~'
+SOFT_RESET = '\x18'  # Ctrl-X
+REALTIME_COMMANDS = (STATUS_QUERY, FEED_HOLD, CYCLE_START, SOFT_RESET)
+
+# Źródła linii rozsyłanych subskrybentom łącza
+LINE_SENT = 'sent'                # Linia komendy zapisana do portu
+LINE_REALTIME = 'realtime'        # Znak czasu rzeczywistego zapisany do portu
+LINE_RESPONSE = 'response'        # Odpowiedź przypisana do komendy (ok / error:N / ...)
+LINE_STATUS = 'status'            # Raport statusu <...>
+LINE_UNSOLICITED = 'unsolicited'  # Linia bez komendy (baner, ALARM, komunikaty)
+LINE_LOST = 'lost'                # Utrata portu (np. odłączony kabel); linia = opis błędu
+RECEIVED_SOURCES = (LINE_RESPONSE, LINE_STATUS, LINE_UNSOLICITED)
+
+# Komentarze G-code: "; do końca linii" oraz "(w nawiasach)"
+COMMENT_RE = re.compile(r"\([^)]*\)|;.*$")
+
+
+def is_banner(line):
+    """Czy linia jest banerem startowym firmware (po resecie)"""
+    return bool(BANNER_RE.match(line))
+
+
+def is_status_report(line):
+    """Czy linia jest raportem statusu, np. <Idle,MPos:0.000,0.000,0.000>"""
+    return line.startswith('<') and line.endswith('>')
+
+
+def is_error(line):
+    """Czy linia jest odpowiedzią błędu (error:N / ALARM)"""
+    return line.lower().startswith('error') or is_alarm(line)
+
+
+def is_alarm(line):
+    """Czy linia to alarm firmware (ALARM / ALARM:N) - przychodzi niezależnie od komend"""
+    return line.startswith('ALARM')
+
+
+def is_terminator(line):
+    """Czy linia kończy odpowiedź na komendę (ok / error:N / ALARM / baner)"""
+    return line.lower() == 'ok' or is_error(line) or is_banner(line)
+
+
+def reply_ok(reply):
+    """Czy wynik send_gcode (lista linii odpowiedzi, True lub False) kończy się 'ok'"""
+    return isinstance(reply, list) and bool(reply) and reply[-1].lower() == 'ok'
+
+
+def clean_gcode_line(line):
+    """Usuwa komentarze i białe znaki z linii G-code (pusty string = pomiń)"""
+    return COMMENT_RE.sub('', line).strip()
+
+
+class LineFramer:
+    """Składa przychodzące bajty w kompletne, zdekodowane linie"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def reset(self):
+        """Porzuca niedokończoną linię"""
+        self._buffer.clear()
+
+    def feed(self, data):
+        """
+        Dokłada bajty i zwraca listę linii, które właśnie się domknęły
+
+        Puste linie są pomijane, a niepoprawne UTF-8 zastępowane znakiem '?'.
+        """
+        self._buffer += data
+        lines = []
+        while True:
+            idx = self._buffer.find(b'\n')
+            if idx < 0:
+                break
+            raw = bytes(self._buffer[:idx])
+            del self._buffer[:idx + 1]
+            line = raw.decode('utf-8', errors='replace').strip()
+            if line:
+                lines.append(line)
+        return lines
+
+
+class PendingCommand:
+    """Komenda wysłana do firmware, czekająca na potwierdzenie"""
+
+    __slots__ = ('command', 'size', 'lines', 'complete', 'future')
+
+    def __init__(self, command, size, future=None):
+        self.command = command
+        self.size = size
+        self.lines = []
+        self.complete = False
+        # Wersja asyncio podaje własny asyncio.Future (to samo API)
+        self.future = future if future is not None else concurrent.futures.Future()
+
+    def resolve(self):
+        """Rozwiązuje Future potwierdzonej komendy (poza blokadą łącza)"""
+        if not self.future.done():
+            self.future.set_result(list(self.lines))
+
+    def fail(self, exc):
+        """Rozwiązuje Future wyjątkiem (np. po utracie połączenia)"""
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+    @property
+    def ok(self):
+        """Czy komenda została potwierdzona bez błędu (a nie np. przerwana resetem)"""
+        return self.complete and bool(self.lines) and self.lines[-1].lower() == 'ok'
+
+
+class LineBroadcaster:
+    """
+    Rozsyłanie linii łącza do subskrybentów
+
+    Subskrybent to funkcja (linia, time.time(), źródło) z wybranymi
+    źródłami LINE_*. Jest wołana w wątku (lub pętli) czytającym, więc
+    nie powinna blokować - np. tylko dopisuje linię do kolejki.
+    """
+
+    def __init__(self):
+        # Krotka podmieniana w całości - wątek czytający iteruje bez blokady
+        self._subscribers = ()
+        self._subscribers_lock = threading.Lock()
+
+    def subscribe(self, callback, sources=RECEIVED_SOURCES):
+        """
+        Rejestruje subskrybenta (ponowna rejestracja zmienia tylko źródła)
+
+        Args:
+            callback: Funkcja (linia, znacznik czasu, źródło)
+            sources: Źródło LINE_* lub ich kolekcja
+
+        Returns:
+            callback (do późniejszego unsubscribe())
+        """
+        if isinstance(sources, str):
+            sources = (sources,)
+        entry = (callback, frozenset(sources))
+        with self._subscribers_lock:
+            self._subscribers = tuple(
+                s for s in self._subscribers if s[0] != callback) + (entry,)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Wyrejestrowuje subskrybenta; zwraca True, jeśli był zarejestrowany"""
+        with self._subscribers_lock:
+            remaining = tuple(s for s in self._subscribers if s[0] != callback)
+            removed = len(remaining) != len(self._subscribers)
+            self._subscribers = remaining
+        return removed
+
+    def _publish(self, line, source, timestamp=None):
+        """Przekazuje linię subskrybentom danego źródła"""
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        if timestamp is None:
+            timestamp = time.time()
+        for callback, sources in subscribers:
+            if source in sources:
+                try:
+                    callback(line, timestamp, source)
+                except Exception:
+                    pass  # Błąd subskrybenta nie może zatrzymać odczytu portu
+
+
+class SerialLink(LineBroadcaster):
+    """
+    Właściciel otwartego portu szeregowego
+
+    Wątek czytający jest jedynym miejscem, które wywołuje ser.read().
+    Odpowiedzi trafiają do najstarszej niepotwierdzonej komendy, raporty
+    statusu do `last_status`, a każda linia - także wysłana - do
+    subskrybentów zarejestrowanych przez subscribe().
+    """
+
+    def __init__(self, ser, rx_buffer_size=RX_BUFFER_SIZE):
+        """
+        Args:
+            ser: Otwarty obiekt serial.Serial
+            rx_buffer_size: Rozmiar bufora RX firmware dla liczenia znaków
+        """
+        super().__init__()
+        self.ser = ser
+        self.rx_buffer_size = rx_buffer_size
+        self.error = None
+        self.banner = None
+        self.last_status = None
+        self.realtime_latency = None
+        self.realtime_latency_max = 0.0
+        self.status_rtt = None  # Czas od wysłania '?' do odebrania raportu (sekundy)
+        self.status_rtt_min = None
+
+        self._ready = threading.Event()
+        self._status_queries = collections.deque()  # time.time() wysłanych '?'
+        self._banner_event = threading.Event()
+        self._status_seq = 0
+        self._write_lock = threading.Lock()
+        self._send_lock = threading.RLock()  # RLock - submit_group() trzyma ją przez kilka komend
+        self._cond = threading.Condition()
+        self._pending = collections.deque()
+        self._inflight_bytes = 0
+        self._framer = LineFramer()
+        self._running = False
+        self._thread = None
+
+    @property
+    def is_alive(self):
+        """Czy wątek czytający działa"""
+        return self._running and self.error is None
+
+    @property
+    def inflight_bytes(self):
+        """Liczba bajtów wysłanych, ale jeszcze niepotwierdzonych"""
+        return self._inflight_bytes
+
+    def start(self):
+        """Uruchamia wątek czytający"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, daemon=True,
+                                        name=f"horus-reader-{self.ser.port}")
+        self._thread.start()
+
+    def stop(self):
+        """Zatrzymuje wątek czytający (port pozostaje otwarty)"""
+        self._running = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def close(self):
+        """Zatrzymuje wątek i zamyka port"""
+        self._running = False
+        try:
+            if self.ser.is_open:
+                self.ser.close()
+        except (serial.SerialException, OSError):
+            pass
+        self.stop()
+
+    def _read_loop(self):
+        """Pętla wątku czytającego - blokuje się na read() zamiast odpytywać"""
+        while self._running:
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError, AttributeError) as e:
+                # TypeError/AttributeError: port zamknięty w trakcie read()
+                if self._running:
+                    self.error = e
+                break
+            if data:
+                self._feed(data)
+        self._running = False
+        with self._cond:
+            lost = list(self._pending)
+            self._pending.clear()
+            self._inflight_bytes = 0
+            self._cond.notify_all()
+        exc = serial.SerialException(f"Utracono połączenie: {self.error}")
+        for entry in lost:
+            entry.fail(exc)
+        if self.error is not None:
+            # Zamknięcie przez close() nie jest utratą połączenia
+            self._publish(str(self.error), LINE_LOST)
+
+    def _feed(self, data):
+        """Dzieli przychodzące bajty na kompletne linie"""
+        for line in self._framer.feed(data):
+            self._handle_line(line)
+
+    def _handle_line(self, line):
+        """Przypisuje linię najstarszej oczekującej komendzie albo subskrybentom"""
+        if is_status_report(line):
+            # Odpowiedź na '?' nie kończy się 'ok' - nie należy do żadnej komendy
+            self._handle_status(line)
+            return
+        if is_banner(line):
+            self.banner = line
+            self._ready.set()
+            self._banner_event.set()
+        finished = []
+        with self._cond:
+            if (is_banner(line) or is_alarm(line)) and self._pending:
+                # Reset firmware lub alarm (GRBL czyści wtedy bufor RX) - nic już nie
+                # odpowie; zdjęcie jednej komendy przesunęłoby dopasowanie FIFO
+                while self._pending:
+                    entry = self._pending.popleft()
+                    entry.lines.append(line)
+                    entry.complete = True
+                    finished.append(entry)
+                self._inflight_bytes = 0
+                self._cond.notify_all()
+            elif self._pending:
+                entry = self._pending[0]
+                entry.lines.append(line)
+                if is_terminator(line):
+                    self._pending.popleft()
+                    self._inflight_bytes -= entry.size
+                    entry.complete = True
+                    finished.append(entry)
+                    self._cond.notify_all()
+            else:
+                finished = None
+        if finished is None:
+            self._publish(line, LINE_UNSOLICITED)
+            return
+        self._publish(line, LINE_RESPONSE)
+        # Callbacki Future działają w wątku czytającym - nie trzymamy blokady
+        for entry in finished:
+            entry.resolve()
+
+    def _handle_status(self, line):
+        """Zapamiętuje raport statusu i budzi czekających w request_status()"""
+        timestamp = time.time()
+        self._ready.set()
+        queries = self._status_queries
+        while queries and timestamp - queries[0] > STATUS_QUERY_EXPIRY:
+            queries.popleft()  # '?' bez odpowiedzi
+        if queries:
+            rtt = timestamp - queries.popleft()
+            self.status_rtt = rtt
+            if self.status_rtt_min is None or rtt < self.status_rtt_min:
+                self.status_rtt_min = rtt
+        with self._cond:
+            self.last_status = line
+            self._status_seq += 1
+            self._cond.notify_all()
+        self._publish(line, LINE_STATUS, timestamp)
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        """
+        Czeka, aż firmware będzie gotowe do przyjmowania komend
+
+        Zwykle po otwarciu portu płytka resetuje się (DTR) i wypisuje baner
+        "Grbl x.y ['$' for help]" - wracamy natychmiast po jego odebraniu.
+        Jeśli baner nie przychodzi (płytka się nie zresetowała), sondujemy
+        urządzenie znakiem '?', na który odpowiada raportem statusu.
+
+        Returns:
+            True, jeśli urządzenie odpowiedziało banerem lub statusem
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        next_probe = start + PROBE_DELAY
+        while True:
+            now = time.monotonic()
+            if now >= deadline or not self.is_alive:
+                return self._ready.is_set()
+            if self._ready.wait(min(next_probe, deadline) - now):
+                return True
+            if time.monotonic() >= next_probe:
+                self.write(b'?')
+                next_probe += PROBE_INTERVAL
+
+    def write(self, data):
+        """Zapisuje surowe bajty do portu"""
+        with self._write_lock:
+            self.ser.write(data)
+
+    def realtime(self, command):
+        """
+        Wysyła komendę czasu rzeczywistego (?, !, ~, Ctrl-X) z pominięciem kolejki
+
+        Nie czeka na miejsce w buforze RX ani na inne wątki wysyłające linie
+        (firmware wyłapuje te znaki w przerwaniu odbiorczym). Blokada zapisu
+        jest trzymana tylko na czas ser.write() jednej linii.
+
+        Returns:
+            Czas od wywołania do przekazania bajtu do sterownika portu (sekundy)
+        """
+        if command not in REALTIME_COMMANDS:
+            raise ValueError(f"Nie jest komendą czasu rzeczywistego: {command!r}")
+        self._check_alive()
+        start = time.perf_counter()
+        with self._write_lock:
+            if command == STATUS_QUERY:
+                self._status_queries.append(time.time())
+            self.ser.write(command.encode('ascii'))
+        latency = time.perf_counter() - start
+        self.realtime_latency = latency
+        self.realtime_latency_max = max(self.realtime_latency_max, latency)
+        self._publish(command, LINE_REALTIME)
+        return latency
+
+    def request_status(self, timeout=1.0):
+        """
+        Wysyła '?' i czeka na najbliższy raport statusu
+
+        Returns:
+            Linia raportu, np. "<Idle,MPos:0.000,0.000,0.000>", lub None
+        """
+        with self._cond:
+            seq = self._status_seq
+        self.realtime(STATUS_QUERY)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._status_seq == seq and self.is_alive:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self.last_status if self._status_seq != seq else None
+
+    def soft_reset(self, timeout=READY_TIMEOUT):
+        """
+        Wysyła Ctrl-X i czeka na ponowny baner firmware
+
+        Niepotwierdzone komendy kończą się banerem (firmware czyści bufor RX).
+
+        Returns:
+            True, jeśli baner nadszedł w zadanym czasie
+        """
+        self._banner_event.clear()
+        self.realtime(SOFT_RESET)
+        return self._banner_event.wait(timeout)
+
+    def _check_alive(self):
+        """Zgłasza wyjątek, jeśli wątek czytający przestał działać"""
+        if not self.is_alive:
+            raise serial.SerialException(f"Port nieaktywny: {self.error}")
+
+    def enqueue(self, command, timeout=None):
+        """
+        Wysyła komendę, gdy w buforze RX firmware jest na nią miejsce
+
+        Args:
+            command: Komenda G-code jako string
+            timeout: Maksymalny czas oczekiwania na miejsce (None = bez limitu)
+
+        Returns:
+            PendingCommand, który zostanie uzupełniony przez wątek czytający
+        """
+        if not command.endswith('\n'):
+            command += '\n'
+        data = command.encode('utf-8')
+        entry = PendingCommand(command.strip(), len(data))
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._send_lock:
+            with self._cond:
+                # Liczenie znaków: czekaj, aż potwierdzenia zwolnią miejsce
+                while (self._pending and
+                       self._inflight_bytes + entry.size > self.rx_buffer_size):
+                    self._check_alive()
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise serial.SerialTimeoutException(
+                            "Bufor RX firmware pełny - brak potwierdzeń")
+                    self._cond.wait(remaining)
+                self._check_alive()
+                self._pending.append(entry)
+                self._inflight_bytes += entry.size
+            # Przed zapisem - odpowiedź może przyjść, zanim write() wróci
+            self._publish(entry.command, LINE_SENT)
+            try:
+                self.write(data)
+            except Exception:
+                with self._cond:
+                    if entry in self._pending:
+                        self._pending.remove(entry)
+                        self._inflight_bytes -= entry.size
+                raise
+        return entry
+
+    def submit(self, command, timeout=None):
+        """
+        Wysyła komendę bez czekania na odpowiedź
+
+        Blokuje tylko wtedy, gdy bufor RX firmware jest pełny. Callbacki
+        dodane przez add_done_callback() działają w wątku czytającym
+        i nie powinny blokować.
+
+        Returns:
+            concurrent.futures.Future z listą linii odpowiedzi (ostatnia to
+            ok / error:N / ALARM); odpowiedzi są dopasowywane w kolejności FIFO
+        """
+        return self.enqueue(command, timeout).future
+
+    def flush_input(self):
+        """
+        Odrzuca nieodczytane bajty portu i niedokończoną linię
+
+        Tylko bez oczekujących komend - odrzucone 'ok' przesunęłoby
+        dopasowanie odpowiedzi FIFO do końca sesji. Blokada wysyłania
+        nie dopuszcza nowej komendy w trakcie czyszczenia.
+
+        Returns:
+            True po wyczyszczeniu; False, gdy komendy czekają na odpowiedź
+        """
+        with self._send_lock, self._cond:
+            if self._pending:
+                return False
+            self.ser.reset_input_buffer()
+            self._framer.reset()
+        return True
+
+    def submit_group(self, commands, timeout=None):
+        """
+        Wysyła kilka komend jedna za drugą, bez linii innych wątków pomiędzy
+
+        Np. "G91 G1 X5" i "G90" - komenda absolutna z innego wątku nie
+        trafi do firmware w trybie przyrostowym.
+
+        Returns:
+            Lista concurrent.futures.Future (jak submit()) w kolejności komend
+        """
+        with self._send_lock:
+            return [self.enqueue(command, timeout).future for command in commands]
+
+    def wait(self, entry, timeout=DEFAULT_TIMEOUT):
+        """
+        Czeka na potwierdzenie komendy
+
+        Returns:
+            True, jeśli odpowiedź jest kompletna
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not entry.complete and self.is_alive:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not entry.complete and self.error is not None:
+                raise serial.SerialException(f"Utracono połączenie: {self.error}")
+            return entry.complete
+
+    def send(self, command, timeout=DEFAULT_TIMEOUT):
+        """
+        Wysyła komendę i czeka na kończącą odpowiedź
+
+        Args:
+            command: Komenda G-code jako string
+            timeout: Maksymalny czas oczekiwania w sekundach
+
+        Returns:
+            Krotka (lista linii odpowiedzi, czy odpowiedź jest kompletna)
+        """
+        entry = self.enqueue(command, timeout)
+        complete = self.wait(entry, timeout)
+        return list(entry.lines), complete
+
+    def stream(self, commands, on_response=None, stop_on_error=True, timeout=None):
+        """
+        Strumieniuje komendy protokołem liczenia znaków GRBL
+
+        Kolejna linia wychodzi, gdy tylko suma niepotwierdzonych bajtów
+        zmieści się w buforze RX firmware - bez czekania na każde 'ok'.
+
+        Args:
+            commands: Iterowalna kolekcja komend (już oczyszczonych)
+            on_response: Opcjonalna funkcja (PendingCommand) wołana po potwierdzeniu
+            stop_on_error: Przerwij wysyłanie po pierwszym error/ALARM
+            timeout: Limit oczekiwania na pojedyncze potwierdzenie (None = bez limitu)
+
+        Returns:
+            Krotka (liczba wysłanych linii, lista komend zakończonych błędem)
+        """
+        sent = collections.deque()
+        errors = []
+        count = 0
+
+        def drain(block):
+            while sent and (block or sent[0].complete):
+                entry = sent[0]
+                if not self.wait(entry, timeout):
+                    raise serial.SerialTimeoutException(
+                        f"Brak potwierdzenia dla: {entry.command}")
+                sent.popleft()
+                if not entry.ok:
+                    errors.append(entry)
+                if on_response:
+                    on_response(entry)
+
+        for command in commands:
+            drain(False)
+            if errors and stop_on_error:
+                break
+            sent.append(self.enqueue(command, timeout))
+            count += 1
+        drain(True)
+        return count, errors
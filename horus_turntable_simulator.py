@@ -0,0 +1,695 @@
+#!/usr/bin/env python3
+"""
+Symulator firmware Horus 0.2 (GRBL) na pseudoterminalu
+
+Otwiera parę pty i zachowuje się po stronie slave jak talerz podłączony
+przez USB: po otwarciu portu (jak reset Arduino przez DTR) wypisuje baner,
+odpowiada 'ok' / 'error:N', wykonuje M17/M18/G50/G4/G0/G1 (F, X), $$, $I,
+$G, $X, $N=wartość oraz komendy czasu rzeczywistego ?, !, ~ i Ctrl-X.
+Ruch jest modelowany w czasie z prędkości F i przyspieszenia $120
+(profil trapezowy), a planer ma ograniczoną liczbę bloków jak w GRBL.
+
+Kontroler CLI i oba GUI łączą się z nim bez zmian:
+    python horus_turntable_simulator.py --link /tmp/ttyHORUS
+    python horus_turntable_gcode_linux_sender.py --port /tmp/ttyHORUS --interactive
+
+Uproszczenia: wstrzymanie (!) zatrzymuje ruch natychmiast, bez hamowania.
+Otwarcie portu rozpoznajemy po tcflush klienta (pyserial wykonuje go przy
+każdym open), więc jawne opróżnienie bufora wejścia też restartuje firmware.
+Planer łączy tylko ruchy w tym samym kierunku z tą samą prędkością (jak
+przejście bez hamowania w GRBL) - pozostałe bloki kończą się zatrzymaniem.
+"""
+
+import argparse
+import collections
+import fcntl
+import math
+import os
+import pty
+import re
+import select
+import struct
+import termios
+import threading
+import time
+import tty
+
+from horus_turntable_motion import DEFAULT_ACCELERATION, move_duration, move_progress
+from horus_turntable_serial import (CYCLE_START, FEED_HOLD, RX_BUFFER_SIZE, SOFT_RESET,
+                                    STATUS_QUERY)
+
+BANNER = "Horus 0.2 ['$' for help]"
+BUILD_INFO = "[0.2.20160303:Horus simulator]"
+
+# Czas "bootloadera" po otwarciu portu, zanim pojawi się baner (sekundy)
+BOOT_DELAY = 0.2
+
+# Liczba bloków ruchu w planerze
+PLANNER_SIZE = 16
+
+# Maksymalna prędkość osi ($110) używana przez G0 (°/s)
+DEFAULT_MAX_RATE = 720.0
+
+# Kody błędów GRBL 1.1
+ERROR_EXPECTED_COMMAND = 1
+ERROR_BAD_NUMBER = 2
+ERROR_INVALID_STATEMENT = 3
+ERROR_NEGATIVE_VALUE = 4
+ERROR_SETTING_DISABLED = 5
+ERROR_ALARM_LOCK = 9
+ERROR_UNSUPPORTED_COMMAND = 20
+ERROR_UNDEFINED_FEED_RATE = 22
+
+# Alarm po resecie w trakcie ruchu (pozycja może być utracona)
+ALARM_ABORT_CYCLE = 3
+
+WORD_RE = re.compile(r"([A-Z])([-+]?[0-9]*\.?[0-9]*)")
+COMMENT_RE = re.compile(r"\([^)]*\)|;.*$")
+
+SETTING_NAMES = {
+    0: 'step pulse, usec',
+    1: 'step idle delay, msec',
+    2: 'step port invert mask',
+    3: 'dir port invert mask',
+    4: 'step enable invert, bool',
+    10: 'status report mask',
+    11: 'junction deviation, mm',
+    13: 'report inches, bool',
+    20: 'soft limits, bool',
+    21: 'hard limits, bool',
+    22: 'homing cycle, bool',
+    100: 'x, step/deg',
+    110: 'x max rate, deg/sec',
+    120: 'x accel, deg/sec^2',
+    130: 'x max travel, deg',
+}
+
+
+class MotionBlock:
+    """Jeden ruch w planerze symulatora"""
+
+    __slots__ = ('start_position', 'target', 'speed', 'acceleration', 'duration',
+                 'start_time')
+
+    def __init__(self, start_position, target, speed, acceleration):
+        self.start_position = start_position
+        self.target = target
+        self.speed = speed
+        self.acceleration = acceleration
+        self.duration = move_duration(target - start_position, speed, acceleration)
+        self.start_time = None  # Czas wirtualny startu, ustalany przy wejściu na czoło
+
+    def can_extend(self, target, speed, now):
+        """
+        Czy ruch do target może przedłużyć ten blok bez zatrzymania
+
+        Tylko w tym samym kierunku, z tą samą prędkością i zanim blok
+        zaczął hamować - wtedy profil do tej chwili się nie zmienia.
+        """
+        distance = self.target - self.start_position
+        if speed != self.speed or distance == 0 or (target - self.target) * distance <= 0:
+            return False
+        if self.start_time is None:
+            return True
+        peak = min(self.speed, math.sqrt(abs(distance) * self.acceleration))
+        return now - self.start_time < self.duration - peak / self.acceleration
+
+    def extend(self, target):
+        self.target = target
+        self.duration = move_duration(target - self.start_position, self.speed,
+                                      self.acceleration)
+
+
+class HorusSimulator:
+    """
+    Wirtualny talerz Horus 0.2 po stronie master pseudoterminala
+
+    Wątek I/O odbiera bajty (komendy czasu rzeczywistego obsługuje od razu),
+    a wątek wykonawczy przetwarza linie po kolei, czekając na miejsce
+    w planerze, tak jak firmware wstrzymuje 'ok' przy pełnym buforze.
+    """
+
+    def __init__(self, acceleration=DEFAULT_ACCELERATION, max_rate=DEFAULT_MAX_RATE,
+                 boot_delay=BOOT_DELAY, planner_size=PLANNER_SIZE, baudrate=None,
+                 log=None):
+        """
+        Args:
+            acceleration: Przyspieszenie ($120) w stopniach/sekundę²
+            max_rate: Maksymalna prędkość ($110) w stopniach/sekundę
+            boot_delay: Opóźnienie banera po otwarciu portu (sekundy)
+            planner_size: Liczba bloków ruchu mieszczących się w planerze
+            baudrate: Modelowana prędkość łącza (8N1, 10 bitów na bajt);
+                      None = bez opóźnień transmisji
+            log: Funkcja przyjmująca komunikaty diagnostyczne (None = cisza)
+        """
+        self.settings = {0: 10, 1: 25, 2: 0, 3: 0, 4: 0, 10: 3, 11: 0.010, 13: 0,
+                         20: 0, 21: 0, 22: 0, 100: 16.0, 110: max_rate,
+                         120: acceleration, 130: 360.0}
+        self.boot_delay = boot_delay
+        self.planner_size = planner_size
+        self.baudrate = baudrate
+        self.log = log
+        self.port = None
+
+        # Statystyki
+        self.lines_received = 0
+        self.errors_sent = 0
+        self.rx_overflows = 0
+
+        self._master = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._threads = []
+        self._running = False
+        self._attached = False
+        self._packet_mode = False
+        self._banner_due = None
+        self._rx = bytearray()
+        self._reset_state()
+
+    # Stan firmware
+
+    def _reset_state(self):
+        """Stan po resecie: pusty planer, F nieznane, tryb absolutny"""
+        self.position = getattr(self, 'position', 0.0)
+        self.feed_rate = None
+        self.motion_mode = 1
+        self.absolute = True
+        self.motor_enabled = False
+        self.alarm = False
+        self._planner = collections.deque()
+        self._planned_position = self.position
+        self._hold_since = None
+        self._held_total = 0.0
+        self._generation = getattr(self, '_generation', 0) + 1
+
+    @property
+    def acceleration(self):
+        return float(self.settings[120])
+
+    @property
+    def max_rate(self):
+        return float(self.settings[110])
+
+    def _clock(self):
+        """Czas wirtualny ruchu - stoi podczas wstrzymania (!)"""
+        now = self._hold_since if self._hold_since is not None else time.monotonic()
+        return now - self._held_total
+
+    def _advance(self):
+        """Zdejmuje z planera zakończone bloki (wywoływać pod blokadą)"""
+        now = self._clock()
+        while self._planner:
+            block = self._planner[0]
+            if block.start_time is None:
+                block.start_time = now
+            end = block.start_time + block.duration
+            if end > now:
+                break
+            self._planner.popleft()
+            self.position = block.target
+            if self._planner:
+                self._planner[0].start_time = end
+        if not self._planner:
+            self._planned_position = self.position
+
+    def _current_position(self):
+        """Pozycja talerza w tej chwili, z interpolacją trwającego ruchu"""
+        self._advance()
+        if not self._planner:
+            return self.position
+        block = self._planner[0]
+        elapsed = self._clock() - block.start_time
+        return block.start_position + move_progress(
+            elapsed, block.target - block.start_position, block.speed, block.acceleration)
+
+    def _time_to_next_block_end(self):
+        """Czas rzeczywisty do końca bloku na czele planera (None = brak ruchu)"""
+        if not self._planner or self._hold_since is not None:
+            return None
+        block = self._planner[0]
+        return max(0.0, block.start_time + block.duration - self._clock())
+
+    @property
+    def state(self):
+        """Stan GRBL: Idle, Run, Hold lub Alarm"""
+        with self._cond:
+            self._advance()
+            return self._state()
+
+    def _state(self):
+        if self.alarm:
+            return 'Alarm'
+        if self._hold_since is not None:
+            return 'Hold'
+        return 'Run' if self._planner else 'Idle'
+
+    def status_report(self):
+        """Raport statusu w formacie GRBL 0.9"""
+        with self._cond:
+            position = self._current_position()
+            state = self._state()
+            planner = len(self._planner)
+            rx = len(self._rx)
+        pos = f"{position:.3f},0.000,0.000"
+        return f"<{state},MPos:{pos},WPos:{pos},Buf:{planner},RX:{rx}>"
+
+    # Cykl życia
+
+    def start(self):
+        """
+        Otwiera pseudoterminal i uruchamia wątki symulatora
+
+        Returns:
+            Ścieżka portu (strona slave) do podania kontrolerowi
+        """
+        if self._running:
+            return self.port
+        self._master, slave = pty.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        # Zamykamy slave, by widzieć otwarcie portu przez klienta (POLLHUP znika)
+        os.close(slave)
+        # Tryb pakietowy: tcflush klienta przy otwarciu portu (pyserial robi go
+        # zawsze) dociera jako bajt sterujący - szybkie zamknięcie i ponowne
+        # otwarcie, którego POLLHUP nie zdążył pokazać, też jest widoczne
+        self._packet_mode = hasattr(termios, 'TIOCPKT')
+        if self._packet_mode:
+            fcntl.ioctl(self._master, termios.TIOCPKT, struct.pack('i', 1))
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._io_loop, daemon=True, name="horus-sim-io"),
+            threading.Thread(target=self._process_loop, daemon=True, name="horus-sim-cpu"),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self.port
+
+    def stop(self):
+        """Zatrzymuje wątki i zamyka pseudoterminal"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+        self._threads = []
+        if self._master is not None:
+            os.close(self._master)
+            self._master = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _log(self, message):
+        if self.log:
+            self.log(message)
+
+    def _wire_delay(self, nbytes):
+        """Czeka tyle, ile nbytes zajmuje na łączu przy self.baudrate"""
+        if self.baudrate:
+            time.sleep(nbytes * 10.0 / self.baudrate)
+
+    def _write(self, text):
+        """Wysyła linię do klienta (ignoruje zamknięty port)"""
+        if not self._attached:
+            return
+        data = (text + "\r\n").encode()
+        with self._write_lock:
+            self._wire_delay(len(data))
+            try:
+                os.write(self._master, data)
+            except OSError:
+                return
+        self._log(f"⬅️ {text}")
+
+    # Wątek I/O
+
+    def _io_loop(self):
+        """Odbiera bajty, wykrywa otwarcie/zamknięcie portu i wysyła baner"""
+        poller = select.poll()
+        poller.register(self._master, select.POLLIN)
+        while self._running:
+            # Bez klienta odpytujemy częściej, by szybko zauważyć otwarcie portu
+            timeout = 0.05 if self._attached else 0.01
+            if self._banner_due is not None:
+                timeout = max(0.0, min(timeout, self._banner_due - time.monotonic()))
+            events = poller.poll(timeout * 1000)
+            if self._banner_due is not None and time.monotonic() >= self._banner_due:
+                self._banner_due = None
+                self._write("")
+                self._write(BANNER)
+            if not events:
+                # Przy zamkniętym slave poll zwraca POLLHUP od razu - cisza znaczy otwarcie
+                if not self._attached:
+                    self._on_open()
+                continue
+            flags = events[0][1]
+            if flags & select.POLLHUP and not flags & select.POLLIN:
+                if self._attached:
+                    self._attached = False
+                    self._log("🔌 Klient zamknął port")
+                time.sleep(0.01)
+                continue
+            opened = not self._attached
+            if opened:
+                self._on_open()
+            try:
+                data = os.read(self._master, 1024)
+            except OSError:
+                if flags & select.POLLHUP:
+                    self._attached = False
+                    time.sleep(0.01)
+                continue
+            if self._packet_mode:
+                if data[:1] != bytes([termios.TIOCPKT_DATA]):
+                    # Bajt sterujący - każde otwarcie portu to reset przez DTR
+                    if data[0] & termios.TIOCPKT_FLUSHREAD and not opened:
+                        self._on_open()
+                    continue
+                data = data[1:]
+            if self._banner_due is not None:
+                continue  # Bootloader - bajty giną
+            self._wire_delay(len(data))
+            self._on_data(data)
+
+    def _on_open(self):
+        """Klient otworzył port - jak reset Arduino przez DTR"""
+        self._attached = True
+        self._log("🔗 Klient otworzył port - restart firmware")
+        with self._cond:
+            self._rx.clear()
+            self.position = self._current_position()
+            self._reset_state()
+            self._cond.notify_all()
+        self._banner_due = time.monotonic() + self.boot_delay
+
+    def _on_data(self, data):
+        """Rozdziela komendy czasu rzeczywistego od zwykłych bajtów linii"""
+        for byte in data:
+            char = chr(byte)
+            if char == STATUS_QUERY:
+                self._write(self.status_report())
+            elif char == FEED_HOLD:
+                self._feed_hold()
+            elif char == CYCLE_START:
+                self._cycle_start()
+            elif char == SOFT_RESET:
+                self._soft_reset()
+            else:
+                with self._cond:
+                    self._rx.append(byte)
+                    if len(self._rx) > RX_BUFFER_SIZE + 1:
+                        self.rx_overflows += 1
+                    if byte == 0x0A:
+                        self._cond.notify_all()
+
+    def _feed_hold(self):
+        with self._cond:
+            self._advance()
+            if self._planner and self._hold_since is None:
+                self._hold_since = time.monotonic()
+                self._log("⏸️ Wstrzymanie ruchu")
+
+    def _cycle_start(self):
+        with self._cond:
+            if self._hold_since is not None:
+                self._held_total += time.monotonic() - self._hold_since
+                self._hold_since = None
+                self._cond.notify_all()
+                self._log("▶️ Wznowienie ruchu")
+
+    def _soft_reset(self):
+        """Ctrl-X: przerywa ruch, czyści planer i bufor RX, wypisuje baner"""
+        with self._cond:
+            moving = bool(self._planner) and self._hold_since is None
+            self.position = self._current_position()
+            self._rx.clear()
+            self._reset_state()
+            # GRBL blokuje się po przerwaniu ruchu - pozycja mogła zostać zgubiona
+            self.alarm = moving
+            self._cond.notify_all()
+        if moving:
+            self._write(f"ALARM:{ALARM_ABORT_CYCLE}")
+        self._write("")
+        self._write(BANNER)
+        if moving:
+            self._write("['$H'|'$X' to unlock]")
+
+    # Wątek wykonawczy
+
+    def _process_loop(self):
+        """Wykonuje kolejne linie z bufora RX"""
+        while True:
+            with self._cond:
+                while self._running and b'\n' not in self._rx:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                end = self._rx.index(b'\n')
+                raw = bytes(self._rx[:end])
+                del self._rx[:end + 1]
+                generation = self._generation
+            self.lines_received += 1
+            line = raw.decode('ascii', 'replace').strip()
+            self._log(f"➡️ {line}")
+            reply = self._execute(line, generation)
+            if reply is None:
+                continue  # Reset w trakcie - firmware nie odpowiada na przerwaną linię
+            with self._cond:
+                if generation != self._generation:
+                    continue
+            if reply:
+                self.errors_sent += 1
+                self._write(f"error:{reply}")
+            else:
+                self._write("ok")
+
+    def _wait_for(self, predicate, generation, timeout=None):
+        """
+        Czeka (pod blokadą) aż predicate() będzie prawdziwe
+
+        Returns:
+            False, jeśli w międzyczasie nastąpił reset lub zatrzymanie
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self._advance()
+            if not self._running or generation != self._generation:
+                return False
+            if predicate():
+                return True
+            wait = self._time_to_next_block_end()
+            wait = 0.1 if wait is None else min(wait, 0.1)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return True
+                wait = min(wait, remaining)
+            self._cond.wait(wait)
+
+    def _execute(self, line, generation):
+        """
+        Wykonuje jedną linię
+
+        Returns:
+            0 dla 'ok', numer błędu albo None, gdy linię przerwał reset
+        """
+        line = COMMENT_RE.sub('', line).replace(' ', '').upper()
+        if not line:
+            return 0
+        if line.startswith('$'):
+            return self._system_command(line)
+        if self.alarm:
+            return ERROR_ALARM_LOCK
+
+        words = WORD_RE.findall(line)
+        if ''.join(letter + value for letter, value in words) != line:
+            return ERROR_EXPECTED_COMMAND
+        values = {}
+        g_codes = []
+        m_codes = []
+        for letter, value in words:
+            try:
+                number = float(value)
+            except ValueError:
+                return ERROR_BAD_NUMBER
+            if letter == 'G':
+                g_codes.append(number)
+            elif letter == 'M':
+                m_codes.append(number)
+            elif letter in 'FXPN':
+                values[letter] = number
+            else:
+                return ERROR_UNSUPPORTED_COMMAND
+
+        if any(g not in (0, 1, 4, 17, 21, 50, 54, 90, 91, 94) for g in g_codes):
+            return ERROR_UNSUPPORTED_COMMAND
+        if any(m not in (0, 2, 17, 18, 30) for m in m_codes):
+            return ERROR_UNSUPPORTED_COMMAND
+        if values.get('F', 0) < 0 or values.get('P', 0) < 0:
+            return ERROR_NEGATIVE_VALUE
+
+        with self._cond:
+            if generation != self._generation:
+                return None
+            if 90 in g_codes:
+                self.absolute = True
+            if 91 in g_codes:
+                self.absolute = False
+            if 'F' in values:
+                self.feed_rate = values['F']
+            for g in (0, 1):
+                if g in g_codes:
+                    self.motion_mode = g
+            if 17 in m_codes:
+                self.motor_enabled = True
+            if 18 in m_codes:
+                self.motor_enabled = False
+
+            if 50 in g_codes:
+                # Zerowanie pozycji czeka na zakończenie ruchów (synchronizacja planera)
+                if not self._wait_for(lambda: not self._planner, generation):
+                    return None
+                self.position = self._planned_position = 0.0
+
+            if 4 in g_codes:
+                if not self._wait_for(lambda: not self._planner, generation):
+                    return None
+                if values.get('P', 0) > 0 and not self._wait_for(
+                        lambda: False, generation, values['P']):
+                    return None
+                return 0
+
+            if 'X' in values:
+                if self.motion_mode == 1 and not self.feed_rate:
+                    return ERROR_UNDEFINED_FEED_RATE
+                speed = self.max_rate if self.motion_mode == 0 else self.feed_rate
+                target = values['X'] if self.absolute else self._planned_position + values['X']
+                if not self._wait_for(lambda: len(self._planner) < self.planner_size,
+                                      generation):
+                    return None
+                self._advance()
+                last = self._planner[-1] if self._planner else None
+                if last is not None and last.can_extend(target, speed, self._clock()):
+                    last.extend(target)  # Przejście bez hamowania
+                else:
+                    block = MotionBlock(self._planned_position, target, speed, self.acceleration)
+                    if not self._planner:
+                        block.start_time = self._clock()
+                    self._planner.append(block)
+                self._planned_position = target
+        return 0
+
+    def _system_command(self, line):
+        """Komendy $ (ustawienia, informacje, odblokowanie)"""
+        if line == '$':
+            self._write("$$ (view Grbl settings)")
+            self._write("$# (view # parameters)")
+            self._write("$G (view parser state)")
+            self._write("$I (view build info)")
+            self._write("$N (view startup blocks)")
+            self._write("$x=value (save Grbl setting)")
+            self._write("$X (kill alarm lock)")
+            self._write("~ (cycle start)")
+            self._write("! (feed hold)")
+            self._write("? (current status)")
+            self._write("ctrl-x (reset Grbl)")
+            return 0
+        if line == '$$':
+            for number, value in sorted(self.settings.items()):
+                if isinstance(value, float):
+                    value = f"{value:.3f}"
+                self._write(f"${number}={value} ({SETTING_NAMES[number]})")
+            return 0
+        if line == '$I':
+            self._write(BUILD_INFO)
+            return 0
+        if line == '$G':
+            distance = 90 if self.absolute else 91
+            feed = self.feed_rate or 0
+            self._write(f"[G{self.motion_mode} G54 G17 G21 G{distance} G94 M0 M5 M9 T0 "
+                        f"F{feed:g}. S0.]")
+            return 0
+        if line == '$#':
+            self._write("[G54:0.000,0.000,0.000]")
+            self._write("[G92:0.000,0.000,0.000]")
+            return 0
+        if line == '$N':
+            self._write("$N0=")
+            self._write("$N1=")
+            return 0
+        if line == '$X':
+            if self.alarm:
+                self.alarm = False
+                self._write("[Caution: Unlocked]")
+            return 0
+        if line == '$H':
+            return ERROR_SETTING_DISABLED
+        match = re.fullmatch(r"\$(\d+)=([-+]?[0-9]*\.?[0-9]+)", line)
+        if match:
+            number = int(match.group(1))
+            if number not in self.settings:
+                return ERROR_INVALID_STATEMENT
+            value = float(match.group(2))
+            if value < 0:
+                return ERROR_NEGATIVE_VALUE
+            self.settings[number] = value if isinstance(self.settings[number], float) else int(value)
+            return 0
+        return ERROR_INVALID_STATEMENT
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Symulator talerza Horus 0.2 (GRBL) na pseudoterminalu',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Przykłady:
+  %(prog)s                              # Wypisz port pty i działaj do Ctrl+C
+  %(prog)s --link /tmp/ttyHORUS         # Stała ścieżka (dowiązanie do pty)
+  %(prog)s --acceleration 400 --verbose # Szybsze rampy, log komunikacji
+        """)
+    parser.add_argument('--acceleration', type=float, default=DEFAULT_ACCELERATION,
+                        help='Przyspieszenie $120 (stopnie/s²)')
+    parser.add_argument('--max-rate', type=float, default=DEFAULT_MAX_RATE,
+                        help='Maksymalna prędkość $110 dla G0 (stopnie/s)')
+    parser.add_argument('--boot-delay', type=float, default=BOOT_DELAY,
+                        help='Opóźnienie banera po otwarciu portu (sekundy)')
+    parser.add_argument('--baudrate', type=int,
+                        help='Modeluj czas transmisji dla tej prędkości (domyślnie bez opóźnień)')
+    parser.add_argument('--link', help='Utwórz dowiązanie symboliczne do portu pty')
+    parser.add_argument('--verbose', action='store_true', help='Wypisuj ruch na porcie')
+    args = parser.parse_args()
+
+    simulator = HorusSimulator(acceleration=args.acceleration, max_rate=args.max_rate,
+                               boot_delay=args.boot_delay, baudrate=args.baudrate,
+                               log=print if args.verbose else None)
+    port = simulator.start()
+    if args.link:
+        if os.path.islink(args.link):
+            os.unlink(args.link)
+        os.symlink(port, args.link)
+        port = args.link
+
+    print(f"🧪 Symulator Horus 0.2 działa na {port}")
+    print(f"💡 Połącz się: python horus_turntable_gcode_linux_sender.py --port {port} --interactive")
+    print("   Ctrl+C kończy pracę")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        print("\n👋 Zatrzymuję symulator")
+    finally:
+        simulator.stop()
+        if args.link and os.path.islink(args.link):
+            os.unlink(args.link)
+        print(f"📊 Linie: {simulator.lines_received}, błędy: {simulator.errors_sent}, "
+              f"przepełnienia RX: {simulator.rx_overflows}")
+
+
+if __name__ == "__main__":
+    main()
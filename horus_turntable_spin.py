@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Obrót ze stałą prędkością przez dowolnie długi czas (wideo, fotogrametria)
+
+Zamiast jednego ruchu G1 do odległego celu (po którym śledzona pozycja
+nic nie mówi, dopóki ruch się nie skończy) ContinuousSpin wysyła krótkie
+odcinki o długości speed * segment_time i pilnuje, by w planerze firmware
+zawsze było co najmniej lead_time sekund ruchu. Planer GRBL łączy
+współliniowe odcinki bez hamowania, o ile ma przed sobą drogę potrzebną
+na zatrzymanie - dlatego lead_time jest nie krótszy niż czas hamowania.
+
+Odcinki są przyrostowe (G91): X każdej linii to długość odcinka, więc
+nie rośnie z czasem obrotu. Absolutne X po godzinach obrotu miałoby
+miliony stopni, a G50 (które skróciłoby X) czeka na opróżnienie planera,
+czyli zatrzymuje talerz. Każdy odcinek idzie razem z G90
+(SerialLink.submit_group()) - ruch absolutny z innego wątku (CLI, demon)
+nigdy nie trafi do firmware w trybie przyrostowym.
+
+Kąt zadany jest znaną funkcją czasu: rozpędzanie ze stałym
+przyspieszeniem, stała prędkość, a po stop() hamowanie na końcu
+ostatniego wysłanego odcinka (patrz angle_at()).
+
+Przykład:
+    spin = ContinuousSpin(controller, speed=30)
+    spin.start()
+    ...                                   # kamery pracują
+    angle = spin.angle_at(frame_time)     # kąt klatki (zadany)
+    spin.stop()
+"""
+
+import argparse
+import functools
+import sys
+import threading
+import time
+
+from horus_turntable_motion import format_position, move_progress
+
+# Czas ruchu w jednym odcinku (sekundy)
+DEFAULT_SEGMENT_TIME = 0.25
+
+# Ile sekund ruchu ma zawsze czekać w planerze
+DEFAULT_LEAD_TIME = 1.0
+
+# Odcinki, które mieszczą się w planerze firmware (GRBL: 16-18 bloków) z zapasem
+MAX_QUEUED_SEGMENTS = 12
+
+
+class ContinuousSpin:
+    """Obrót ze stałą prędkością podtrzymywany odcinkami wysyłanymi z wyprzedzeniem"""
+
+    def __init__(self, controller, speed, segment_time=DEFAULT_SEGMENT_TIME,
+                 lead_time=DEFAULT_LEAD_TIME):
+        """
+        Args:
+            controller: Połączony MakerBotDigitizerController (talerz stoi, silnik włączony)
+            speed: Prędkość w stopniach/sekundę (ujemna = w drugą stronę)
+            segment_time: Czas ruchu jednego odcinka (sekundy)
+            lead_time: Minimalny zapas ruchu w planerze (sekundy)
+        """
+        if speed == 0:
+            raise ValueError("Prędkość obrotu nie może być zerowa")
+        self.controller = controller
+        self.speed = abs(float(speed))
+        self.direction = 1.0 if speed > 0 else -1.0
+        self.acceleration = controller.acceleration
+        # Zapas musi pokryć drogę hamowania, inaczej planer zwalnia między odcinkami
+        self.lead_time = max(lead_time, self.speed / self.acceleration)
+        self.segment_time = max(segment_time, self.lead_time / MAX_QUEUED_SEGMENTS)
+        # Długość odcinka dokładnie taka, jak w G-code - suma odcinków = droga firmware
+        self.step = float(format_position(self.speed * self.segment_time))
+        self.origin = None  # Kąt startowy
+        self.start_time = None  # time.time() wysłania pierwszego odcinka
+        self.sent = 0.0  # Droga wysłana do firmware (stopnie, bez znaku)
+        self.acked = 0.0  # Droga potwierdzona przez firmware ('ok')
+        self.final = None  # Droga całkowita po stop()
+        self.segments = 0
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Czeka, aż talerz stanie, i zaczyna obrót
+
+        Returns:
+            True, jeśli obrót się rozpoczął
+        """
+        link = self.controller.link
+        if not self.controller.is_connected:
+            print("❌ Brak połączenia!")
+            return False
+        try:
+            lines = link.submit("G4 P0").result(self.controller.response_timeout * 6)
+        except Exception as e:
+            print(f"❌ Talerz nie zatrzymał się: {e}")
+            return False
+        if not lines or lines[-1].lower() != 'ok':
+            print(f"❌ Talerz nie zatrzymał się: {lines[-1] if lines else '?'}")
+            return False
+        self.origin = self.controller.current_position
+        self.sent = 0.0
+        self.acked = 0.0
+        self.final = None
+        self.segments = 0
+        self.error = None
+        self._stop.clear()
+        self.start_time = None
+        self._send_ahead()
+        if self.error:
+            return False
+        self._thread = threading.Thread(target=self._feed_loop, daemon=True,
+                                        name="horus-spin")
+        self._thread.start()
+        print(f"🌀 Obrót ciągły {self.direction * self.speed:g}°/s od {self.origin}° "
+              f"(odcinki {self.step:g}°, zapas {self.lead_time:g} s)")
+        return True
+
+    def stop(self, wait=True):
+        """
+        Przestaje dosyłać odcinki - talerz hamuje na końcu ostatniego
+
+        Args:
+            wait: Czekaj, aż talerz stanie
+
+        Returns:
+            Kąt końcowy (zadany)
+        """
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        if self.origin is None:
+            return None
+        if self.error is None:
+            self.final = self.sent
+        else:
+            self.final = self.acked  # Talerz stanie po ostatnim przyjętym odcinku
+        end = self.origin + self.direction * self.final
+        if self.segments:
+            self.controller.current_position = end
+        stop_time = self.stop_time
+        remaining = stop_time - time.time() if stop_time is not None else 0
+        if wait and remaining > 0 and self.controller.is_connected:
+            try:
+                self.controller.link.submit("G4 P0").result(remaining * 1.5 + 2.0)
+            except Exception as e:
+                print(f"⚠️ Brak potwierdzenia zatrzymania: {e}")
+        print(f"⏹️ Obrót zatrzymany na {end:.3f}° ({self.segments} odcinków)")
+        return end
+
+    @property
+    def stop_time(self):
+        """Chwila (time.time()), w której talerz stanie; None przed stop()"""
+        if self.final is None or self.start_time is None:
+            return None
+        return self.start_time + self._time_for(self.final) + self.speed / (2 * self.acceleration)
+
+    def angle_at(self, timestamp=None):
+        """
+        Kąt zadany w danej chwili
+
+        Args:
+            timestamp: Czas hosta (time.time()); domyślnie teraz
+
+        Returns:
+            Kąt w stopniach (przed startem - kąt startowy)
+        """
+        if self.origin is None:
+            return None
+        if self.start_time is None:
+            return self.origin
+        elapsed = (time.time() if timestamp is None else timestamp) - self.start_time
+        if self.final is not None:
+            travelled = abs(move_progress(elapsed, self.final, self.speed, self.acceleration))
+        else:
+            travelled = self._distance_at(elapsed)
+        return self.origin + self.direction * travelled
+
+    def _distance_at(self, elapsed):
+        """Droga po elapsed sekundach rozpędzania i jazdy ze stałą prędkością"""
+        if elapsed <= 0:
+            return 0.0
+        ramp_time = self.speed / self.acceleration
+        if elapsed < ramp_time:
+            return 0.5 * self.acceleration * elapsed * elapsed
+        return self.speed * elapsed - 0.5 * self.speed * ramp_time
+
+    def _time_for(self, distance):
+        """Odwrotność _distance_at(): kiedy zadany ruch pokona daną drogę"""
+        ramp_distance = self.speed * self.speed / (2 * self.acceleration)
+        if distance < ramp_distance:
+            return (2 * distance / self.acceleration) ** 0.5
+        return distance / self.speed + self.speed / (2 * self.acceleration)
+
+    def _send_ahead(self):
+        """Dosyła odcinki, aż w planerze będzie lead_time sekund ruchu"""
+        while not self._stop.is_set() and self.error is None:
+            elapsed = 0.0 if self.start_time is None else time.time() - self.start_time
+            if self._time_for(self.sent) - elapsed >= self.lead_time:
+                return
+            self.sent += self.step
+            distance = format_position(self.direction * self.step)
+            # G91 w każdym odcinku (G90 z poprzedniej pary je cofa); F tylko w pierwszym
+            command = (f"G91 G1 X{distance}" if self.segments else
+                       f"G91 G1 F{format_position(self.speed)} X{distance}")
+            try:
+                # G90 zaraz za odcinkiem - bez linii innych wątków pomiędzy
+                move, restore = self.controller.link.submit_group([command, "G90"])
+            except Exception as e:
+                self._abort(e)
+                return
+            if self.start_time is None:
+                self.start_time = time.time()
+                self.controller.speed = self.speed
+            self.segments += 1
+            move.add_done_callback(functools.partial(self._check_segment, self.step))
+            restore.add_done_callback(functools.partial(self._check_segment, 0.0))
+
+    def _check_segment(self, distance, future):
+        """Odrzucony odcinek lub G90 (error/ALARM, utrata łącza) kończy obrót"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            lines = future.result()
+            if lines and lines[-1].lower() == 'ok':
+                self.acked += distance
+                if self.error is not None:
+                    self._abort(self.error)  # Odcinek za odrzuconym też się wykona
+                return
+            error = lines[-1] if lines else '?'
+        self._abort(error)
+
+    def _abort(self, error):
+        """
+        Kończy obrót po błędzie - talerz stanie po ostatnim przyjętym odcinku
+
+        Wołane też w wątku czytającym łącza, więc tylko uaktualnia stan
+        (bez czekania na firmware). Kontroler zna pozycję końcową,
+        nawet gdy nikt nie wywoła stop().
+        """
+        if self.error is None:
+            self.error = error
+            print(f"\n❌ Obrót ciągły przerwany: {error}")
+            self._stop.set()
+        self.final = self.acked
+        if self.segments:
+            self.controller.current_position = self.origin + self.direction * self.acked
+
+    def _feed_loop(self):
+        """Pętla wątku - budzi się co pół odcinka i dosyła ruch"""
+        while not self._stop.wait(self.segment_time / 2):
+            self._send_ahead()
+
+
+def main():
+    from horus_turntable_gcode_linux_sender import MakerBotDigitizerController
+
+    parser = argparse.ArgumentParser(description='Obrót ciągły ze stałą prędkością - talerz Horus 0.2')
+    parser.add_argument('--port', default='/dev/ttyUSB0', help='Port szeregowy')
+    parser.add_argument('--baudrate', type=int, default=115200, help='Prędkość transmisji')
+    parser.add_argument('--speed', type=float, default=30.0,
+                        help='Prędkość (stopnie/s, ujemna = w drugą stronę)')
+    parser.add_argument('--duration', type=float, default=0.0,
+                        help='Czas obrotu w sekundach (0 = do Ctrl+C)')
+    args = parser.parse_args()
+
+    controller = MakerBotDigitizerController(args.port, args.baudrate)
+    if not controller.connect():
+        sys.exit(1)
+    spin = ContinuousSpin(controller, args.speed)
+    try:
+        controller.enable_motor()
+        if not spin.start():
+            sys.exit(1)
+        deadline = time.time() + args.duration if args.duration > 0 else None
+        while spin.is_running and (deadline is None or time.time() < deadline):
+            time.sleep(0.5)
+            print(f"\r🌀 {spin.angle_at():10.2f}°", end='', flush=True)
+        print()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        spin.stop()
+        controller.disconnect()
+    sys.exit(1 if spin.error else 0)
+
+
+if __name__ == "__main__":
+    main()
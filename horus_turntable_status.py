@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Telemetria statusu talerza Horus 0.2 (GRBL)
+
+Raporty odpowiedzi na '?' są parsowane do zwartych rekordów (czas, stan,
+pozycja, zapełnienie buforów) i zapisywane w buforze pierścieniowym opartym
+na modułach array - bez obiektu Pythona na każdy wpis. Rekord ma ~21 bajtów,
+więc kilka godzin odpytywania z częstotliwością 10 Hz mieści się w kilku MB,
+a ostatni stan jest dostępny w O(1).
+
+Raporty podają pozycję firmware. Zadanie liczy we własnych współrzędnych
+(pozycja firmware + przesunięcie), a przesunięcie zmienia się np. po
+ponownym połączeniu czy przenumerowaniu - StatusRing zapamiętuje więc
+układy współrzędnych (chwila początku, przesunięcie), a task_series()
+podaje pozycje w układzie zadania z numerem układu każdej próbki.
+"""
+
+import bisect
+import collections
+import math
+import re
+import threading
+import time
+from array import array
+
+from horus_turntable_serial import LINE_STATUS
+
+# Stany GRBL zakodowane jako małe liczby (indeks w krotce)
+STATES = ('Unknown', 'Idle', 'Run', 'Hold', 'Jog', 'Alarm', 'Door',
+          'Check', 'Home', 'Sleep', 'Queue')
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+
+# Domyślna pojemność bufora: 4 godziny przy 10 Hz
+DEFAULT_CAPACITY = 4 * 3600 * 10
+
+# Domyślna częstotliwość odpytywania (Hz)
+DEFAULT_POLL_RATE = 10.0
+
+MPOS_RE = re.compile(r"MPos:(-?[\d.]+)")
+WPOS_RE = re.compile(r"WPos:(-?[\d.]+)")
+BUF_RE = re.compile(r"Buf:(\d+)")
+RX_RE = re.compile(r"RX:(\d+)")
+BF_RE = re.compile(r"Bf:(\d+),(\d+)")
+
+StatusRecord = collections.namedtuple(
+    'StatusRecord', 'timestamp state position planner_fill rx_fill')
+StatusRecord.__doc__ = """Jeden raport statusu (pola niepodane przez firmware = -1)"""
+
+
+def parse_status(line, timestamp=None):
+    """
+    Parsuje raport statusu GRBL 0.9 lub 1.1
+
+    Przykłady:
+        <Idle,MPos:90.000,0.000,0.000,WPos:90.000,0.000,0.000,Buf:0,RX:0>
+        <Run|MPos:12.500,0.000,0.000|Bf:15,127|FS:200,0>
+
+    Args:
+        line: Linia raportu (z nawiasami < >)
+        timestamp: Czas odebrania (time.time()); domyślnie teraz
+
+    Returns:
+        StatusRecord lub None, jeśli linia nie jest raportem statusu
+    """
+    if not (line.startswith('<') and line.endswith('>')):
+        return None
+    body = line[1:-1]
+    state = re.split(r"[|,:]", body, maxsplit=1)[0]
+
+    match = MPOS_RE.search(body) or WPOS_RE.search(body)
+    position = float(match.group(1)) if match else float('nan')
+
+    planner_fill = rx_fill = -1
+    match = BUF_RE.search(body)
+    if match:
+        planner_fill = int(match.group(1))
+    match = RX_RE.search(body)
+    if match:
+        rx_fill = int(match.group(1))
+    match = BF_RE.search(body)
+    if match:
+        # GRBL 1.1 podaje wolne miejsce; bufor RX ma tam 128 bajtów
+        rx_fill = 128 - int(match.group(2))
+
+    return StatusRecord(time.time() if timestamp is None else timestamp,
+                        state, position, planner_fill, rx_fill)
+
+
+def poll_until_idle(link, timeout, interval=0.02):
+    """
+    Odpytuje '?' aż do dwóch kolejnych raportów Idle z pustym planerem
+
+    Tuż po 'ok' dla G1 planer może jeszcze nie wystartować, więc jeden raport
+    Idle to za mało. Nie wysyła żadnej linii - kolejka firmware zostaje wolna.
+
+    Args:
+        link: SerialLink z request_status()
+        timeout: Limit czasu w sekundach
+        interval: Odstęp między zapytaniami w sekundach
+
+    Returns:
+        True po zatrzymaniu; False przy alarmie lub po upływie limitu
+    """
+    deadline = time.monotonic() + timeout
+    idle_reports = 0
+    while time.monotonic() < deadline:
+        line = link.request_status()
+        record = parse_status(line) if line else None
+        if record and record.state == 'Alarm':
+            return False
+        if record and record.state == 'Idle' and record.planner_fill <= 0:
+            idle_reports += 1
+            if idle_reports >= 2:
+                return True
+        else:
+            idle_reports = 0
+        time.sleep(interval)
+    return False
+
+
+class StatusRing:
+    """
+    Bufor pierścieniowy rekordów statusu o stałym rozmiarze
+
+    Każde pole jest osobną tablicą array, a zapis nadpisuje najstarszy wpis.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """
+        Args:
+            capacity: Maksymalna liczba przechowywanych rekordów
+        """
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.states = array('b', bytes(capacity))
+        self.positions = array('d', bytes(8 * capacity))
+        self.planner_fill = array('h', bytes(2 * capacity))
+        self.rx_fill = array('h', bytes(2 * capacity))
+        self._next = 0
+        self._count = 0
+        # Układy współrzędnych zadania: czasy początku i przesunięcia (rosnąco)
+        self._frame_starts = [-math.inf]
+        self._frame_offsets = [0.0]
+        self._first_frame = 0  # Numer pierwszego zapamiętanego układu
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        """Pamięć zajmowana przez tablice (bajty)"""
+        return sum(a.itemsize * len(a) for a in (self.timestamps, self.states,
+                                                  self.positions, self.planner_fill,
+                                                  self.rx_fill))
+
+    def append(self, record):
+        """Dopisuje rekord, nadpisując najstarszy po zapełnieniu bufora"""
+        with self._lock:
+            i = self._next
+            self.timestamps[i] = record.timestamp
+            self.states[i] = STATE_CODES.get(record.state, 0)
+            self.positions[i] = record.position
+            self.planner_fill[i] = record.planner_fill
+            self.rx_fill[i] = record.rx_fill
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _record(self, i):
+        return StatusRecord(self.timestamps[i], STATES[self.states[i]],
+                            self.positions[i], self.planner_fill[i], self.rx_fill[i])
+
+    def latest(self):
+        """Ostatni rekord (O(1)) lub None, jeśli bufor jest pusty"""
+        with self._lock:
+            if not self._count:
+                return None
+            return self._record((self._next - 1) % self.capacity)
+
+    def records(self, last=None):
+        """
+        Zwraca rekordy od najstarszego do najnowszego
+
+        Args:
+            last: Ogranicz do N najnowszych rekordów (None = wszystkie)
+        """
+        with self._lock:
+            n = self._count if last is None else min(last, self._count)
+            start = (self._next - n) % self.capacity
+            return [self._record((start + k) % self.capacity) for k in range(n)]
+
+    def series(self, last=None):
+        """
+        Kopie tablic czasu, pozycji i stanu od najstarszego rekordu
+
+        Bez tworzenia obiektu na rekord - do obliczeń na tysiącach próbek.
+
+        Returns:
+            Krotka (array('d') czasów, array('d') pozycji, array('b') kodów STATES)
+        """
+        with self._lock:
+            n = self._count if last is None else min(last, self._count)
+            start = (self._next - n) % self.capacity
+            end = start + n
+            if end <= self.capacity:
+                return (self.timestamps[start:end], self.positions[start:end],
+                        self.states[start:end])
+            end -= self.capacity
+            return (self.timestamps[start:] + self.timestamps[:end],
+                    self.positions[start:] + self.positions[:end],
+                    self.states[start:] + self.states[:end])
+
+    def set_offset(self, offset, timestamp=None):
+        """
+        Zaczyna nowy układ współrzędnych zadania
+
+        Args:
+            offset: Pozycja zadania minus pozycja firmware od tej chwili
+            timestamp: Początek układu (time.time()); domyślnie teraz
+        """
+        with self._lock:
+            if offset == self._frame_offsets[-1]:
+                return
+            self._frame_starts.append(time.time() if timestamp is None else timestamp)
+            self._frame_offsets.append(offset)
+            # Układy sprzed najstarszego rekordu nie są już potrzebne
+            oldest = self.timestamps[(self._next - self._count) % self.capacity]
+            drop = bisect.bisect_right(self._frame_starts, oldest if self._count else math.inf) - 1
+            if drop > 0:
+                del self._frame_starts[:drop], self._frame_offsets[:drop]
+                self._first_frame += drop
+
+    def task_series(self, last=None):
+        """
+        Jak series(), ale z pozycjami w układzie zadania
+
+        Próbek z różnych układów nie wolno interpolować - między nimi
+        pozycja zadania skacze (np. o wielokrotność 360°).
+
+        Returns:
+            Krotka (array('d') czasów, array('d') pozycji zadania,
+            array('b') kodów STATES, array('l') numerów układów)
+        """
+        with self._lock:
+            starts = list(self._frame_starts)
+            offsets = list(self._frame_offsets)
+            first = self._first_frame
+        times, positions, states = self.series(last)
+        frames = array('l', [0]) * len(times)
+        # Czasy rosną - numer układu tylko się przesuwa
+        k = max(0, bisect.bisect_right(starts, times[0]) - 1) if times else 0
+        for i, t in enumerate(times):
+            while k + 1 < len(starts) and starts[k + 1] <= t:
+                k += 1
+            positions[i] += offsets[k]
+            frames[i] = first + k
+        return times, positions, states, frames
+
+    def clear(self):
+        """Usuwa wszystkie rekordy"""
+        with self._lock:
+            self._next = 0
+            self._count = 0
+
+
+class StatusPoller:
+    """
+    Wątek wysyłający '?' ze stałą częstotliwością
+
+    Odpowiedzi odbiera wątek czytający łącza i przekazuje do on_status(),
+    które zapisuje je w buforze pierścieniowym.
+    """
+
+    def __init__(self, link, ring=None, rate_hz=DEFAULT_POLL_RATE):
+        """
+        Args:
+            link: SerialLink, przez który wysyłane jest '?'
+            ring: StatusRing na rekordy (domyślnie nowy)
+            rate_hz: Częstotliwość odpytywania w Hz
+        """
+        self.link = link
+        self.ring = ring if ring is not None else StatusRing()
+        self.rate_hz = rate_hz
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        """Czy wątek odpytujący działa"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def on_status(self, line, timestamp, source=None):
+        """Subskrybent łącza - parsuje raport i dopisuje go do bufora"""
+        record = parse_status(line, timestamp)
+        if record is not None:
+            self.ring.append(record)
+
+    def start(self):
+        """Subskrybuje raporty statusu łącza i uruchamia wątek odpytujący"""
+        if self.is_running:
+            return
+        self.link.subscribe(self.on_status, LINE_STATUS)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll_loop, daemon=True,
+                                        name="horus-status-poller")
+        self._thread.start()
+
+    def stop(self):
+        """Zatrzymuje odpytywanie i wyrejestrowuje subskrybenta"""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        self.link.unsubscribe(self.on_status)
+
+    def _poll_loop(self):
+        """Pętla wątku - '?' co 1/rate_hz sekundy, dopóki łącze żyje"""
+        interval = 1.0 / self.rate_hz
+        next_poll = time.monotonic()
+        while not self._stop.is_set() and self.link.is_alive:
+            try:
+                self.link.realtime('?')
+            except Exception:
+                break
+            next_poll += interval
+            delay = next_poll - time.monotonic()
+            if delay < 0:
+                # Nie nadrabiamy zaległości seriami zapytań
+                next_poll = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
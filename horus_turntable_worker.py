@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Wątek portu szeregowego dla interfejsów graficznych
+
+SerialWorker jest jedynym właścicielem portu: otwiera go, zamyka i wysyła
+komendy po kolei z własnej kolejki. Wątek interfejsu tylko dopisuje zadania
+i od razu wraca, a wyniki dostaje przez funkcję post (w Tk: root.after),
+więc okno nie zamarza na czas oczekiwania na 'ok'.
+
+Wyjątkiem są komendy czasu rzeczywistego (!, ~, ?, Ctrl-X) - omijają
+kolejkę, bo muszą zadziałać także wtedy, gdy wątek czeka na odpowiedź.
+
+Wysłane linie i odpowiedzi trafiają do logu przez subskrypcję łącza,
+więc w logu jest też to, co wysłano z pominięciem kolejki (np. M18 przy
+zatrzymaniu awaryjnym).
+"""
+
+import queue
+import threading
+
+import serial
+
+from horus_turntable_serial import DEFAULT_TIMEOUT, LINE_RESPONSE, LINE_SENT, SerialLink
+
+
+class SerialWorker:
+    """Kolejka zadań portu obsługiwana przez jeden wątek"""
+
+    def __init__(self, post, log=None, response_timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            post: Funkcja post(callback, *args) wywołująca callback w wątku UI
+            log: Funkcja przyjmująca komunikaty, wołana wprost z wątku portu -
+                 musi być bezpieczna między wątkami; None = cisza
+            response_timeout: Maksymalne oczekiwanie na 'ok' (sekundy)
+        """
+        self.post = post
+        self.log = log
+        self.response_timeout = response_timeout
+        self.ser = None
+        self.link = None
+        self._jobs = queue.Queue()
+        self._thread = None
+
+    @property
+    def is_connected(self):
+        """Czy port jest otwarty, a wątek czytający łącza działa"""
+        return self.link is not None and self.link.is_alive
+
+    @property
+    def backlog(self):
+        """Liczba zadań czekających w kolejce"""
+        return self._jobs.qsize()
+
+    def start(self):
+        """Uruchamia wątek portu"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="horus-serial-worker")
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Porzuca zaległe zadania, zamyka port i kończy wątek"""
+        self.cancel_pending()
+        self._jobs.put(None)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+        self._close()
+
+    def call(self, func, *args, on_done=None, on_error=None):
+        """
+        Dopisuje zadanie do kolejki
+
+        Args:
+            func: Funkcja wykonywana w wątku portu
+            on_done: Callback z wynikiem func (w wątku UI)
+            on_error: Callback z wyjątkiem (w wątku UI); domyślnie wpis w logu
+        """
+        self._jobs.put((func, args, on_done, on_error))
+
+    def urgent(self, func, *args, on_done=None, on_error=None):
+        """
+        Wykonuje zadanie od razu w krótkim wątku pomocniczym, z pominięciem kolejki
+
+        Tylko dla operacji bezpiecznych równolegle z wysyłaniem linii
+        (np. '?' i Ctrl-X w SerialLink).
+        """
+        threading.Thread(target=self._execute, args=(func, args, on_done, on_error),
+                         daemon=True, name="horus-serial-urgent").start()
+
+    def cancel_pending(self):
+        """
+        Usuwa z kolejki zadania, które jeszcze się nie zaczęły
+
+        Returns:
+            Liczba porzuconych zadań
+        """
+        dropped = 0
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                return dropped
+            if job is None:
+                # Sygnał zakończenia musi zostać w kolejce
+                self._jobs.put(None)
+                return dropped
+            dropped += 1
+
+    def connect(self, port, baudrate, on_done=None, on_error=None):
+        """Otwiera port; on_done dostaje (gotowy, baner)"""
+        self.call(self._connect, port, baudrate, on_done=on_done, on_error=on_error)
+
+    def disconnect(self, on_done=None):
+        """Porzuca zaległe zadania i zamyka port"""
+        self.cancel_pending()
+        self.call(self._close, on_done=on_done)
+
+    def send(self, command, on_done=None, on_error=None):
+        """Wysyła linię i czeka na odpowiedź; on_done dostaje (linie, complete)"""
+        self.call(self._send, command, on_done=on_done, on_error=on_error)
+
+    def _connect(self, port, baudrate):
+        self._close()
+        self.ser = serial.Serial(
+            port=port,
+            baudrate=baudrate,
+            bytesize=serial.EIGHTBITS,
+            parity=serial.PARITY_NONE,
+            stopbits=serial.STOPBITS_ONE,
+            timeout=1
+        )
+        self.link = SerialLink(self.ser)
+        if self.log:
+            self.link.subscribe(self._log_line, (LINE_SENT, LINE_RESPONSE))
+        self.link.start()
+        # Wracamy, gdy tylko firmware wypisze baner lub odpowie na '?'
+        ready = self.link.wait_ready()
+        return ready, self.link.banner
+
+    def _close(self):
+        if self.link:
+            self.link.close()
+            self.link = None
+        elif self.ser and self.ser.is_open:
+            self.ser.close()
+        self.ser = None
+
+    def _send(self, command):
+        if not self.link:
+            raise serial.SerialException("Brak połączenia!")
+        return self.link.send(command, self.response_timeout)
+
+    def _log_line(self, line, timestamp, source):
+        """Subskrybent łącza - wysłane linie i odpowiedzi (wątek czytający)"""
+        if source == LINE_SENT:
+            self._log(f"📡 Wysłano: {line}")
+        else:
+            self._log(f"📨 Odpowiedź: {line}")
+
+    def _log(self, message):
+        if self.log:
+            self.log(message)
+
+    def _execute(self, func, args, on_done, on_error):
+        try:
+            result = func(*args)
+        except Exception as e:
+            if on_error:
+                self.post(on_error, e)
+            else:
+                self._log(f"❌ Błąd: {e}")
+            return
+        if on_done:
+            self.post(on_done, result)
+
+    def _run(self):
+        """Pętla wątku - zadania po kolei, aż do None"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            self._execute(*job)
@@ -0,0 +1,46 @@
+"""Wspólne fikstury testów - symulator Horus 0.2 na pseudoterminalu"""
+
+import os
+import sys
+
+import pytest
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from horus_turntable_gcode_linux_sender import MakerBotDigitizerController  # noqa: E402
+from horus_turntable_serial import SerialLink  # noqa: E402
+from horus_turntable_simulator import HorusSimulator  # noqa: E402
+
+# Szybkie ruchy - testy nie czekają na realne rozpędzanie talerza
+TEST_ACCELERATION = 5000.0
+
+
+@pytest.fixture
+def simulator():
+    """Uruchomiony symulator; zatrzymywany po teście"""
+    sim = HorusSimulator(acceleration=TEST_ACCELERATION, boot_delay=0.05)
+    sim.start()
+    yield sim
+    sim.stop()
+
+
+@pytest.fixture
+def link(simulator):
+    """SerialLink po banerze firmware"""
+    ser = serial.Serial(simulator.port, 115200, timeout=0.1)
+    link = SerialLink(ser)
+    link.start()
+    assert link.wait_ready()
+    yield link
+    link.close()
+
+
+@pytest.fixture
+def controller(simulator):
+    """Połączony MakerBotDigitizerController z włączonym silnikiem"""
+    controller = MakerBotDigitizerController(simulator.port, interactive=False)
+    assert controller.connect()
+    assert controller.enable_motor()
+    yield controller
+    controller.disconnect()
@@ -0,0 +1,20 @@
+"""Komendy potokowe: submit() / gather() kontrolera"""
+
+
+def test_submit_resolves_each_future_with_its_own_reply(controller):
+    futures = [controller.submit(command) for command in ("G1 F150", "G999", "M17")]
+    assert [future.result(5)[-1] for future in futures] == ['ok', 'error:20', 'ok']
+
+
+def test_gather_combines_replies_and_tracks_state(controller):
+    result = controller.gather([controller.submit("G1 F120"), controller.submit("G1 X30")])
+    assert result == ['ok', 'ok']
+    assert controller.speed == 120.0
+    assert controller.current_position == 30.0
+
+
+def test_rejected_feed_marks_speed_unknown(controller):
+    controller.gather([controller.submit("G1 F120")])
+    future = controller.submit("G1 F-5")  # error: ujemna wartość
+    assert future.result(5)[-1].startswith('error')
+    assert controller.speed is None
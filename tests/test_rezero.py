@@ -0,0 +1,74 @@
+"""Zerowanie firmware (G50) po pełnych obrotach"""
+
+import pytest
+
+from horus_turntable_daemon import ControllerDaemon
+from horus_turntable_motion import is_full_turn, wrap_offset
+
+
+@pytest.mark.parametrize("position, expected", [
+    (0, False),
+    (360, True),
+    (-720, True),
+    (720.0004, True),
+    (359, False),
+    (370, False),
+])
+def test_is_full_turn(position, expected):
+    assert is_full_turn(position) is expected
+
+
+@pytest.mark.parametrize("position, angle, expected", [
+    (90, None, 0.0),
+    (730, None, -720.0),
+    (-400, None, 360.0),
+    (370, 10, -360.0),
+    (-10, 350, 360.0),
+])
+def test_wrap_offset(position, angle, expected):
+    assert wrap_offset(position, angle) == expected
+
+
+def test_full_turn_rezeroes_firmware(controller, simulator):
+    assert controller.rotate_to_position(720, speed=2000)
+    assert controller.wait_until_idle()
+    assert simulator.position == 0.0
+    assert controller.current_position == 0.0
+    assert controller.position_offset == 0.0
+
+
+def test_no_rezero_keeps_firmware_position(controller, simulator):
+    controller.auto_rezero = False
+    assert controller.rotate_to_position(720, speed=2000)
+    assert controller.wait_until_idle()
+    assert simulator.position == 720.0
+    assert controller.current_position == 720.0
+
+
+def test_rejected_rezero_keeps_offset(controller, simulator):
+    assert controller.rotate_to_position(360, speed=2000)
+    controller.auto_rezero = False
+    assert controller.wait_until_idle()
+    controller.auto_rezero = True
+    simulator.alarm = True
+    controller._rezero_if_wrapped()
+    # G50 odrzucone - firmware nadal liczy od starego zera
+    assert simulator.position == 360.0
+    assert controller.current_position == 360.0
+    assert controller.position_offset == 0.0
+
+
+def test_daemon_option_applies_to_one_request(simulator):
+    daemon = ControllerDaemon(simulator.port, auto_reconnect=False)
+    assert daemon.controller.connect()
+    try:
+        reply = daemon.handle('move', [720, 2000], {'auto_rezero': False})
+        assert reply['ok']
+        assert simulator.position == 720.0
+        # Opcja obowiązuje tylko w swoim żądaniu
+        assert daemon.controller.auto_rezero is True
+        assert daemon.handle('wait', [])['ok']
+        assert simulator.position == 0.0
+        assert not daemon.handle('wait', [], {'speed': 100})['ok']
+    finally:
+        daemon.controller.disconnect()
@@ -0,0 +1,37 @@
+"""SerialLink: dopasowanie odpowiedzi FIFO, alarm, czyszczenie wejścia"""
+
+import time
+
+
+def test_responses_match_commands_in_order(link):
+    futures = [link.submit(command) for command in ("M17", "G1 F100", "G999", "M18", "$I")]
+    replies = [future.result(5) for future in futures]
+    assert [reply[-1] for reply in replies[:4]] == ['ok', 'ok', 'error:20', 'ok']
+    # Wielolinijkowa odpowiedź należy w całości do swojej komendy
+    assert replies[4][-1] == 'ok' and len(replies[4]) > 1
+
+
+def test_alarm_fails_every_pending_command(link, simulator):
+    link.send("M17")
+    link.send("G1 F100")
+    # Ruchy tam i z powrotem nie łączą się w planerze - część komend czeka na miejsce
+    futures = [link.submit(f"G1 X{10 * (k % 2)}") for k in range(1, 30)]
+    time.sleep(0.3)
+    assert not link.flush_input()  # Oczekujące komendy - bez czyszczenia
+    # Przerwany ruch: ALARM, potem baner - linie wysłane przed banerem firmware gubi
+    assert link.soft_reset()
+    endings = [future.result(5)[-1] for future in futures]
+    assert endings[0] == 'ok'
+    failed = endings[endings.index('ALARM:3'):]
+    assert failed and all(ending == 'ALARM:3' for ending in failed)
+    # Kolejne komendy dostają własne odpowiedzi
+    assert link.send("$X")[0][-1] == 'ok'
+    assert link.send("G4 P0")[0] == ['ok']
+
+
+def test_flush_input_when_idle(link):
+    assert link.send("M17")[0] == ['ok']
+    assert link.flush_input()
+    # Symulator traktuje tcflush jak ponowne otwarcie portu - czekamy na baner
+    time.sleep(0.3)
+    assert link.send("M18")[0] == ['ok']
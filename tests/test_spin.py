@@ -0,0 +1,89 @@
+"""Obrót ciągły: tryb G91 nie wycieka poza odcinki, stop i przerwanie"""
+
+import time
+
+import pytest
+
+from horus_turntable_spin import ContinuousSpin
+
+SPIN_SPEED = 90.0
+
+
+@pytest.fixture
+def executed(simulator, monkeypatch):
+    """Linie wykonane przez symulator razem z trybem (absolutny?) w chwili wykonania"""
+    lines = []
+    execute = simulator._execute
+
+    def record(line, generation):
+        lines.append((line, simulator.absolute))
+        return execute(line, generation)
+
+    monkeypatch.setattr(simulator, '_execute', record)
+    return lines
+
+
+def test_spin_stop_restores_absolute_mode(controller, simulator):
+    spin = ContinuousSpin(controller, SPIN_SPEED)
+    assert spin.start()
+    time.sleep(0.5)
+    end = spin.stop()
+    assert not spin.is_running
+    assert spin.segments > 1
+    assert end == pytest.approx(spin.segments * spin.step)
+    assert controller.current_position == end
+    assert simulator.absolute
+    assert controller.wait_until_idle()
+    assert simulator.position == pytest.approx(end)
+
+
+def test_other_commands_during_spin_stay_absolute(controller, simulator, executed):
+    spin = ContinuousSpin(controller, SPIN_SPEED)
+    assert spin.start()
+    for _ in range(10):
+        assert controller.submit("M17").result(2.0) == ['ok']
+        time.sleep(0.05)
+    spin.stop()
+    foreign = [absolute for line, absolute in executed if line == "M17"]
+    assert len(foreign) == 10
+    assert all(foreign)
+
+
+def test_rejected_segment_aborts_spin(controller, simulator, monkeypatch):
+    execute = simulator._execute
+    segments = []
+
+    def reject_fifth(line, generation):
+        if line.startswith("G91 G1"):
+            segments.append(line)
+            if len(segments) == 5:
+                return 33  # Błąd GRBL dla odcinka - firmware go nie wykona
+        return execute(line, generation)
+
+    monkeypatch.setattr(simulator, '_execute', reject_fifth)
+    spin = ContinuousSpin(controller, SPIN_SPEED)
+    assert spin.start()
+    deadline = time.monotonic() + 3.0
+    while spin.is_running and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not spin.is_running
+    assert spin.error == 'error:33'
+    end = spin.stop()
+    # Talerz staje po czterech przyjętych odcinkach
+    assert spin.acked == pytest.approx(4 * spin.step)
+    assert end == controller.current_position == pytest.approx(4 * spin.step)
+    # G90 za odrzuconym odcinkiem i tak wróciło do firmware
+    assert simulator.absolute
+    assert controller.wait_until_idle()
+    assert simulator.position == pytest.approx(end)
+
+
+def test_stop_after_failed_start(controller, monkeypatch):
+    def broken(commands, timeout=None):
+        raise OSError("łącze zamknięte")
+
+    monkeypatch.setattr(controller.link, 'submit_group', broken)
+    spin = ContinuousSpin(controller, SPIN_SPEED)
+    assert not spin.start()
+    assert spin.stop() == spin.origin
+    assert controller.current_position == spin.origin
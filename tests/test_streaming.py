@@ -0,0 +1,25 @@
+"""Strumieniowanie z liczeniem znaków GRBL"""
+
+from horus_turntable_serial import RX_BUFFER_SIZE
+
+
+def test_stream_keeps_rx_buffer_within_limit(link, simulator):
+    # Linie bez ruchu - liczy się tylko przepływ przez bufor RX
+    commands = [f"G1 F{100 + k} ; linia {k}" for k in range(300)]
+    inflight = []
+    count, errors = link.stream(commands, on_response=lambda entry: inflight.append(link.inflight_bytes))
+    assert count == len(commands)
+    assert not errors
+    assert simulator.rx_overflows == 0
+    # Kilka linii naraz w buforze RX firmware, ale nigdy ponad jego rozmiar
+    line_size = len(commands[-1]) + 1
+    assert line_size < max(inflight) <= RX_BUFFER_SIZE
+
+
+def test_stream_file_tracks_final_position(controller, simulator, tmp_path):
+    path = tmp_path / "ruch.gcode"
+    path.write_text("G1 F2000\n" + "".join(f"G1 X{k * 10} ; krok\n" for k in range(1, 19)))
+    assert controller.stream_file(str(path))
+    assert controller.wait_until_idle()
+    assert controller.current_position == 180.0
+    assert simulator.position == 180.0
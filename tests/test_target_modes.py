@@ -0,0 +1,46 @@
+"""Wybór celu ruchu modulo 360° i przenumerowanie pozycji"""
+
+import pytest
+
+from horus_turntable_motion import resolve_target
+
+
+@pytest.mark.parametrize("angle, current, mode, expected", [
+    (90, 3600, 'absolute', 90),
+    (90, 3600, 'shortest', 3690),
+    (10, 350, 'shortest', 370),
+    (350, 10, 'shortest', -10),
+    (180, 0, 'shortest', 180),      # remis - w prawo
+    (10, 350, 'positive', 370),
+    (350, 10, 'positive', 350),
+    (350, 10, 'negative', -10),
+    (10, 350, 'negative', 10),
+    (0, 720, 'positive', 720),      # już na miejscu - bez pełnego obrotu
+    (0, 720, 'negative', 720),
+])
+def test_resolve_target(angle, current, mode, expected):
+    assert resolve_target(angle, current, mode) == expected
+
+
+def test_resolve_target_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        resolve_target(90, 0, 'wstecz')
+
+
+def test_shortest_move_renormalizes_position(controller, simulator):
+    assert controller.rotate_to_position(350, speed=2000, mode='absolute')
+    assert controller.rotate_to_absolute_position(10, mode='shortest')
+    assert controller.wait_until_idle()
+    # Firmware przejechało 20° w prawo, zadanie widzi kąt 10°
+    assert simulator.position == 370.0
+    assert controller.current_position == 10.0
+    assert controller.position_offset == -360.0
+
+
+def test_rejected_move_keeps_position(controller, simulator):
+    assert controller.rotate_to_position(90, speed=2000)
+    assert controller.wait_until_idle()
+    simulator.alarm = True
+    assert controller.rotate_to_absolute_position(200, mode='shortest') is False
+    assert controller.current_position == 90.0
+    assert controller.position_offset == 0.0